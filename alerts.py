@@ -0,0 +1,200 @@
+"""Incremental trigger/alert engine over snapshot fields.
+
+A rule is a screener condition (see screener.py) on one ticker or on every
+pick:
+
+    {"id": "okta-ema21", "ticker": "OKTA", "when": "price > 78.95", "label": "Price > 78.95 (EMA21)"}
+
+`AlertEngine` keeps each ticker's last values of the fields rules read and
+the last outcome of every (rule, ticker). On a new snapshot only tickers
+whose values changed are looked at, and of their rules only those reading
+a changed field are re-evaluated. A rule fires when it turns true, so an
+alert is raised once per crossing rather than on every snapshot while the
+condition holds; a ticker's first snapshot only sets the baseline.
+
+Rules come from the Playbook (`PLAYBOOK_RULES`, every pick), the
+"🎯 Triggers:" line of focus_summary_text and an optional rules file
+(a JSON list of rules, data/alert_rules.json).
+"""
+import json
+import os
+import re
+
+from screener import compile_screen, field_value
+
+PLAYBOOK_RULES = (
+    {"id": "reclaim-sma200", "when": "price > sma200", "label": "Reclaimed SMA200"},
+    {"id": "break-sma200", "when": "price < sma200", "label": "Broke below SMA200"},
+    {"id": "reclaim-ema21", "when": "price > ema21", "label": "Closed above EMA21"},
+    {"id": "fail-ema21", "when": "price < ema21 and vol_ratio > 1", "label": "Lost EMA21 with RVOL > 1"},
+)
+
+_TRIGGER_LINE_RE = re.compile(r"^\W*Triggers:(.*)$", re.MULTILINE)
+_TRIGGER_RE = re.compile(
+    r"\$?(?P<ticker>[A-Za-z][A-Za-z0-9.\-]*)\s*(?P<op><=|>=|<|>)\s*\$?(?P<price>\d+(?:\.\d+)?)"
+    r"\s*(?:\((?P<note>[^)]*)\))?"
+)
+
+
+# --- Rule sources ---
+def summary_trigger_rules(summary_text: str) -> list:
+    """Rules for the price triggers listed in the radar summary ("OKTA > 78.95 (EMA21) | ...")."""
+    rules = []
+    for line in _TRIGGER_LINE_RE.findall(summary_text or ""):
+        for part in line.split("|"):
+            match = _TRIGGER_RE.fullmatch(part.strip())
+            if not match:
+                continue
+            ticker, op, price, note = match.group("ticker", "op", "price", "note")
+            label = f"Price {op} {price}" + (f" ({note})" if note else "")
+            rules.append({
+                "id": f"trigger-{ticker.upper()}-{op}{price}",
+                "ticker": ticker.upper(),
+                "when": f"price {op} {price}",
+                "label": label,
+            })
+    return rules
+
+
+def load_rule_file(path: str) -> list:
+    """Rules from a JSON list file; a missing file means no rules."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    return rules
+
+
+def snapshot_rules(data: dict, extra=()) -> list:
+    """Playbook rules, the snapshot's summary triggers and `extra` rules."""
+    summary = (data.get("meta") or {}).get("focus_summary_text")
+    return [*PLAYBOOK_RULES, *summary_trigger_rules(summary), *extra]
+
+
+def snapshot_rows(data: dict) -> dict:
+    """ticker -> row to evaluate: the portfolio row, with focus fields filling its gaps."""
+    rows = {}
+    for row in data.get("table_view_model") or []:
+        ticker = str(row.get("ticker") or "").strip().upper()
+        if ticker and ticker not in rows:
+            rows[ticker] = row
+    for item in data.get("focus_view_model") or []:
+        ticker = str(item.get("ticker") or "").strip().upper()
+        if not ticker:
+            continue
+        row = rows.get(ticker)
+        if row is None:
+            rows[ticker] = item
+        else:
+            rows[ticker] = {**row, **{k: v for k, v in item.items() if v is not None and row.get(k) is None}}
+    return rows
+
+
+# --- Engine ---
+class AlertEngine:
+    """Dependency-tracked rule state across snapshots."""
+
+    def __init__(self, rules=()):
+        self.rules = {} # id -> (ticker or None, Screen, label)
+        self.fields = frozenset()
+        self.evaluations = 0
+        self._every = {} # field -> ids of rules on every ticker reading it
+        self._per_ticker = {} # ticker -> field -> rule ids
+        self._rows = {} # ticker -> row of the last update
+        self._values = {} # ticker -> {field: value}
+        self._state = {} # ticker -> {rule id: last outcome}
+        self.set_rules(rules)
+
+    def set_rules(self, rules) -> None:
+        """Replaces the rule set; new rules take their baseline from the current values.
+
+        Raises ScreenSyntaxError for a rule whose condition does not parse.
+        """
+        compiled = {}
+        for rule in rules:
+            ticker = (rule.get("ticker") or "").strip().upper() or None
+            compiled[rule["id"]] = (ticker, compile_screen(rule["when"]), rule.get("label") or rule["when"])
+
+        removed = set(self.rules) - set(compiled)
+        added = [rule_id for rule_id in compiled if self.rules.get(rule_id) != compiled[rule_id]]
+        self.rules = compiled
+        self._every = {}
+        self._per_ticker = {}
+        for rule_id, (ticker, screen, _) in compiled.items():
+            index = self._every if ticker is None else self._per_ticker.setdefault(ticker, {})
+            for field in screen.fields:
+                index.setdefault(field, []).append(rule_id)
+        new_fields = frozenset(field for _, screen, _ in compiled.values() for field in screen.fields)
+        grown = new_fields - self.fields
+        self.fields = new_fields
+
+        for ticker, states in self._state.items():
+            for rule_id in removed:
+                states.pop(rule_id, None)
+        if not added and not grown:
+            return
+        # Baseline for new rules against the last snapshot, without firing
+        for ticker, values in self._values.items():
+            if grown:
+                row = self._rows[ticker]
+                values.update({field: field_value(field, row) for field in grown})
+            states = self._state[ticker]
+            for rule_id in added:
+                rule_ticker, screen, _ = compiled[rule_id]
+                if rule_ticker in (None, ticker):
+                    states[rule_id] = screen.matches(values)
+                    self.evaluations += 1
+
+    def _rules_reading(self, ticker: str, fields) -> set:
+        per_ticker = self._per_ticker.get(ticker, {})
+        ids = set()
+        for field in fields:
+            ids.update(self._every.get(field, ()))
+            ids.update(per_ticker.get(field, ()))
+        return ids
+
+    def update(self, rows: dict, changed=None) -> list:
+        """Evaluates a new snapshot (ticker -> row); returns the alerts that fired.
+
+        `changed`, when given, names the only tickers whose rows may differ
+        from the previous update (e.g. from a published delta).
+        """
+        fields = self.fields
+        rules = self.rules
+        fired = []
+        self._rows = rows
+        for ticker in list(self._values):
+            if ticker not in rows:
+                del self._values[ticker]
+                del self._state[ticker]
+
+        tickers = rows if changed is None else [t for t in {str(t).strip().upper() for t in changed} if t in rows]
+        for ticker in tickers:
+            values = {field: field_value(field, rows[ticker]) for field in fields}
+            old = self._values.get(ticker)
+            self._values[ticker] = values
+            if old is None:
+                dirty = fields
+                states = self._state[ticker] = {}
+            else:
+                dirty = [field for field in fields if values[field] != old.get(field)]
+                if not dirty:
+                    continue
+                states = self._state[ticker]
+
+            rule_ids = self._rules_reading(ticker, dirty)
+            self.evaluations += len(rule_ids)
+            for rule_id in rule_ids:
+                now = rules[rule_id][1].matches(values)
+                if now and states.get(rule_id) is False:
+                    _, screen, label = rules[rule_id]
+                    fired.append({
+                        "rule_id": rule_id,
+                        "ticker": ticker,
+                        "label": label,
+                        "values": {field: values[field] for field in sorted(screen.fields)},
+                    })
+                states[rule_id] = now
+        return fired
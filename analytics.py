@@ -1,11 +1,29 @@
 import streamlit as st
 import requests
 import json
-from datetime import datetime
+import hashlib
+import hmac
+from datetime import datetime, timedelta
 import zoneinfo
 
 # --- Config ---
 US_EASTERN_TZ = zoneinfo.ZoneInfo("America/New_York")
+# Hourly buckets (visits and unique visitors) expire after 8 days, daily unique sets after 35
+HOURLY_TTL = 8 * 24 * 3600
+DAILY_UNIQUE_TTL = 35 * 24 * 3600
+# Hours of visits shown in the admin panel's hourly chart
+HOURLY_WINDOW = 48
+# Unique-visitor windows (hours) read by the admin panel; up to 48 hours merges hourly sets, beyond that daily ones
+UNIQUE_WINDOWS = {"24h": 24, "7d": 7 * 24, "30d": 30 * 24}
+# Token buckets checked before any backend write, per anonymous client and per process:
+# (client tokens/s, client burst, global tokens/s, global burst)
+RATE_LIMITS = {
+    "feedback": (1 / 300, 3, 1 / 6, 30),
+    "visit": (1 / 10, 6, 20, 200)
+}
+# Stored feedback is trimmed to the newest entries, each capped in length
+FEEDBACK_MAX_ENTRIES = 1000
+FEEDBACK_MAX_CHARS = 4000
 
 def is_mobile(user_agent: str) -> bool:
     """Detect if the user agent belongs to a mobile device."""
@@ -20,6 +38,9 @@ def _upstash_request(cmds: list):
     token = st.secrets.get("UPSTASH_REDIS_REST_TOKEN")
     
     if not url or not token:
+        # ANALYTICS_BACKEND = "local" keeps analytics in process memory, for local runs without Redis
+        if st.secrets.get("ANALYTICS_BACKEND") == "local":
+            return _local_redis().pipeline(cmds)
         return None
     
     try:
@@ -34,55 +55,116 @@ def _upstash_request(cmds: list):
     except Exception:
         return None
 
-def track_visit_once_per_session():
-    """Tracks a visit exactly once per session. Fails open on errors."""
-    if st.session_state.get("_av_tracked"):
+_LOCAL_REDIS = None
+
+def _local_redis():
+    global _LOCAL_REDIS
+    if _LOCAL_REDIS is None:
+        from local_redis import LocalRedis
+        _LOCAL_REDIS = LocalRedis()
+    return _LOCAL_REDIS
+
+_LIMITERS = {}
+
+def rate_limiter(name: str):
+    """Process-wide limiter for one kind of write (see RATE_LIMITS)."""
+    limiter = _LIMITERS.get(name)
+    if limiter is None:
+        from rate_limit import RateLimiter
+        limiter = _LIMITERS.setdefault(name, RateLimiter(*RATE_LIMITS[name]))
+    return limiter
+
+def rate_limit_stats() -> dict:
+    """Limiter decisions per kind of write, for the admin panel."""
+    return {name: rate_limiter(name).stats() for name in RATE_LIMITS}
+
+def analytics_key(portfolio: str = None) -> str:
+    """Redis key namespace: APP_ANALYTICS_KEY, suffixed with the portfolio id for non-default portfolios."""
+    app_key = st.secrets.get("APP_ANALYTICS_KEY", "ap_public")
+    return f"{app_key}:{portfolio}" if portfolio else app_key
+
+def anonymous_client_id() -> str:
+    """Salted hash of the client's address, browser and language, stable across sessions.
+
+    Only the hash is sent to the backend. The salt is the ANALYTICS_SALT
+    secret (falling back to the analytics key); rotating it starts a new
+    population of ids.
+    """
+    if "_av_client" not in st.session_state:
+        headers = st.context.headers
+        address = headers.get("x-forwarded-for", "").split(",")[0].strip() or str(st.context.ip_address or "")
+        material = "|".join([address, headers.get("user-agent", ""), headers.get("accept-language", "")])
+        salt = st.secrets.get("ANALYTICS_SALT") or analytics_key()
+        st.session_state["_av_client"] = hmac.new(
+            salt.encode("utf-8"), material.encode("utf-8"), hashlib.sha256
+        ).hexdigest()[:16]
+    return st.session_state["_av_client"]
+
+def _hour_key(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H")
+
+def visit_commands(app_key: str, device_type: str, client_id: str, now: datetime) -> list:
+    """Pipeline recording one visit: visit counters plus the visitor in the unique (HyperLogLog) sets."""
+    today = now.strftime("%Y-%m-%d")
+    hour = _hour_key(now)
+    return [
+        # Visits: web:total, web:{date}, {type}:total, {type}:{date}, web:h:{hour}
+        ["INCR", f"visits:{app_key}:web:total"],
+        ["INCR", f"visits:{app_key}:web:{today}"],
+        ["INCR", f"visits:{app_key}:{device_type}:total"],
+        ["INCR", f"visits:{app_key}:{device_type}:{today}"],
+        ["INCR", f"visits:{app_key}:web:h:{hour}"],
+        ["EXPIRE", f"visits:{app_key}:web:h:{hour}", HOURLY_TTL],
+        # Unique visitors: fixed-size sets per hour, per day and all time
+        ["PFADD", f"uv:{app_key}:web:total", client_id],
+        ["PFADD", f"uv:{app_key}:web:{today}", client_id],
+        ["EXPIRE", f"uv:{app_key}:web:{today}", DAILY_UNIQUE_TTL],
+        ["PFADD", f"uv:{app_key}:web:h:{hour}", client_id],
+        ["EXPIRE", f"uv:{app_key}:web:h:{hour}", HOURLY_TTL]
+    ]
+
+def unique_visitor_keys(app_key: str, now: datetime, hours: int) -> list:
+    """Unique-visitor sets covering the last `hours` (hourly sets up to 48 hours, else whole days)."""
+    if hours <= 48:
+        return [f"uv:{app_key}:web:h:{_hour_key(now - timedelta(hours=i))}" for i in range(hours)]
+    days = -(-hours // 24)
+    return [f"uv:{app_key}:web:{(now - timedelta(days=i)).strftime('%Y-%m-%d')}" for i in range(days)]
+
+def track_visit_once_per_session(portfolio: str = None):
+    """Tracks a visit exactly once per session (and portfolio). Fails open on errors."""
+    tracked_flag = f"_av_tracked:{portfolio}" if portfolio else "_av_tracked"
+    if st.session_state.get(tracked_flag):
         return
 
     try:
         # 1. Get Context
         ua = st.context.headers.get("user-agent", "")
-        app_key = st.secrets.get("APP_ANALYTICS_KEY", "ap_public")
-        today = datetime.now(US_EASTERN_TZ).strftime("%Y-%m-%d")
+        app_key = analytics_key(portfolio)
+        now = datetime.now(US_EASTERN_TZ)
         
         # 2. Classify
         device_type = "mobile" if is_mobile(ua) else "desktop"
         
-        # 3. Prepare Pipeline
-        # We track:
-        # - web:total, web:{date}
-        # - {type}:total, {type}:{date}
-        cmds = [
-            ["INCR", f"visits:{app_key}:web:total"],
-            ["INCR", f"visits:{app_key}:web:{today}"],
-            ["INCR", f"visits:{app_key}:{device_type}:total"],
-            ["INCR", f"visits:{app_key}:{device_type}:{today}"]
-        ]
-        
-        # 4. Fire
-        _upstash_request(cmds)
+        # 3. Throttle reload storms before touching the backend
+        client_id = anonymous_client_id()
+        if rate_limiter("visit").allow(client_id):
+            # 4. Prepare Pipeline and fire
+            _upstash_request(visit_commands(app_key, device_type, client_id, now))
         
         # 5. Mark tracked
-        st.session_state["_av_tracked"] = True
+        st.session_state[tracked_flag] = True
     except Exception:
         pass # Fail open
 
-def get_stats():
-    """Retrieve the required 6 metrics from Redis."""
-    app_key = st.secrets.get("APP_ANALYTICS_KEY", "ap_public")
-    
-    # Generate date lists for day bucketing
-    from datetime import timedelta
-    now = datetime.now(US_EASTERN_TZ)
-    last_7d = [(now - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
+def stats_commands(app_key: str, now: datetime) -> list:
+    """The admin panel's reads, as one pipeline (one round-trip).
+
+    desktop_total (index 0), mobile_total (index 1), desktop daily keys
+    (indices 2 to 31), mobile daily keys (indices 32 to 61), then one merged
+    PFCOUNT per UNIQUE_WINDOWS entry plus the all-time one, then the hourly
+    visit counters (newest first).
+    """
     last_30d = [(now - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(30)]
-    
-    # We need:
-    # desktop_total (index 0)
-    # mobile_total (index 1)
-    # desktop daily keys (indices 2 to 31)
-    # mobile daily keys (indices 32 to 61)
-    
     cmds = [
         ["GET", f"visits:{app_key}:desktop:total"],
         ["GET", f"visits:{app_key}:mobile:total"]
@@ -91,11 +173,20 @@ def get_stats():
         cmds.append(["GET", f"visits:{app_key}:desktop:{d}"])
     for d in last_30d:
         cmds.append(["GET", f"visits:{app_key}:mobile:{d}"])
-        
-    results = _upstash_request(cmds)
-    
+    for hours in UNIQUE_WINDOWS.values():
+        cmds.append(["PFCOUNT", *unique_visitor_keys(app_key, now, hours)])
+    cmds.append(["PFCOUNT", f"uv:{app_key}:web:total"])
+    for i in range(HOURLY_WINDOW):
+        cmds.append(["GET", f"visits:{app_key}:web:h:{_hour_key(now - timedelta(hours=i))}"])
+    return cmds
+
+def parse_stats(results, now: datetime) -> dict:
+    """Metrics from the replies to `stats_commands`; "N/A" values when the backend is unavailable."""
     if not results or not isinstance(results, list):
-        return {k: "N/A" for k in ["mobile_7d", "mobile_30d", "mobile_total", "desktop_7d", "desktop_30d", "desktop_total"]}
+        stats = {k: "N/A" for k in ["mobile_7d", "mobile_30d", "mobile_total", "desktop_7d", "desktop_30d", "desktop_total"]}
+        stats.update({f"unique_{window}": "N/A" for window in [*UNIQUE_WINDOWS, "total"]})
+        stats["hourly"] = []
+        return stats
 
     def parse_val(r):
         if r is None or "result" not in r: return 0
@@ -114,6 +205,15 @@ def get_stats():
     mobile_daily = [parse_val(r) for r in results[32:62]]
     mobile_7d = sum(mobile_daily[:7])
     mobile_30d = sum(mobile_daily)
+
+    # Merged unique counts, then hourly visits (oldest first for charting)
+    at = 62
+    stats = {}
+    for window in [*UNIQUE_WINDOWS, "total"]:
+        stats[f"unique_{window}"] = parse_val(results[at])
+        at += 1
+    hourly = [parse_val(r) for r in results[at:at + HOURLY_WINDOW]]
+    hours = [(now - timedelta(hours=i)).strftime("%m-%d %H:00") for i in range(HOURLY_WINDOW)]
     
     return {
         "mobile_7d": mobile_7d,
@@ -121,32 +221,47 @@ def get_stats():
         "mobile_total": mobile_total,
         "desktop_7d": desktop_7d,
         "desktop_30d": desktop_30d,
-        "desktop_total": desktop_total
+        "desktop_total": desktop_total,
+        **stats,
+        "hourly": list(zip(reversed(hours), reversed(hourly)))
     }
 
-def submit_feedback(text: str, email: str = "", sa_username: str = "") -> bool:
+def get_stats(portfolio: str = None):
+    """Retrieve visit, unique-visitor and hourly metrics from Redis in a single round-trip."""
+    now = datetime.now(US_EASTERN_TZ)
+    return parse_stats(_upstash_request(stats_commands(analytics_key(portfolio), now)), now)
+
+def feedback_commands(app_key: str, payload: dict) -> list:
+    """Pipeline storing one feedback entry, keeping only the newest FEEDBACK_MAX_ENTRIES."""
+    # LPUSH adds to the head of the list; LTRIM drops the oldest beyond the cap
+    return [
+        ["LPUSH", f"feedback:{app_key}", json.dumps(payload)],
+        ["LTRIM", f"feedback:{app_key}", 0, FEEDBACK_MAX_ENTRIES - 1]
+    ]
+
+def submit_feedback(text: str, email: str = "", sa_username: str = "", portfolio: str = None) -> bool:
     """Submit user feedback to Upstash Redis as a JSON string."""
     if not text or not text.strip():
         return False
+    if not rate_limiter("feedback").allow(anonymous_client_id()):
+        return False
         
-    app_key = st.secrets.get("APP_ANALYTICS_KEY", "ap_public")
+    app_key = analytics_key(portfolio)
     timestamp = datetime.now(US_EASTERN_TZ).strftime("%Y-%m-%d %H:%M:%S")
     
     payload = {
         "timestamp": timestamp,
-        "text": text.strip(),
+        "text": text.strip()[:FEEDBACK_MAX_CHARS],
         "email": email.strip() if email else "",
         "sa_username": sa_username.strip() if sa_username else ""
     }
     
-    # LPUSH adds to the head of the list
-    cmds = [["LPUSH", f"feedback:{app_key}", json.dumps(payload)]]
-    res = _upstash_request(cmds)
+    res = _upstash_request(feedback_commands(app_key, payload))
     return res is not None
 
-def get_feedbacks() -> list:
+def get_feedbacks(portfolio: str = None) -> list:
     """Retrieve all feedback from Upstash Redis."""
-    app_key = st.secrets.get("APP_ANALYTICS_KEY", "ap_public")
+    app_key = analytics_key(portfolio)
     
     # LRANGE 0 -1 gets all elements
     cmds = [["LRANGE", f"feedback:{app_key}", "0", "-1"]]
@@ -1,12 +1,50 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import os
 import re
 import html
-from datetime import datetime
+import logging
 from streamlit_javascript import st_javascript
 
+from exports import DEFAULT_MAX_BYTES, EXPORT_FORMATS, ExportCache, ExportTooLarge, export_frame, iter_export
+from formatters import format_us_date, mask_summary_text, mask_ticker
+from render_cache import (
+    get_render_artifacts,
+    latest_cached_artifacts,
+    open_cached_artifacts,
+    snapshot_file_hash,
+    snapshot_hash,
+)
+from snapshot_delta import DeltaMismatch, apply_delta, find_delta
+from snapshot_schema import SECTION_VALIDATORS, SnapshotValidationError, validate_snapshot
+from screener import (
+    GRADE_FIELDS,
+    NUMERIC_FIELDS,
+    RATING_FIELDS,
+    TEXT_FIELDS,
+    ScreenerIndex,
+    ScreenSyntaxError,
+    build_screener_columns,
+    compile_screen,
+    quote_text,
+)
+from search_index import build_search_index, snapshot_documents
+from snapshot_stream import SnapshotTooLarge, StreamingSnapshot
+from view_models import (
+    artifact_key,
+    build_change_rows,
+    build_focus_artifacts,
+    build_meta_artifacts,
+    build_portfolio_columns,
+    build_portfolio_summary,
+    build_render_artifacts,
+    update_render_artifacts,
+)
+
+
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 st.set_page_config(
@@ -25,7 +63,7 @@ def is_mobile_device():
     mobile_keywords = ['Android', 'webOS', 'iPhone', 'iPad', 'iPod', 'BlackBerry', 'Windows Phone']
     return any(keyword in ua for keyword in mobile_keywords)
 
-def render_mobile_cards(df):
+def render_mobile_cards(df, as_of=None, ticker_index=None):
     """Renders the Portfolio DataFrame as a vertical list of Native Streamlit Containers"""
     if df is None or df.empty:
         st.info("No Active Picks")
@@ -44,31 +82,25 @@ def render_mobile_cards(df):
         key="mob_sort",
         label_visibility="collapsed"
     )
+    screened = render_screen_input(ticker_index)
 
     # --- Logic ---
-    # 1. Filter
-    if filter_txt:
-        needle = filter_txt.strip().upper()
-        if needle:
-            masked_match = df['ticker'].fillna('').astype(str).str.upper().str.contains(needle, regex=False)
-            raw_col = df['ticker_raw'] if 'ticker_raw' in df.columns else df['ticker']
-            raw_match = raw_col.fillna('').astype(str).str.upper().str.contains(needle, regex=False)
-            df = df[masked_match | raw_match]
-    
-    # 2. Sort
-    if sort_opt == "Ticker A-Z":
-        sort_col = "ticker_raw" if "ticker_raw" in df.columns else "ticker"
-        df = df.sort_values(by=sort_col, ascending=True)
-    elif sort_opt == "Hold Desc":
-        df = df.sort_values(by="hold_streak_days", ascending=False)
-
-    def coerce_float(value):
-        if value is None: return None
-        if isinstance(value, str) and not value.strip(): return None
-        try:
-            return float(value)
-        except (TypeError, ValueError):
+    # Filter and sort through the per-snapshot index (ticker prefix + screen)
+    if ticker_index is not None:
+        ids = ticker_index.ticker_prefix(filter_txt)
+        if screened is not None:
+            ids = np.intersect1d(ids, screened, assume_unique=True)
+        if sort_opt == "Hold Desc":
+            ids = ticker_index.sort(ids, "hold_streak_days", descending=True)
+        else:
+            ids = ticker_index.sort(ids)
+        df = df.iloc[ids]
+
+    def number_or_none(value):
+        # Numeric columns are type-normalized at load (snapshot_schema); only gaps remain
+        if value is None or pd.isna(value):
             return None
+        return float(value)
 
     def extract_float(value):
         if value is None:
@@ -99,7 +131,7 @@ def render_mobile_cards(df):
         # Check if ticker is masked logic or raw string
         # (Assuming 'ticker' col is already masked in main, but let's be safe)
         
-        price_value = coerce_float(row.get('price'))
+        price_value = number_or_none(row.get('price'))
         signal = row.get('quant', 'Hold') # Using 'quant' emoji as signal or raw text
         signal_text = format_signal_label(signal)
         signal_safe = html.escape(signal_text)
@@ -119,33 +151,28 @@ def render_mobile_cards(df):
         # Tech & Stats (Mini Summary)
         # Goal: RSI 60.00 · Vol 1.15x · :green[>E21] · :red[<S200]
         
-        # 1. Helper for safe float
+        # 1. Numeric formatting
         def format_float(val, precision=2):
-            f_val = extract_float(val)
+            f_val = number_or_none(val)
             if f_val is None:
                 return "-"
             return f"{f_val:.{precision}f}"
 
-        rsi_val = format_float(row.get('rsi14', '-'))
-        vol_val = format_float(row.get('vol', '-'))
-        atr_pct = format_float(row.get('atr14_pct', '-')) # Not in mini summary but needed for logic if added
+        rsi_val = format_float(row.get('rsi14'))
+        vol_val = format_float(row.get('vol'))
+        atr_pct = format_float(row.get('atr14_pct')) # Not in mini summary but needed for logic if added
         rsi_detail = rsi_val
         vol_detail = vol_val
         atr_detail = atr_pct
-        ema21_detail = format_float(row.get('ema21', '-'))
-        ema55_detail = format_float(row.get('ema55', '-'))
-        sma200_detail = format_float(row.get('sma200', '-'))
         
         # 2. Trend Logic
         # Need raw float for comparison
         raw_price = price_value # already float or None
         
-        def safe_float(v):
-            return extract_float(v)
-             
-        raw_e21 = safe_float(row.get('ema21'))
-        raw_e55 = safe_float(row.get('ema55'))
-        raw_s200 = safe_float(row.get('sma200'))
+        # EMA/SMA columns are display strings ("🟢 $450.32"), so pull the number out
+        raw_e21 = extract_float(row.get('ema21'))
+        raw_e55 = extract_float(row.get('ema55'))
+        raw_s200 = extract_float(row.get('sma200'))
         
         trend_tags = []
         if raw_price is not None:
@@ -239,364 +266,362 @@ def render_mobile_cards(df):
                 st.write(f"**Earnings**: {earning}")
                 st.write(f"**Hold Streak**: {streak} Days")
 
+                # Charts load on demand: an expander's body runs on every rerun, open or not
+                if as_of:
+                    st.divider()
+                    if st.toggle("History", key=f"mob_history_{index}"):
+                        chart = load_ticker_chart(row.get('ticker_raw'), as_of)
+                        if chart:
+                            render_history_chart(chart)
+                        else:
+                            st.caption("No history recorded yet.")
+
 
 # Path Resolution
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", "snapshot.json")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "snapshot.json")
 STYLE_PATH = os.path.join(BASE_DIR, "style", "style.css")
+RENDER_CACHE_DIR = os.path.join(DATA_DIR, "render_cache")
+HISTORY_DB_PATH = os.path.join(DATA_DIR, "history.sqlite")
+HISTORY_CACHE_DIR = os.path.join(RENDER_CACHE_DIR, "history")
+ALERT_RULES_PATH = os.path.join(DATA_DIR, "alert_rules.json")
+PORTFOLIOS_PATH = os.path.join(DATA_DIR, "portfolios.json")
+ALERT_WINDOW = 50
+SEARCH_RESULTS = 8
 
 if os.path.exists(STYLE_PATH):
     with open(STYLE_PATH, "r", encoding="utf-8") as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
+def get_setting(name: str, default=None):
+    """Optional setting from st.secrets; tolerates a missing secrets file."""
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
 # Removed st.cache_data to prevent stale snapshot loading
-def load_data():
+def load_snapshot_bytes():
     if not os.path.exists(SNAPSHOT_PATH):
         return None
-    with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def strip_evidence_refs(text: str) -> str:
-    if not text or not isinstance(text, str):
-        return ""
-    cleaned = re.sub(r"\s*\((?:[A-Z]\d+(?:,\s*)?)+\)", "", text)
-    cleaned = re.sub(r"\b[FNVB]\d+\b", "", cleaned)
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
-    cleaned = cleaned.replace(" ,", ",").replace(" .", ".")
-    return cleaned
-
-def mask_ticker(ticker: str) -> str:
-    if ticker is None:
-        return ""
-    value = str(ticker).strip().upper()
-    if not value:
-        return ""
-    
-    # NEW: Handle dot-separated tickers like BRK.B
-    if "." in value:
-        parts = value.split(".")
-        # Mask each part separately, e.g., BRK.B -> B**.B* or similar
-        # To match user vibe of keeping it recognizable but hidden
-        masked_parts = [mask_ticker(p) if p else "*" for p in parts]
-        return ".".join(masked_parts)
-
-    length = len(value)
-    if length <= 2:
-        return value[0] + "*"
-    if length == 3:
-        return value[0] + "**"
-    # For 4+: Preserve start and end, stars in middle
-    return f"{value[0]}{'*' * (length - 2)}{value[-1]}"
-
-
-def format_us_date(date_str: str) -> str:
-    """Formats a date string (with or without icon prefixes) to US MM/DD/YY format."""
-    if not date_str or str(date_str).strip() in ('', 'N/A', 'TBD', 'None'):
-        return str(date_str) if str(date_str) != 'None' else ''
-    
-    date_str = str(date_str).strip()
-    
-    # Try to extract an icon prefix + standard YYYY-MM-DD
-    # E.g., "⚠️ 2024-04-25" or "2024-04-25"
-    match = re.search(r'(.*?)\s*(\d{4}-\d{2}-\d{2})(.*)', date_str)
-    if match:
-        prefix = match.group(1).strip()
-        raw_date = match.group(2)
-        suffix = match.group(3).strip()
+    with open(SNAPSHOT_PATH, "rb") as f:
+        return f.read()
+
+def load_data():
+    raw = load_snapshot_bytes()
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+@st.cache_resource
+def _snapshot_state() -> dict:
+    """Last snapshot parsed by this process (hash, data, artifacts), kept for delta patching."""
+    return {}
+
+def _fill_indicators(data: dict):
+    """Computes indicator fields upstream left empty from the price history.
+
+    Only the latest unbroken run of daily closes is used (snapshot_closes),
+    so a field stays empty until that run covers its whole window. Returns (data for rendering, {section: filled tickers}); history is
+    best-effort, so any failure leaves the snapshot as published.
+    """
+    from indicators import fill_snapshot_indicators, tickers_missing_indicators
+    missing = tickers_missing_indicators(data)
+    if not missing or not os.path.exists(HISTORY_DB_PATH):
+        return data, {}
+    from history_store import connect, snapshot_closes
+    try:
+        conn = connect(HISTORY_DB_PATH)
         try:
-            d_obj = datetime.strptime(raw_date, "%Y-%m-%d")
-            formatted = d_obj.strftime("%m/%d/%y")
-            parts = [p for p in (prefix, formatted, suffix) if p]
-            return " ".join(parts)
-        except ValueError:
-            pass
-
-    # Try to extract M/D/YYYY or MM/DD/YYYY pattern
-    match2 = re.search(r'(.*?)\s*(\d{1,2}/\d{1,2}/\d{4})(.*)', date_str)
-    if match2:
-        prefix = match2.group(1).strip()
-        raw_date = match2.group(2)
-        suffix = match2.group(3).strip()
+            closes = snapshot_closes(conn, data, missing)
+        finally:
+            conn.close()
+        return fill_snapshot_indicators(data, closes)
+    except Exception as e:
+        logger.warning("Indicator backfill failed: %s", e)
+        return data, {}
+
+def _build_artifacts(raw: bytes, digest: str) -> dict:
+    """Applies a published delta to the in-memory snapshot when possible, else parses in full.
+
+    Snapshots are validated and type-normalized once here; a malformed one
+    raises SnapshotValidationError before anything is cached.
+    """
+    state = _snapshot_state()
+    base_hash = state.get("hash")
+    delta = find_delta(DATA_DIR, base_hash, digest) if base_hash else None
+
+    artifacts = None
+    published_changes = None
+    if delta is not None:
         try:
-            d_obj = datetime.strptime(raw_date, "%m/%d/%Y")
-            formatted = d_obj.strftime("%m/%d/%y")
-            parts = [p for p in (prefix, formatted, suffix) if p]
-            return " ".join(parts)
-        except ValueError:
-            pass
-
-    # Try to extract M/D/YY or MM/DD/YY pattern to ensure zero-padding
-    match3 = re.search(r'(.*?)\s*(\d{1,2}/\d{1,2}/\d{2})(.*)', date_str)
-    if match3:
-        prefix = match3.group(1).strip()
-        raw_date = match3.group(2)
-        suffix = match3.group(3).strip()
+            data, changed = apply_delta(state["data"], base_hash, delta)
+            data = validate_snapshot(data)
+            published_changes = set().union(*changed.values())
+            view_data, filled = _fill_indicators(data)
+            for section, tickers in filled.items():
+                changed[section] = changed.get(section, set()) | tickers
+            artifacts = update_render_artifacts(state["artifacts"], state["data"], view_data, changed)
+        except (DeltaMismatch, KeyError):
+            artifacts = None # Fall back to a full reload
+            published_changes = None
+    if artifacts is None:
+        data = json.loads(raw)
+        if data:
+            data = validate_snapshot(data)
+        artifacts = build_render_artifacts(_fill_indicators(data)[0] if data else data)
+
+    artifacts["snapshot_hash"] = digest
+    # Keep the snapshot as published: filled values are recomputed for every version
+    state.update(hash=digest, data=data, artifacts=artifacts)
+    _record_history(raw, digest)
+    if data:
+        _evaluate_alerts(data, digest, published_changes)
+    return artifacts
+
+def _build_streamed_artifacts(data: dict, digest: str) -> dict:
+    """Full artifacts from a streamed snapshot, whose sections were validated as they were read.
+
+    The file is not read again, so the raw bytes are not archived here;
+    publish_snapshot records the history of published snapshots.
+    """
+    artifacts = build_render_artifacts(_fill_indicators(data)[0])
+    artifacts["snapshot_hash"] = digest
+    _snapshot_state().update(hash=digest, data=data, artifacts=artifacts)
+    _evaluate_alerts(data, digest)
+    return artifacts
+
+def _record_history(raw: bytes, digest: str):
+    """Appends the snapshot to the history store; history is best-effort and never blocks the page."""
+    from history_store import connect, ingest_snapshot
+    try:
+        conn = connect(HISTORY_DB_PATH)
         try:
-            d_obj = datetime.strptime(raw_date, "%m/%d/%y")
-            formatted = d_obj.strftime("%m/%d/%y")
-            parts = [p for p in (prefix, formatted, suffix) if p]
-            return " ".join(parts)
-        except ValueError:
-            pass
-            
-    return date_str
-
-def safe_float(value):
-    if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, str):
-        cleaned = value.replace(",", "")
-        match = re.search(r"[-+]?\d*\.?\d+", cleaned)
-        if match:
-            try:
-                return float(match.group())
-            except (TypeError, ValueError):
-                return None
-    return None
-
-
-def format_distance_pct(val) -> str:
-    f_val = safe_float(val)
-    if f_val is None:
-        return "—"
-    return f"{f_val:+.1f}%"
-
-
-def format_catalyst_label(dte) -> str:
-    f_val = safe_float(dte)
-    if f_val is None:
-        return "—"
-    dte_int = int(f_val)
-    if dte_int >= 0:
-        return f"ER -{dte_int}d"
-    return f"ER +{abs(dte_int)}d"
-
-
-def resolve_trend_label(trend_color) -> str:
-    color = str(trend_color or "").upper()
-    if color == "GREEN":
-        return "bullish"
-    if color == "RED":
-        return "bearish"
-    return "neutral"
-
-
-def format_tech_status(item: dict) -> str:
-    trigger_key = str(item.get('primary_trigger_key') or '')
-    line_label = 'SMA200'
-    dist_val = item.get('dist_sma200_pct')
-    if 'EMA55' in trigger_key:
-        line_label = 'EMA55'
-        dist_val = item.get('dist_ema55_pct')
-    elif 'EMA21' in trigger_key:
-        line_label = 'EMA21'
-        dist_val = item.get('dist_ema21_pct')
-
-    status = '—'
-    f_dist = safe_float(dist_val)
-    if f_dist is not None:
-        status = 'below' if f_dist < 0 else 'above'
-        status = f"{status} {line_label}"
-    confirm_days = item.get('break_confirm_days')
-    f_confirm = safe_float(confirm_days)
-    if f_confirm is not None and f_confirm > 0 and status != '—':
-        status = f"{status} ({int(f_confirm)}d)"
-    return status
-
-
-def determine_setup_label(item: dict) -> str:
-    dte = safe_float(item.get('dte'))
-    trigger_key = str(item.get('primary_trigger_key') or '')
-    signal_text = str(item.get('signal') or '')
-    volume_alert = bool(item.get('volume_alert')) if item.get('volume_alert') is not None else False
-    news_raw = safe_float(item.get('news_sentiment_raw'))
-
-    if dte is not None and 0 <= int(dte) <= 5:
-        return 'IMMINENT_CATALYST'
-    if 'EARNINGS' in trigger_key or 'Earnings' in signal_text:
-        return 'IMMINENT_CATALYST'
-    if volume_alert or 'VOLUME' in trigger_key or 'Volume' in signal_text:
-        return 'VOL_MOMENTUM'
-    if news_raw is not None and abs(news_raw) >= 0.6:
-        return 'NEWS_SHOCK'
-    if any(key in trigger_key for key in ['BREAK', 'SELL_RULE', 'GAP_DOWN']) or 'Break' in signal_text:
-        return 'BREAK_RISK'
-    return 'WATCH'
-
-
-def format_urgency_news(urgency_val, news_raw) -> str:
-    f_urgency = safe_float(urgency_val)
-    if f_urgency is None:
-        urgency_str = '—'
-    else:
-        urgency_str = f"{f_urgency:.0f}"
-    if news_raw is None:
-        news_str = '—'
-    else:
-        news_str = f"{news_raw:+.2f}"
-    return f"{urgency_str} | News {news_str}"
-
-
-def format_key_levels_line(item: dict) -> str:
-    parts = []
-    for label, level_key, dist_key in [
-        ('SMA200', 'sma200', 'dist_sma200_pct'),
-        ('EMA55', 'ema55', 'dist_ema55_pct'),
-        ('EMA21', 'ema21', 'dist_ema21_pct')
-    ]:
-        level = safe_float(item.get(level_key))
-        dist_val = safe_float(item.get(dist_key))
-        if level is None or dist_val is None:
-            continue
-        parts.append(f"{label} {level:.2f} ({dist_val:+.1f}%)")
-    return " | ".join(parts) if parts else '—'
-
-
-def format_volume_evidence(vol_ratio) -> str:
-    f_val = safe_float(vol_ratio)
-    if f_val is None:
-        return 'RVOL20 —'
-    if f_val >= 2.0:
-        note = 'volume confirms move'
-    elif f_val >= 1.5:
-        note = 'volume elevated'
-    elif f_val < 1.0:
-        note = 'volume light'
-    else:
-        note = 'volume neutral'
-    return f"RVOL20 {f_val:.2f}x · {note}"
-
-
-def format_news_evidence(item: dict) -> str:
-    headline = item.get('news_headline')
-    summary = item.get('news_summary')
-    headline_age = item.get('news_age')
-    source_count = item.get('news_sources')
-
-    items = []
-    if headline:
-        if headline_age and source_count is not None:
-            items.append(f"{headline} ({headline_age}, {source_count} src)")
-        elif headline_age:
-            items.append(f"{headline} ({headline_age})")
-        else:
-            items.append(str(headline))
-    if summary and (not headline or summary.strip() not in str(headline)):
-        items.append(str(summary))
-    return " | ".join(items[:2]) if items else '—'
-
-
-def build_one_line_verdict(item: dict) -> str:
-    verdict = str(item.get('verdict') or 'WATCH').upper()
-    trend_color = str(item.get('trend_color') or '').upper()
-
-    verdict_prefix = {
-        'EXIT': 'RISK_OFF / No Entry',
-        'TRIM': 'RISK_OFF / No Entry',
-        'ACCUMULATE': 'RISK_ON / Entry',
-        'STRONG_ACCUMULATE': 'RISK_ON / Entry',
-        'HIGH_RVOL_EVENT': 'RISK_OFF / Volatility Event',
-        'RATING_PRESSURE': 'RISK_OFF / Rating Pressure',
-        'EARNINGS_MOMO': 'RISK_ON / Event Momentum',
-        'TREND_CONFIRMATION': 'RISK_ON / Trend Active',
-        'SENTIMENT_COLLISION': 'NEUTRAL / Signal Conflict',
-        'TREND_CONFLICT_UPG': 'NEUTRAL / Signal Conflict',
-        'EVENT_WINDOW': 'NEUTRAL / Event Window'
-    }
-
-    if verdict in verdict_prefix:
-        prefix = verdict_prefix[verdict]
-    elif verdict in ['EXIT', 'TRIM']:
-        prefix = 'RISK_OFF / No Entry'
-    elif verdict in ['ACCUMULATE', 'STRONG_ACCUMULATE']:
-        prefix = 'RISK_ON / Entry'
-    elif trend_color == 'GREEN':
-        prefix = 'RISK_ON / Trend Active'
-    elif trend_color == 'RED':
-        prefix = 'RISK_OFF / Trend Broken'
-    else:
-        prefix = 'NEUTRAL / Range Bound'
-
-    dist_val = safe_float(item.get('dist_sma200_pct'))
-    dist_label = 'price —'
-    if dist_val is not None:
-        side = 'below' if dist_val < 0 else 'above'
-        dist_label = f"price {abs(dist_val):.1f}% {side} SMA200"
-    catalyst = format_catalyst_label(item.get('dte'))
-    trend = resolve_trend_label(item.get('trend_color'))
-    if catalyst == '—':
-        return f"{prefix} - {dist_label}, trend {trend}."
-    return f"{prefix} - {catalyst} + {dist_label}, trend {trend}."
+            ingest_snapshot(conn, raw, digest)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("History ingest failed for %s: %s", digest[:12], e)
+
+def _evaluate_alerts(data: dict, digest: str, changed=None):
+    """Runs the alert rules against a new snapshot and records what fired; best-effort like history.
+
+    The engine stays in memory between snapshots, so a published delta only
+    re-evaluates the tickers it touched. A cold engine is primed with the
+    previous archived snapshot, which fires nothing.
+    """
+    from alerts import AlertEngine, load_rule_file, snapshot_rows, snapshot_rules
+    from history_store import connect, load_snapshot_bytes, previous_snapshot, record_alerts
+    state = _snapshot_state()
+    try:
+        extra = load_rule_file(ALERT_RULES_PATH)
+        conn = connect(HISTORY_DB_PATH)
+        try:
+            base_hash = previous_snapshot(conn, digest)
+            engine = state.get("alert_engine")
+            if engine is None or state.get("alert_hash") != base_hash:
+                engine, changed = AlertEngine(), None
+                base_raw = load_snapshot_bytes(conn, base_hash) if base_hash else None
+                if base_raw is not None:
+                    base = validate_snapshot(json.loads(base_raw))
+                    engine.set_rules(snapshot_rules(base, extra))
+                    engine.update(snapshot_rows(base))
+            # Triggers published with the previous snapshot are checked against this one
+            fired = engine.update(snapshot_rows(data), changed)
+            engine.set_rules(snapshot_rules(data, extra))
+            if fired:
+                record_alerts(conn, fired, digest, data["meta"].get("updated_at"))
+        finally:
+            conn.close()
+        state.update(alert_engine=engine, alert_hash=digest)
+    except Exception as e:
+        state.pop("alert_engine", None)
+        logger.warning("Alert evaluation failed for %s: %s", digest[:12], e)
+
+def load_render_artifacts():
+    """Masked view models for the current snapshot, shared across replicas via the disk cache."""
+    raw = load_snapshot_bytes()
+    if raw is None:
+        return None
+    digest = snapshot_hash(raw)
+    state = _snapshot_state()
+    if state.get("rejected") != digest:
+        try:
+            return get_render_artifacts(
+                RENDER_CACHE_DIR, artifact_key(digest), lambda: _build_artifacts(raw, digest)
+            )
+        except (SnapshotValidationError, json.JSONDecodeError) as e:
+            logger.warning("Rejected snapshot %s: %s", digest[:12], e)
+            state["rejected"] = digest
+    # Keep serving the last good version
+    return state.get("artifacts") or latest_cached_artifacts(RENDER_CACHE_DIR)
+
+def _current_portfolio():
+    """Id of the portfolio being viewed, or None for the default one (set by main)."""
+    return st.session_state.get("portfolio")
+
+def _portfolio_config_version():
+    try:
+        return os.path.getmtime(PORTFOLIOS_PATH)
+    except OSError:
+        return None
 
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_portfolio_registry(config_version):
+    """Process-wide portfolio registry, rebuilt when portfolios.json changes."""
+    from portfolio_registry import DEFAULT_MAX_BYTES, PortfolioRegistry, load_portfolio_specs
+    try:
+        specs = load_portfolio_specs(PORTFOLIOS_PATH, DATA_DIR)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring portfolios.json: %s", e)
+        specs = load_portfolio_specs(None, DATA_DIR)
+    max_mb = get_setting("PORTFOLIO_CACHE_MB")
+    return PortfolioRegistry(specs, max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES)
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_quote_refresher(provider_spec: str, ttl: float):
+    """Process-wide live-quote cache: one provider call per interval, shared by every session."""
+    from live_quotes import QuoteRefresher, load_provider
+    return QuoteRefresher(load_provider(provider_spec), ttl)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_quote_basis(digest: str, _artifacts):
+    from live_quotes import QuoteBasis
+    return QuoteBasis(_artifacts)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_quoted_artifacts(digest: str, quotes_version: int, _artifacts, _basis, _quote_set):
+    """Artifacts re-derived for one quote refresh, once per snapshot and refresh for all sessions."""
+    from live_quotes import apply_quotes
+    return apply_quotes(_artifacts, _basis, _quote_set)
+
+def _apply_live_quotes(artifacts):
+    """Artifacts with live prices when QUOTE_PROVIDER is set, else (or on any failure) as published."""
+    provider_spec = get_setting("QUOTE_PROVIDER")
+    if not provider_spec:
+        return artifacts
+    from live_quotes import DEFAULT_TTL_SECONDS
+    try:
+        refresher = get_quote_refresher(provider_spec, float(get_setting("QUOTE_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+        digest = artifacts["snapshot_hash"]
+        basis = get_quote_basis(digest, artifacts)
+        quote_set = refresher.get(basis.tickers)
+        if quote_set is None:
+            return artifacts
+        return get_quoted_artifacts(digest, quote_set.version, artifacts, basis, quote_set)
+    except Exception as e:
+        logger.warning("Live quotes unavailable: %s", e)
+        return artifacts
+
+def load_historical_artifacts(ref: str):
+    """Artifacts of a past snapshot (hash prefix or date), or None if the history has no match."""
+    from history_store import connect, load_snapshot_bytes, resolve_snapshot
+    if not os.path.exists(HISTORY_DB_PATH):
+        return None
+    conn = connect(HISTORY_DB_PATH)
+    try:
+        digest = resolve_snapshot(conn, ref)
+        raw = load_snapshot_bytes(conn, digest) if digest else None
+    finally:
+        conn.close()
+    if raw is None:
+        return None
+    # Separate cache dir so browsing history does not evict the live snapshot
+    def build():
+        artifacts = build_render_artifacts(validate_snapshot(json.loads(raw)))
+        artifacts["snapshot_hash"] = digest
+        return artifacts
+    return get_render_artifacts(HISTORY_CACHE_DIR, artifact_key(digest), build)
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def load_ticker_chart(ticker: str, as_of: str):
+    """Downsampled history chart for a ticker, cached per ticker and snapshot version (as_of)."""
+    from history_charts import build_ticker_chart
+    from history_store import connect
+    if not ticker or not os.path.exists(HISTORY_DB_PATH):
+        return None
+    try:
+        conn = connect(HISTORY_DB_PATH)
+        try:
+            return build_ticker_chart(conn, ticker, until=as_of)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("History chart failed for %s: %s", ticker, e)
+        return None
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_change_rows(base_hash: str, new_hash: str):
+    """Masked change rows from one archived snapshot to another, computed once per hash pair."""
+    from history_store import connect, load_snapshot_bytes
+    from snapshot_diff import diff_snapshots
+    conn = connect(HISTORY_DB_PATH)
+    try:
+        old_raw = load_snapshot_bytes(conn, base_hash)
+        new_raw = load_snapshot_bytes(conn, new_hash)
+    finally:
+        conn.close()
+    if old_raw is None or new_raw is None:
+        return None
+    old_data = validate_snapshot(json.loads(old_raw))
+    changes = build_change_rows(diff_snapshots(old_data, validate_snapshot(json.loads(new_raw))))
+    changes["since"] = old_data["meta"].get("updated_at")
+    return changes
+
+def load_changes(digest: str):
+    """Changes from the previously archived snapshot to `digest`, or None without one."""
+    if not digest or not os.path.exists(HISTORY_DB_PATH):
+        return None
+    from history_store import connect, previous_snapshot
+    try:
+        conn = connect(HISTORY_DB_PATH)
+        try:
+            base_hash = previous_snapshot(conn, digest)
+        finally:
+            conn.close()
+        return load_change_rows(base_hash, digest) if base_hash else None
+    except Exception as e:
+        logger.warning("Change set failed for %s: %s", digest[:12], e)
+        return None
 
-def format_verdict_label(value: str) -> str:
-    text = str(value or "").replace("_", " ").strip()
-    if not text:
-        return "Watch"
-    return text.lower().capitalize()
-
-
-def format_picked_label(value: str) -> str:
-    picked = str(value or "").strip()
-    return picked if picked else "N/A"
-
-
-def resolve_next_action(verdict: str, trend_color: str) -> str:
-    verdict_action = {
-        'EXIT': 'remove from focus / reduce exposure',
-        'TRIM': 'remove from focus / reduce exposure',
-        'ACCUMULATE': 'add alert / size up',
-        'STRONG_ACCUMULATE': 'add alert / size up',
-        'HIGH_RVOL_EVENT': 'watch only (volatility event)',
-        'RATING_PRESSURE': 'watch only (wait for confirmation)',
-        'SENTIMENT_COLLISION': 'watch only (wait for confirmation)',
-        'TREND_CONFLICT_UPG': 'watch only (wait for confirmation)',
-        'EARNINGS_MOMO': 'add alert / event follow-through',
-        'EVENT_WINDOW': 'watch only (event risk window)',
-        'TREND_CONFIRMATION': 'monitor for entry/add (active uptrend)'
-    }
-    if verdict in verdict_action:
-        return verdict_action[verdict]
-    if trend_color == 'GREEN':
-        return 'monitor for entry/add (active uptrend)'
-    if trend_color == 'RED':
-        return 'watch only (wait for setup)'
-    return 'watch only'
-
-
-def format_ban_line(dte) -> str:
-    if dte is None:
-        return 'Ban: None (No immediate ER risk)'
-
-    dte_int = int(dte)
-    if 0 <= dte_int <= 5:
-        return f'Ban: until ER passed + 2 sessions (DTE: {dte_int})'
-    if -2 <= dte_int < 0:
-        return f'Ban: cooling down post-ER (DTE: +{abs(dte_int)})'
-    return 'Ban: None (No immediate ER risk)'
-
-
-def build_focus_options(focus_items: list) -> tuple[list, dict]:
-    options = []
-    ticker_map = {}
-    for item in focus_items:
-        t_raw = item.get('ticker')
-        if not t_raw:
-            continue
-        t_display = mask_ticker(t_raw)
-        verdict_display = format_verdict_label(item.get('verdict', 'WATCH'))
-        picked_display = format_picked_label(item.get('picked_date'))
-        label = f"{t_display} | Picked {picked_display} | {verdict_display}"
-        options.append(label)
-        ticker_map[label] = t_raw
-    return options, ticker_map
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_alert_rows(digest: str, as_of: str):
+    """Masked alerts fired up to the snapshot `digest` (published at `as_of`), newest first."""
+    from history_store import connect, recent_alerts
+    if not os.path.exists(HISTORY_DB_PATH):
+        return []
+    try:
+        conn = connect(HISTORY_DB_PATH)
+        try:
+            alerts = recent_alerts(conn, until=as_of, limit=ALERT_WINDOW)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("Loading alerts failed: %s", e)
+        return []
+    return [
+        {"Fired": alert["fired_at"][:16], "Ticker": mask_ticker(alert["ticker"]), "Alert": alert["label"]}
+        for alert in alerts
+    ]
+
+def render_history_chart(chart: dict):
+    """Price with EMA/SMA overlays plus the return since pick."""
+    prices = pd.DataFrame(
+        {"Price": chart["price"], "EMA21": chart["ema21"], "EMA55": chart["ema55"], "SMA200": chart["sma200"]},
+        index=pd.to_datetime(chart["as_of"])
+    )
+    st.line_chart(prices.dropna(axis=1, how="all"), height=220)
+    returns = pd.Series(chart["return_pct"], index=prices.index, name="Return %").dropna()
+    if not returns.empty:
+        st.caption("Return since pick (%)")
+        st.area_chart(returns, height=120)
 
 
 def _show_admin_panel():
     """Renders a compact traffic analytics panel."""
-    from analytics import get_stats
-    stats = get_stats()
+    from analytics import get_stats, rate_limit_stats
+    stats = get_stats(_current_portfolio())
     
     if "N/A" in stats.values():
         return
@@ -606,23 +631,23 @@ def _show_admin_panel():
     st.caption(
         f"📊 **Traffic** | "
         f"Desktop: {stats['desktop_7d']} (7d), {stats['desktop_30d']} (30d), {stats['desktop_total']} (Total) · "
-        f"Mobile: {stats['mobile_7d']} (7d), {stats['mobile_30d']} (30d), {stats['mobile_total']} (Total) | "
+        f"Mobile: {stats['mobile_7d']} (7d), {stats['mobile_30d']} (30d), {stats['mobile_total']} (Total) · "
+        f"Unique visitors: {stats['unique_24h']} (24h), {stats['unique_7d']} (7d), {stats['unique_30d']} (30d), "
+        f"{stats['unique_total']} (Total) | "
         "US Eastern time"
     )
+    limits = " · ".join(
+        f"{name.title()}: {row['allowed']} allowed, {row['rejected_client'] + row['rejected_global']} throttled "
+        f"({row['rejected_client']} per client, {row['rejected_global']} global)"
+        for name, row in rate_limit_stats().items()
+    )
+    st.caption(f"🛡️ **Rate limits** (this process) | {limits}")
+    if any(visits for _, visits in stats["hourly"]):
+        with st.expander(f"Hourly visits (last {len(stats['hourly'])}h)", expanded=False):
+            hourly = pd.DataFrame(stats["hourly"], columns=["Hour", "Visits"]).set_index("Hour")
+            st.bar_chart(hourly, height=160)
 
-def main():
-    data = load_data()
-    if not data:
-        st.error("System Offline: Snapshot missing.")
-        return
-
-    # --- Analytics ---
-    from analytics import track_visit_once_per_session
-    track_visit_once_per_session()
-
-    meta = data.get("meta", {})
-    updated_at = meta.get("updated_at", "Unknown")
-
+def _detect_mobile_view():
     if "mobile_view" not in st.session_state:
         st.session_state["mobile_view"] = False
 
@@ -642,40 +667,20 @@ def main():
     # use_mobile = st.toggle("📱 View", value=st.session_state.get("mobile_view", False), key="mobile_view_toggle")
     # st.session_state.mobile_view = use_mobile
 
-    # --- Header ---
+
+def render_header(meta: dict):
     if not st.session_state.get("mobile_view", False):
         st.title("Performance Overview")
-        st.caption(f"Last Synced: {updated_at}")
+        quotes = f" · Prices refreshed {meta['quotes_as_of']}" if meta.get("quotes_as_of") else ""
+        st.caption(f"Last Synced: {meta['updated_at']}{quotes}")
 
     if not st.session_state.get("mobile_view", False):
         st.divider()
 
-    # --- 0. Focus Summary (Bannered) ---
-    summary_text = meta.get("focus_summary_text", "")
-    if summary_text:
-        # --- Dynamically mask tickers in the summary using SINGLE PASS to avoid ghost stars ---
-        all_tickers = set()
-        for item in data.get("table_view_model", []):
-            if item.get("ticker"): all_tickers.add(item["ticker"])
-        for item in data.get("focus_view_model", []):
-            if item.get("ticker"): all_tickers.add(item["ticker"])
-        
-        if all_tickers:
-            # Sort by length descending for regex priority
-            sorted_tickers = sorted(all_tickers, key=len, reverse=True)
-            pattern = "|".join(re.escape(t) for t in sorted_tickers)
-            # Single-pass substitution using a lambda to prevent masking a mask
-            summary_text = re.sub(
-                rf"\b({pattern})\b", 
-                lambda m: mask_ticker(m.group(0)), 
-                summary_text, 
-                flags=re.IGNORECASE
-            )
-        
-        # --- Remove the strategy link from the summary (Public View Safety) ---
-        summary_text = re.sub(r"\n📊 Full strategy view & live metrics: https://.*", "", summary_text)
-        # -----------------------------------------------
 
+def render_summary(summary_text: str):
+    """Weekly radar banner; tickers are already masked in a single pass by the artifact builder."""
+    if summary_text:
         if st.session_state.get("mobile_view", False):
             with st.expander("📋 This Week's Radar (tap to expand)", expanded=False):
                 st.text(summary_text)
@@ -685,20 +690,92 @@ def main():
                 st.code(summary_text, language="markdown")
         st.divider()
 
-    # --- 1. Focus List (Interactive) ---
+
+def render_changes_section(changes):
+    """Collapsed "Changes since last sync" list (snapshot_diff against the previous snapshot)."""
+    if not changes:
+        return
+    rows = changes["rows"]
+    with st.expander(f"🔄 Changes since last sync ({len(rows)})", expanded=False):
+        counts = changes["counts"]
+        st.caption(
+            f"Since {changes['since'] or 'the previous snapshot'}: "
+            f"{counts['entered']} entered focus · {counts['left']} left focus · "
+            f"{counts['verdict']} verdict changes · {counts['sma200']} SMA200 crossings"
+        )
+        if rows:
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No changes to the focus list or portfolio.")
+
+
+def render_alerts_section(rows):
+    """Collapsed list of the most recent fired alerts (alerts.py)."""
+    if not rows:
+        return
+    with st.expander(f"🔔 Alerts ({len(rows)})", expanded=False):
+        st.caption("Price triggers from the radar summary and Playbook conditions, once per crossing.")
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_search_index(version: str, _index: dict):
+    """Query side of the snapshot's full-text index (search_index.py), built once per version."""
+    from search_index import SearchIndex
+    return SearchIndex(_index)
+
+def _open_search_hit(kind: str, ref, ticker=None):
+    # Runs as a button callback, i.e. before the navigator and screen widgets are drawn again
+    if kind == "focus":
+        st.session_state.focus_selected = ticker
+        st.session_state.pop("focus_navigator", None) # Re-created on the selected ticker
+    else:
+        st.session_state.screen_expr = f"sector = {quote_text(ref)}"
+
+def render_search_section(artifacts):
+    """Search box over the masked news and playbook text; a hit opens its deep dive or screens its sector."""
+    index = artifacts.get("search")
+    if not index or not index["docs"]:
+        return
+    search = get_search_index(artifact_key(artifacts["snapshot_hash"]), index)
+    query = st.text_input(
+        "Search",
+        key="search_query",
+        placeholder="🔎 Search news, action plans, triggers, sectors",
+        label_visibility="collapsed"
+    ).strip()
+    if not query:
+        return
+    hits = search.search(query, limit=SEARCH_RESULTS)
+    if not hits:
+        st.caption("No matches.")
+        return
+    for i, hit in enumerate(hits):
+        args = (hit["kind"], hit["ref"])
+        if hit["kind"] == "focus":
+            args += (artifacts["focus_tickers"][hit["ref"]],)
+        c1, c2 = st.columns([0.25, 0.75])
+        c1.button(hit["label"], key=f"search_hit_{i}", on_click=_open_search_hit, args=args, use_container_width=True)
+        c2.caption(f"**{hit['field']}** · {hit['snippet']}")
+    st.divider()
+
+
+def render_focus_section(artifacts) -> bool:
+    """Focus navigator, scan table and deep dive. Returns False if the page should stop here."""
     if not st.session_state.get("mobile_view", False):
         st.markdown("### Focus List (Top 8)")
         st.caption("Scan format: Ticker | Setup | Tech | Distance | Catalyst | Urgency/News")
     
-    focus_items = data.get("focus_view_model", [])
+    scan_rows = artifacts["scan_rows"]
     
-    if focus_items:
-        ticker_list = [item.get('ticker') for item in focus_items if item.get('ticker')]
+    if scan_rows:
+        ticker_list = artifacts["focus_tickers"]
         if 'focus_selected' not in st.session_state or st.session_state.focus_selected not in ticker_list:
             if ticker_list:
                 st.session_state.focus_selected = ticker_list[0]
 
-        options, ticker_map = build_focus_options(focus_items)
+        options = artifacts["focus_options"]
+        ticker_map = artifacts["focus_ticker_map"]
         current_ticker = st.session_state.focus_selected
         default_index = 0
         for i, opt in enumerate(options):
@@ -708,10 +785,10 @@ def main():
 
         if not options:
             st.info("No focus tickers available.")
-            return
+            return False
 
         if st.session_state.get("mobile_view", False):
-            st.caption(f"Last Synced: {updated_at}")
+            st.caption(f"Last Synced: {artifacts['meta']['updated_at']}")
             st.subheader("Key APs to watch")
 
         selected_label = st.selectbox(
@@ -724,143 +801,237 @@ def main():
         if selected_label:
             st.session_state.focus_selected = ticker_map[selected_label]
 
-        scan_rows = []
-        for item in focus_items:
-            scan_rows.append({
-                'Ticker': mask_ticker(item.get('ticker', '')),
-                'Setup': determine_setup_label(item),
-                'Tech': format_tech_status(item),
-                'Distance': format_distance_pct(item.get('dist_sma200_pct')),
-                'Catalyst': format_catalyst_label(item.get('dte')),
-                'Urgency/News': format_urgency_news(item.get('urgency'), safe_float(item.get('news_sentiment_raw')))
-            })
-
         scan_df = pd.DataFrame(scan_rows)
         st.dataframe(scan_df, use_container_width=True, hide_index=True)
 
         if not st.session_state.get("mobile_view", False):
+            render_export_buttons("focus_scan", artifacts, scan_rows)
             st.divider()
 
         selected_ticker = st.session_state.focus_selected
-        selected_item = next((item for item in focus_items if item.get('ticker') == selected_ticker), None)
-
-        if selected_item:
-            latest_price = safe_float(selected_item.get('latest_price'))
-            price_type = selected_item.get('price_type') or 'Close'
-            price_timestamp = selected_item.get('price_timestamp') or '—'
-
-            price_label = "N/A"
-            if latest_price is not None:
-                price_label = f"${latest_price:.2f} ({price_type}, {price_timestamp})"
-
-            divergence_text = strip_evidence_refs(str(selected_item.get('divergence', '')))
-            divergence_line = divergence_text if divergence_text else '—'
+        deep_dive = artifacts["deep_dive"].get(selected_ticker)
 
+        if deep_dive:
             st.markdown("### Deep Dive")
             st.markdown("**A) One-line Verdict**")
-            st.write(build_one_line_verdict(selected_item))
+            st.write(deep_dive["verdict_line"])
 
             st.markdown("**B) Evidence**")
-            st.caption(f"Price: {price_label}")
-            st.caption(f"Key Levels: {format_key_levels_line(selected_item)}")
-            st.caption(f"Volume: {format_volume_evidence(selected_item.get('vol_ratio'))}")
-            st.caption(f"News: {format_news_evidence(selected_item)}")
-            st.caption(f"Divergence: {divergence_line}")
+            st.caption(f"Price: {deep_dive['price']}")
+            st.caption(f"Key Levels: {deep_dive['key_levels']}")
+            st.caption(f"Volume: {deep_dive['volume']}")
+            st.caption(f"News: {deep_dive['news']}")
+            st.caption(f"Divergence: {deep_dive['divergence']}")
 
             st.markdown("**C) Playbook**")
-            dte = safe_float(selected_item.get('dte'))
-            
-            st.caption(format_ban_line(dte))
+            st.caption(deep_dive["ban"])
 
             # Dynamic Trigger Logic based on price vs EMAs/SMA
-            dist_sma200 = safe_float(selected_item.get('dist_sma200_pct'))
-            dist_ema21 = safe_float(selected_item.get('dist_ema21_pct'))
-            
-            if dist_sma200 is not None and dist_sma200 > 0 and dist_ema21 is not None and dist_ema21 > 0:
-                # Strong Uptrend
-                st.caption("Watch trigger (Primary): hold line above EMA21")
-                st.caption("Watch trigger (Secondary): trend validation at SMA200")
-                st.caption("Failure: loss of EMA21 with RVOL > 1")
-            elif dist_sma200 is not None and dist_sma200 < 0:
-                # Downtrend / Break
-                st.caption("Watch trigger (Primary): strong close to reclaim SMA200")
-                st.caption("Watch trigger (Secondary): 2 consecutive closes above EMA21")
-                st.caption("Failure: reject at EMA21 with RVOL < 1")
-            else:
-                # Mixed / Near levels
-                st.caption("Watch trigger (Primary): definitive break above nearest resistance")
-                st.caption("Watch trigger (Secondary): establish higher low")
-                st.caption("Failure: breakdown below recent consolidation")
+            for line in deep_dive["playbook"]:
+                st.caption(line)
 
             # Next action logic based on trend and verdict
-            verdict = str(selected_item.get('verdict') or '').upper()
-            trend_color = selected_item.get('trend_color', '').upper()
-            st.caption(f"Next action: {resolve_next_action(verdict, trend_color)}")
-
-            action_plan = selected_item.get('action_plan', '')
-            if action_plan:
-                action_clean = strip_evidence_refs(str(action_plan))
-                if action_clean:
-                    st.caption(f"Action plan note: {action_clean}")
-
-            td = selected_item.get('trigger_details', {})
-            if isinstance(td, dict) and td.get('details'):
+            st.caption(f"Next action: {deep_dive['next_action']}")
+
+            if deep_dive["action_plan"]:
+                st.caption(f"Action plan note: {deep_dive['action_plan']}")
+
+            if deep_dive["trigger_details"]:
                 with st.expander("Trigger details", expanded=False):
-                    st.write(str(td.get('details')))
+                    st.write(deep_dive["trigger_details"])
+
+            # The history store archives the default portfolio only
+            chart = None if _current_portfolio() else load_ticker_chart(selected_ticker, artifacts["meta"]["updated_at"])
+            if chart:
+                st.markdown("**D) History**")
+                render_history_chart(chart)
         else:
             st.info("Select a ticker to view details.")
 
     else:
         # Dynamic Message from Snapshot
-        focus_msg = meta.get("focus_message", "No active signals in Focus List.")
+        focus_msg = artifacts["meta"]["focus_message"]
         st.info(focus_msg)
+    return True
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_cache():
+    """Process-wide export cache, so each snapshot's files are serialized once for all sessions."""
+    max_mb = get_setting("EXPORT_CACHE_MB")
+    return ExportCache(max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES)
+
+def _view_version(artifacts) -> str:
+    """Cache key of what a view shows: the snapshot version, plus the quote refresh when prices are live."""
+    version = artifact_key(artifacts["snapshot_hash"])
+    quote_version = artifacts.get("quote_version")
+    return f"{version}.q{quote_version}" if quote_version else version
+
+def render_export_buttons(dataset: str, artifacts, table):
+    """CSV / Parquet / JSON Lines downloads of a masked table, generated on first click."""
+    cache = get_export_cache()
+    version = _view_version(artifacts)
+    day = re.match(r"\d{4}-\d{2}-\d{2}", str(artifacts["meta"]["updated_at"] or ""))
+    columns = st.columns(len(EXPORT_FORMATS) + 2)
+    for column, (fmt, (label, mime, ext)) in zip(columns, EXPORT_FORMATS.items()):
+        def data(fmt=fmt):
+            try:
+                return cache.get((version, dataset, fmt), lambda: iter_export(export_frame(table), fmt))
+            except ExportTooLarge as e:
+                logger.warning("%s export of %s refused: %s", fmt, dataset, e)
+                raise
+        column.download_button(
+            f"⬇️ {label}",
+            data=data,
+            file_name=f"{dataset}_{day.group()}.{ext}" if day else f"{dataset}.{ext}",
+            mime=mime,
+            key=f"export_{dataset}_{fmt}",
+            on_click="ignore"
+        )
 
-    st.divider()
 
-    # --- 2. Alpha Picks Performance (Table) ---
+SCREEN_SORTS = {
+    "Default order": "",
+    "Return ↓": "-return_pct",
+    "Return ↑": "return_pct",
+    "RSI ↑": "rsi14",
+    "RSI ↓": "-rsi14",
+    "Hold ↓": "-hold_streak_days",
+    "Earnings soonest": "dte",
+}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_screener_index(version: str, _columns: dict, _tickers: list):
+    """Screener index for one snapshot version; sorted columns are built lazily and kept."""
+    return ScreenerIndex(_columns, _tickers)
+
+def _seed_from_query(key: str, param: str, default: str = ""):
+    # Saved screens live in the URL (?screen=...&sort=...), so links can be shared
+    if key not in st.session_state:
+        st.session_state[key] = st.query_params.get(param, default)
+
+def _sync_query_param(param: str, value: str):
+    if value:
+        st.query_params[param] = value
+    elif param in st.query_params:
+        del st.query_params[param]
+
+def render_screen_input(index):
+    """Screen expression box; returns matching row ids, or None when no screen applies."""
+    if index is None:
+        return None
+    _seed_from_query("screen_expr", "screen")
+    text = st.text_input(
+        "Screen",
+        key="screen_expr",
+        placeholder="Screen, e.g. rsi14 < 30 and price < sma200 and momentum_grade >= B",
+        help="Fields: " + ", ".join([*NUMERIC_FIELDS, *GRADE_FIELDS, *RATING_FIELDS, *TEXT_FIELDS])
+             + ". Combine with and / or / not; `field between a and b`.",
+        label_visibility="collapsed"
+    ).strip()
+    _sync_query_param("screen", text)
+    if not text:
+        return None
+    try:
+        return compile_screen(text).evaluate(index)
+    except ScreenSyntaxError as e:
+        st.caption(f":red[Screen error: {e}]")
+        return None
+
+def render_screen_sort(index, ids):
+    """Sort selector (kept in ?sort=, '-' for descending); returns the ordered ids."""
+    labels = list(SCREEN_SORTS)
+    current = st.query_params.get("sort", "")
+    if "screen_sort" not in st.session_state:
+        st.session_state["screen_sort"] = next((k for k, v in SCREEN_SORTS.items() if v == current), labels[0])
+    choice = st.selectbox("Sort", labels, key="screen_sort", label_visibility="collapsed")
+    sort = SCREEN_SORTS[choice]
+    _sync_query_param("sort", sort)
+    if not sort:
+        return ids
+    return index.sort(ids, sort.lstrip("-"), descending=sort.startswith("-"))
+
+def render_portfolio_summary(summary, quoted: bool = False):
+    """Aggregates precomputed once per snapshot (view_models.build_portfolio_summary)."""
+    if not summary:
+        return
+    with st.expander("📊 Portfolio Summary", expanded=False):
+        def pct(value):
+            return "N/A" if value is None else f"{value:+.1f}%"
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Picks", summary["picks"])
+        c2.metric("Avg Return", pct(summary["avg_return"]))
+        c3.metric("Median Return", pct(summary["median_return"]))
+        c4.metric("Winners / Losers", f"{summary['winners']} / {summary['losers']}")
+
+        extremes = []
+        if summary["best"]:
+            extremes.append(f"Best: {summary['best']['ticker']} {pct(summary['best']['return_pct'])}")
+        if summary["worst"]:
+            extremes.append(f"Worst: {summary['worst']['ticker']} {pct(summary['worst']['return_pct'])}")
+        hold_rule = summary["hold_rule"]
+        extremes.append(
+            f"Hold rule: {hold_rule['at_limit']} at limit, "
+            f"{hold_rule['near_limit']} within {hold_rule['warn_days']}d"
+        )
+        if quoted:
+            extremes.append("Returns as of the last sync")
+        st.caption(" · ".join(extremes))
+
+        st.caption("**By Sector**")
+        st.dataframe(
+            pd.DataFrame(summary["sectors"]),
+            column_config={
+                'sector': st.column_config.TextColumn('Sector'),
+                'picks': st.column_config.NumberColumn('Picks', format='%d'),
+                'avg_return': st.column_config.NumberColumn('Avg Return', format='%.1f%%'),
+                'median_return': st.column_config.NumberColumn('Median Return', format='%.1f%%')
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+
+        q1, q2 = st.columns([0.4, 0.6])
+        with q1:
+            st.caption("**Quant Rating**")
+            st.dataframe(
+                pd.DataFrame(summary["quant_ratings"]).rename(columns={'rating': 'Rating', 'picks': 'Picks'}),
+                use_container_width=True,
+                hide_index=True
+            )
+        with q2:
+            st.caption("**Factor Grades** (picks per grade)")
+            st.dataframe(
+                pd.DataFrame(summary["grades"]).rename(columns={'grade': 'Grade'}),
+                use_container_width=True,
+                hide_index=True
+            )
+
+def render_portfolio_section(artifacts):
     st.subheader("Alpha Picks Portfolio")
+    render_portfolio_summary(artifacts.get("portfolio_summary"), quoted="quote_version" in artifacts)
+    portfolio = artifacts["portfolio"]
     
-    raw_table = data.get("table_view_model", [])
-    if raw_table:
-        df = pd.DataFrame(raw_table)
-
-        if 'picked_date' not in df.columns:
-            df['picked_date'] = None
-        
+    if portfolio:
         # --- Strict Column Mapping from Dashboard.py ---
-        # Rename columns to match the 'column_config' expectations
-        # Order: Ticker, Price, Hold, Earnings, EMA21, EMA55, SMA200, RSI, ATR, Vol, Quant, Grades
-        expected_cols = [
-            'ticker', 'picked_date', 'last_price', 'hold_streak_days', 'earnings_fmt',
-            'ema21_fmt', 'ema55_fmt', 'sma200_fmt', 'rsi14', 'atr14_pct', 'vol_ratio',
-            'quant_rating_emoji', 'value_grade', 'growth_grade',
-            'profitability_grade', 'momentum_grade', 'eps_revisions_grade'
-        ]
-
-        # Process Picked and Earnings formats for US Standard
-        if 'picked_date' in df.columns:
-            df['picked_date'] = df['picked_date'].apply(format_us_date)
-        if 'earnings_fmt' in df.columns:
-            df['earnings_fmt'] = df['earnings_fmt'].apply(format_us_date)
-
-        final_display = df.reindex(columns=expected_cols).rename(columns={
-            'quant_rating_emoji': 'quant',
-            'last_price': 'price',
-            'earnings_fmt': 'earnings',
-            'ema21_fmt': 'ema21',
-            'ema55_fmt': 'ema55',
-            'sma200_fmt': 'sma200',
-            'vol_ratio': 'vol'
-        })
-
-        ticker_raw = final_display['ticker'].fillna('').astype(str).str.strip().str.upper()
-        final_display['ticker_raw'] = ticker_raw
-        final_display['ticker'] = ticker_raw.apply(mask_ticker)
+        # Columns are renamed, masked and US-date formatted once per snapshot (view_models.py)
+        final_display = pd.DataFrame(portfolio)
+        index = get_screener_index(_view_version(artifacts), artifacts["screener"], portfolio["ticker_raw"])
         
         # Strict Config Copy from Dashboard.py
         if st.session_state.get("mobile_view", False):
-            render_mobile_cards(final_display)
+            as_of = None if _current_portfolio() else artifacts["meta"]["updated_at"] # No history charts
+            render_mobile_cards(final_display, as_of, index)
         else:
+            s1, s2 = st.columns([0.75, 0.25])
+            with s1:
+                screened = render_screen_input(index)
+            with s2:
+                ids = render_screen_sort(index, index.all if screened is None else screened)
+            if screened is not None:
+                st.caption(f"Screen: {len(screened)} of {index.size} picks")
+            final_display = final_display.iloc[ids]
             desktop_display = final_display.drop(columns=['ticker_raw'], errors='ignore')
             st.dataframe(
                 desktop_display,
@@ -892,11 +1063,13 @@ def main():
                 hide_index=True,
                 height=500
             )
+            render_export_buttons("portfolio", artifacts, portfolio)
 
     else:
         st.warning("No Portfolio Data Available.")
 
-    # --- Feedback Module ---
+
+def render_feedback_section():
     st.divider()
     from analytics import submit_feedback, get_feedbacks
 
@@ -919,10 +1092,10 @@ def main():
             
         if submit_button:
             if fb_text and fb_text.strip():
-                if submit_feedback(fb_text, email=email_input, sa_username=sa_input):
+                if submit_feedback(fb_text, email=email_input, sa_username=sa_input, portfolio=_current_portfolio()):
                     st.success("Thank you! Your feedback has been submitted.")
                 else:
-                    st.error("Failed to submit feedback. Please try again.")
+                    st.error("Failed to submit feedback. Please try again later.")
             else:
                 st.warning("Please enter your message before submitting.")
 
@@ -932,7 +1105,7 @@ def main():
         if admin_pass:
             if admin_pass == st.secrets.get("ADMIN_PASSWORD"):
                 st.success("Access Granted")
-                feedbacks = get_feedbacks()
+                feedbacks = get_feedbacks(_current_portfolio())
                 if not feedbacks:
                     st.info("No feedback entries found.")
                 else:
@@ -955,8 +1128,165 @@ def main():
             else:
                 st.error("Incorrect Password")
 
+
+def _render_page(artifacts):
+    """Renders the full public view from prebuilt render artifacts."""
+    # --- Analytics ---
+    from analytics import track_visit_once_per_session
+    track_visit_once_per_session(_current_portfolio())
+
+    _detect_mobile_view()
+
+    # --- Header ---
+    render_header(artifacts["meta"])
+
+    # --- 0. Focus Summary (Bannered) ---
+    render_summary(artifacts["summary_text"])
+    if not _current_portfolio():
+        render_changes_section(load_changes(artifacts.get("snapshot_hash")))
+        render_alerts_section(load_alert_rows(artifacts.get("snapshot_hash"), artifacts["meta"]["updated_at"]))
+    render_search_section(artifacts)
+
+    # --- 1. Focus List (Interactive) ---
+    if not render_focus_section(artifacts):
+        return
+    st.divider()
+
+    # --- 2. Alpha Picks Performance (Table) ---
+    render_portfolio_section(artifacts)
+
+    # --- Feedback Module ---
+    render_feedback_section()
+
     # --- Admin Panel ---
     _show_admin_panel()
 
+
+def _render_page_streaming(digest: str):
+    """Renders sections as the snapshot streams in: header and focus list before the portfolio."""
+    max_mb = get_setting("SNAPSHOT_MAX_MB")
+    snapshot = StreamingSnapshot(
+        SNAPSHOT_PATH,
+        max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None,
+        validators=SECTION_VALIDATORS
+    )
+    try:
+        meta = snapshot.read_meta()
+        if snapshot.empty:
+            st.error("System Offline: Snapshot missing.")
+            return
+        artifacts = {"available": True, "snapshot_hash": digest, "meta": build_meta_artifacts(meta)}
+
+        from analytics import track_visit_once_per_session
+        track_visit_once_per_session(_current_portfolio())
+        _detect_mobile_view()
+        render_header(artifacts["meta"])
+
+        # The summary masks every portfolio ticker, so it is filled in once the table is read
+        summary_slot = st.container()
+
+        focus_items = snapshot.read_focus()
+        artifacts.update(build_focus_artifacts(focus_items))
+        if not render_focus_section(artifacts):
+            return
+        st.divider()
+
+        table_columns = snapshot.read_table()
+    except SnapshotTooLarge:
+        st.error("System Offline: Snapshot exceeds the configured memory limit.")
+        return
+    except (SnapshotValidationError, json.JSONDecodeError) as e:
+        logger.warning("Rejected streamed snapshot %s: %s", digest[:12], e)
+        st.error("System Offline: Snapshot failed validation.")
+        return
+
+    artifacts["portfolio"] = build_portfolio_columns(table_columns) if snapshot.table_rows else None
+    artifacts["portfolio_summary"] = build_portfolio_summary(table_columns) if snapshot.table_rows else None
+    artifacts["screener"] = build_screener_columns(table_columns) if snapshot.table_rows else None
+    render_portfolio_section(artifacts)
+
+    tickers = set(artifacts["focus_tickers"])
+    tickers.update(t for t in table_columns.get("ticker", []) if t)
+    artifacts["summary_text"] = mask_summary_text(meta.get("focus_summary_text", ""), tickers)
+    table_tickers = table_columns.get("ticker", [])
+    sectors = table_columns.get("company_name") or [None] * len(table_tickers)
+    artifacts["search"] = build_search_index(snapshot_documents({
+        "meta": meta,
+        "focus_view_model": focus_items,
+        "table_view_model": [{"ticker": t, "company_name": c} for t, c in zip(table_tickers, sectors)]
+    }))
+    with summary_slot:
+        render_summary(artifacts["summary_text"])
+        render_changes_section(load_changes(digest))
+        render_search_section(artifacts)
+
+    render_feedback_section()
+    _show_admin_panel()
+
+    # These artifacts are partial (no navigator, no indicator backfill), so they are not
+    # published; once the page is out, finish the full entry from the sections already read
+    try:
+        get_render_artifacts(
+            RENDER_CACHE_DIR, artifact_key(digest), lambda: _build_streamed_artifacts(snapshot.to_dict(), digest)
+        )
+    except Exception as e:
+        logger.warning("Caching streamed snapshot %s failed: %s", digest[:12], e)
+
+
+def render_portfolio_picker(registry):
+    """Portfolio selector kept in ?portfolio= (shown when several are registered); returns the id, None for the default."""
+    from portfolio_registry import DEFAULT_PORTFOLIO
+    labels = registry.labels()
+    requested = st.query_params.get("portfolio", DEFAULT_PORTFOLIO)
+    if requested not in labels:
+        st.warning(f"No portfolio named {requested}; showing {labels[DEFAULT_PORTFOLIO]}.")
+        requested = DEFAULT_PORTFOLIO
+    if len(labels) > 1:
+        if "portfolio_picker" not in st.session_state:
+            st.session_state["portfolio_picker"] = requested
+        requested = st.selectbox("Portfolio", list(labels), key="portfolio_picker", format_func=labels.get)
+    _sync_query_param("portfolio", "" if requested == DEFAULT_PORTFOLIO else requested)
+    return None if requested == DEFAULT_PORTFOLIO else requested
+
+
+def main():
+    # --- Portfolio (?portfolio=<id>) ---
+    registry = get_portfolio_registry(_portfolio_config_version())
+    portfolio = st.session_state["portfolio"] = render_portfolio_picker(registry)
+    if portfolio:
+        artifacts = registry.get(portfolio)
+        if not artifacts or not artifacts["available"]:
+            st.error("System Offline: Snapshot missing.")
+            return
+        _render_page(_apply_live_quotes(artifacts))
+        return
+
+    # --- Time travel (?as_of=<date or snapshot hash>) ---
+    as_of = st.query_params.get("as_of")
+    if as_of:
+        artifacts = load_historical_artifacts(as_of)
+        if artifacts and artifacts["available"]:
+            st.info(f"🕰️ Viewing the snapshot as of {artifacts['meta']['updated_at']}. Remove `?as_of=` from the URL for the latest.")
+            _render_page(artifacts)
+            return
+        st.warning(f"No archived snapshot matches as_of={as_of}; showing the latest.")
+
+    if get_setting("SNAPSHOT_STREAMING", False):
+        if not os.path.exists(SNAPSHOT_PATH):
+            st.error("System Offline: Snapshot missing.")
+            return
+        digest = snapshot_file_hash(SNAPSHOT_PATH)
+        artifacts = open_cached_artifacts(RENDER_CACHE_DIR, artifact_key(digest))
+        if artifacts is None:
+            _render_page_streaming(digest)
+            return
+    else:
+        artifacts = load_render_artifacts()
+
+    if not artifacts or not artifacts["available"]:
+        st.error("System Offline: Snapshot missing.")
+        return
+    _render_page(_apply_live_quotes(artifacts))
+
 if __name__ == "__main__":
     main()
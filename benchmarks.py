@@ -0,0 +1,912 @@
+"""Ad-hoc performance benchmarks for the public view.
+
+Usage:
+    python benchmarks.py              # list benchmarks
+    python benchmarks.py <name> ...   # run one or more benchmarks
+
+Snapshots are synthesized by cloning the rows of data/snapshot.json under
+generated tickers, so sizes scale without needing real data.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", "snapshot.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__.replace("bench_", "", 1)] = fn
+    return fn
+
+
+# --- Helpers ---
+def synthetic_ticker(i: int) -> str:
+    letters = ""
+    i += 26 * 26  # Start at 3-letter tickers
+    while i:
+        i, r = divmod(i, 26)
+        letters = chr(ord("A") + r) + letters
+    return letters
+
+
+def synthetic_snapshot(n_rows: int, n_focus: int = 8) -> dict:
+    """Snapshot with `n_rows` portfolio rows and `n_focus` focus items."""
+    with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    table = base["table_view_model"]
+    focus = base["focus_view_model"]
+
+    def clone(rows, n):
+        out = []
+        for i in range(n):
+            row = dict(rows[i % len(rows)])
+            row["ticker"] = synthetic_ticker(i)
+            out.append(row)
+        return out
+
+    return {
+        "meta": base["meta"],
+        "focus_view_model": clone(focus, n_focus),
+        "table_view_model": clone(table, n_rows),
+    }
+
+
+def write_snapshot(data: dict, directory: str, name: str = "snapshot.json") -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    """Best wall time of `repeat` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_rss_kb() -> int:
+    """High-water RSS of this process in KB (VmHWM, unlike ru_maxrss, resets on exec)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _rss_child(queue, target, args, preload):
+    import importlib
+    for module in preload:
+        importlib.import_module(module)
+    before = _peak_rss_kb()
+    result = target(*args)
+    after = _peak_rss_kb()
+    queue.put(after - before)
+    del result
+
+
+def peak_rss_delta_kb(target, *args, preload=()):
+    """Peak RSS growth (KB) of running target(*args) in a fresh process.
+
+    Modules named in `preload` are imported first so they are not counted.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_rss_child, args=(queue, target, args, preload))
+    proc.start()
+    delta = queue.get()
+    proc.join()
+    return delta
+
+
+def report(rows: list, headers: list) -> None:
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+# --- Snapshot formats ---
+def _load_json(path):
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def _load_sidecar(path):
+    from render_cache import snapshot_hash
+    from snapshot_columnar import load_sidecar_tables
+    with open(path, "rb") as f:
+        digest = snapshot_hash(f.read())
+    return load_sidecar_tables(path, digest)
+
+
+def _load_sidecar_rows(path):
+    from render_cache import snapshot_hash
+    from snapshot_columnar import load_snapshot_columnar
+    with open(path, "rb") as f:
+        digest = snapshot_hash(f.read())
+    return load_snapshot_columnar(path, digest)
+
+
+@benchmark
+def bench_snapshot_formats(sizes=(1_000, 10_000, 100_000)):
+    """json.load vs the memory-mapped Arrow sidecar (load time and peak RSS)."""
+    from snapshot_columnar import compile_snapshot
+
+    loaders = [
+        ("json.load", _load_json),
+        ("arrow mmap", _load_sidecar),
+        ("arrow -> rows", _load_sidecar_rows),
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = write_snapshot(synthetic_snapshot(n), tmp)
+            compile_snapshot(path)
+            for label, loader in loaders:
+                seconds = best_of(lambda: loader(path), repeat=3)
+                rss = peak_rss_delta_kb(loader, path, preload=("numpy", "render_cache", "snapshot_columnar"))
+                rows.append([n, label, f"{seconds * 1000:.1f} ms", f"{rss / 1024:.1f} MB"])
+    report(rows, ["rows", "loader", "load", "peak RSS +"])
+
+
+# --- Schema validation ---
+@benchmark
+def bench_schema_validation(sizes=(1_000, 10_000, 100_000)):
+    """Single-pass snapshot validation/normalization time by portfolio size."""
+    from snapshot_schema import validate_snapshot
+
+    rows = []
+    for n in sizes:
+        data = synthetic_snapshot(n)
+        seconds = best_of(lambda: validate_snapshot(data), repeat=5)
+        rows.append([n, f"{seconds * 1000:.1f} ms", f"{seconds / n * 1e6:.2f} us"])
+    report(rows, ["rows", "validate", "per row"])
+
+
+# --- History store ---
+def _daily_snapshots(base: dict, days: int):
+    """Yields (raw bytes) for `days` consecutive daily snapshots with drifting values."""
+    import random
+    from datetime import date, timedelta
+    rng = random.Random(0)
+    start = date(2026, 1, 1) - timedelta(days=days)
+    for day in range(days):
+        data = json.loads(json.dumps(base))
+        data["meta"]["updated_at"] = f"{start + timedelta(days=day)} 17:00:00"
+        for row in data["table_view_model"] + data["focus_view_model"]:
+            row["last_price"] = round((row.get("last_price") or 10) * (1 + rng.uniform(-0.05, 0.05)), 2)
+        for item in data["focus_view_model"]:
+            item["urgency"] = rng.randint(0, 100)
+            item["verdict"] = rng.choice(("WATCH", "WATCH", "WATCH", "REDUCE", "HOLD"))
+        yield json.dumps(data).encode("utf-8")
+
+
+@benchmark
+def bench_history_store(years=(1, 3, 5)):
+    """Ingest and range-query latency of the SQLite history at years of daily snapshots."""
+    from history_store import connect, ingest_snapshot, resolve_snapshot, ticker_series, verdict_changes
+
+    base = synthetic_snapshot(50)
+    ticker = base["focus_view_model"][0]["ticker"]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_years in years:
+            conn = connect(os.path.join(tmp, f"history_{n_years}y.sqlite"))
+            days = 365 * n_years
+            start = time.perf_counter()
+            for raw in _daily_snapshots(base, days):
+                ingest_snapshot(conn, raw)
+            ingest = (time.perf_counter() - start) / days
+            replay = best_of(lambda: ingest_snapshot(conn, raw), repeat=5)  # Idempotent re-ingest
+
+            queries = [
+                ("last 90 urgency", lambda: ticker_series(conn, ticker, ["urgency"], last_n=90)),
+                ("full price series", lambda: ticker_series(conn, ticker, ["last_price", "ema21", "sma200"])),
+                ("verdict changes (month)", lambda: verdict_changes(conn, "2025-12-01", "2025-12-31")),
+                ("resolve as_of date", lambda: resolve_snapshot(conn, "2025-06-15")),
+            ]
+            size_mb = os.path.getsize(os.path.join(tmp, f"history_{n_years}y.sqlite")) / 1e6
+            rows.append([days, "ingest / snapshot", f"{ingest * 1000:.2f} ms", f"{size_mb:.1f} MB"])
+            rows.append([days, "re-ingest (no-op)", f"{replay * 1000:.3f} ms", ""])
+            for label, query in queries:
+                rows.append([days, label, f"{best_of(query, repeat=20) * 1000:.3f} ms", ""])
+            conn.close()
+    report(rows, ["snapshots", "operation", "latency", "db size"])
+
+
+# --- History charts ---
+@benchmark
+def bench_history_charts(sizes=(1_000, 10_000, 100_000), years=3):
+    """LTTB downsampling time by series length, and chart build time/payload from the history store."""
+    import math
+    from history_charts import CHART_POINTS, build_ticker_chart, lttb
+    from history_store import connect, ingest_snapshot
+
+    rows = []
+    for n in sizes:
+        xs = list(range(n))
+        ys = [100 + 10 * math.sin(i / 50) + (i % 7) for i in xs]
+        seconds = best_of(lambda: lttb(xs, ys, CHART_POINTS), repeat=5)
+        rows.append([f"lttb {n} points", f"{seconds * 1000:.2f} ms", ""])
+
+    base = synthetic_snapshot(50)
+    ticker = base["focus_view_model"][0]["ticker"]
+    for row in base["focus_view_model"] + base["table_view_model"]:
+        if row["ticker"] == ticker:
+            row["picked_date"] = None  # Chart the whole history
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "history.sqlite"))
+        for raw in _daily_snapshots(base, 365 * years):
+            ingest_snapshot(conn, raw)
+        chart = build_ticker_chart(conn, ticker)
+        seconds = best_of(lambda: build_ticker_chart(conn, ticker), repeat=5)
+        payload = len(json.dumps(chart, separators=(",", ":")))
+        rows.append([f"chart from {365 * years} snapshots", f"{seconds * 1000:.2f} ms", f"{payload / 1024:.1f} KB"])
+        conn.close()
+    report(rows, ["operation", "time", "payload"])
+
+
+# --- Indicator engine ---
+def _random_bars(n_tickers: int, n_bars: int, seed: int = 0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_tickers, n_bars)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    low = close * (1 - rng.uniform(0, 0.02, close.shape))
+    volume = rng.uniform(1e5, 1e6, close.shape)
+    # A tenth of the tickers have a shorter history
+    short = max(1, n_tickers // 10)
+    for array in (close, high, low, volume):
+        array[:short, :n_bars // 3] = np.nan
+    return close, high, low, volume
+
+
+def _pandas_reference(close, high, low, volume) -> dict:
+    """Latest indicator values for one ticker, computed the plain pandas way."""
+    import pandas as pd
+    c, h, l, v = (pd.Series(a).dropna().reset_index(drop=True) for a in (close, high, low, volume))
+    delta = c.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    prev = c.shift()
+    tr = pd.concat([h - l, (h - prev).abs(), (l - prev).abs()], axis=1).max(axis=1)
+    sma200 = c.rolling(200).mean()
+    return {
+        "ema21": c.ewm(span=21, adjust=False).mean().iloc[-1],
+        "ema55": c.ewm(span=55, adjust=False).mean().iloc[-1],
+        "sma200": sma200.iloc[-1],
+        "rsi14": (100 - 100 / (1 + gain / loss)).iloc[-1],
+        "atr14_pct": (tr.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean() / c * 100).iloc[-1],
+        "vol_ratio": (v / v.rolling(20).mean()).iloc[-1],
+        "dist_sma200_pct": (c.iloc[-1] / sma200.iloc[-1] - 1) * 100,
+    }
+
+
+@benchmark
+def bench_indicators(shapes=((1_000, 756), (5_000, 756), (5_000, 1_260))):
+    """Indicator engine: full computation, incremental updates and max error vs pandas."""
+    import numpy as np
+    from indicators import IndicatorEngine
+
+    rows = []
+    for n_tickers, n_bars in shapes:
+        close, high, low, volume = _random_bars(n_tickers, n_bars)
+        tickers = [synthetic_ticker(i) for i in range(n_tickers)]
+        history = [a[:, :-1] for a in (close, high, low, volume)]
+        last = [a[:, -1] for a in (close, high, low, volume)]
+
+        seconds = best_of(lambda: IndicatorEngine.from_bars(tickers, *history), repeat=1)
+        engine = IndicatorEngine.from_bars(tickers, *history)
+        update = best_of(lambda: engine.update(*last), repeat=1)
+        single = IndicatorEngine.from_bars(tickers, *history)
+        start = time.perf_counter()
+        for i, ticker in enumerate(tickers):
+            single.update_bar(ticker, *(float(a[i]) for a in last))
+        per_bar = (time.perf_counter() - start) / n_tickers
+
+        values = single.values()
+        worst = 0.0
+        for i in range(0, n_tickers, max(1, n_tickers // 20)):
+            for name, expected in _pandas_reference(close[i], high[i], low[i], volume[i]).items():
+                worst = max(worst, abs(values[name][i] - expected) / abs(expected))
+
+        bars = n_tickers * (n_bars - 1)
+        rows.append([
+            f"{n_tickers} x {n_bars}",
+            f"{seconds * 1000:.0f} ms",
+            f"{bars / seconds / 1e6:.1f} M",
+            f"{update * 1000:.2f} ms",
+            f"{per_bar * 1e6:.1f} us",
+            f"{worst:.1e}",
+        ])
+        assert np.isfinite(worst) and worst < 1e-9, f"indicator mismatch vs pandas: {worst}"
+    report(rows, ["tickers x bars", "full", "bars/s", "new bar (all)", "new bar (one)", "max rel err"])
+
+
+# --- Portfolio summary ---
+@benchmark
+def bench_portfolio_summary(sizes=(1_000, 10_000, 100_000)):
+    """Portfolio aggregates: build once per snapshot vs per-rerun cost of reading them back."""
+    import pandas as pd
+    from render_cache import RenderArtifacts, write_artifacts
+    from view_models import build_portfolio_summary
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            table = synthetic_snapshot(n)["table_view_model"]
+            build = best_of(lambda: build_portfolio_summary(table), repeat=3)
+            path = os.path.join(tmp, f"{n}.bin")
+            write_artifacts(path, {"portfolio_summary": build_portfolio_summary(table)})
+            artifacts = RenderArtifacts(path)
+
+            def rerun():
+                # What the panel does on every rerun: fetch the artifact and frame the tables
+                summary = artifacts.get("portfolio_summary")
+                for key in ("sectors", "quant_ratings", "grades"):
+                    pd.DataFrame(summary[key])
+
+            per_rerun = best_of(rerun, repeat=20)
+            artifacts.close()
+            rows.append([n, f"{build * 1000:.1f} ms", f"{per_rerun * 1000:.2f} ms"])
+    report(rows, ["picks", "build (once per snapshot)", "per rerun"])
+
+
+# --- Screener ---
+@benchmark
+def bench_screener(sizes=(10_000, 100_000, 1_000_000)):
+    """Indexed screen/prefix/sort latency vs the pandas mask and str.contains baseline."""
+    import numpy as np
+    import pandas as pd
+    from screener import ScreenerIndex, build_screener_columns, compile_screen
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in sizes:
+        table = synthetic_snapshot(n)["table_view_model"]
+        for row in table:
+            row["rsi14"] = float(rng.uniform(10, 90))
+            row["dte"] = float(rng.integers(0, 90))
+        tickers = [row["ticker"] for row in table]
+        df = pd.DataFrame(table)
+
+        start = time.perf_counter()
+        index = ScreenerIndex(build_screener_columns(table), tickers)
+        screen = compile_screen("rsi14 < 12 and dte between 0 and 7")
+        screen.evaluate(index)  # Builds the sorted columns it touches
+        build = time.perf_counter() - start
+
+        indexed = best_of(lambda: index.sort(screen.evaluate(index), "rsi14"), repeat=20)
+        baseline = best_of(
+            lambda: df[(df["rsi14"] < 12) & df["dte"].between(0, 7)].sort_values("rsi14"), repeat=5
+        )
+        prefix = best_of(lambda: index.ticker_prefix("ABC"), repeat=20)
+        contains = best_of(lambda: df[df["ticker"].str.contains("ABC", regex=False)], repeat=5)
+        k = len(screen.evaluate(index))
+        rows.append([
+            n, k, f"{build * 1000:.0f} ms",
+            f"{indexed * 1000:.3f} ms", f"{baseline * 1000:.2f} ms",
+            f"{prefix * 1000:.3f} ms", f"{contains * 1000:.2f} ms",
+        ])
+    report(rows, ["rows", "k", "index build", "screen+sort", "pandas mask", "prefix", "str.contains"])
+
+
+# --- Exports ---
+@benchmark
+def bench_export(sizes=(1_000, 10_000, 100_000)):
+    """Cold serialization vs cached download per format, and peak memory of the largest export."""
+    from exports import EXPORT_FORMATS, ExportCache, export_frame, iter_export
+    from view_models import build_portfolio_columns
+
+    rows = []
+    for n in sizes:
+        df = export_frame(build_portfolio_columns(synthetic_snapshot(n)["table_view_model"]))
+        for fmt in EXPORT_FORMATS:
+            cache = ExportCache(max_export_bytes=1 << 40)
+            start = time.perf_counter()
+            cache.get(("bench", fmt), lambda: iter_export(df, fmt))
+            cold = time.perf_counter() - start
+            warm = best_of(lambda: cache.get(("bench", fmt), lambda: iter_export(df, fmt)), repeat=20)
+            rows.append([n, fmt, f"{cache.size / 1024:.0f} KB", f"{cold * 1000:.1f} ms", f"{warm * 1e6:.1f} µs"])
+    report(rows, ["rows", "format", "size", "first click", "next clicks"])
+
+    # Peak Python allocations while serializing the largest table (the cap bounds this per export)
+    import tracemalloc
+    memory = []
+    for fmt in ("csv", "jsonl"):
+        cache = ExportCache(max_export_bytes=1 << 40)
+        tracemalloc.start()
+        cache.get(("bench", fmt), lambda: iter_export(df, fmt))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        memory.append([len(df), fmt, f"{cache.size / 1024 / 1024:.1f} MB", f"{peak / 1024 / 1024:.1f} MB"])
+    print()
+    report(memory, ["rows", "format", "export", "peak"])
+
+
+# --- Snapshot diff ---
+@benchmark
+def bench_diff(sizes=(1_000, 10_000, 100_000, 1_000_000)):
+    """diff_snapshots cost per row: linear hash join, ~5% of rows changed."""
+    import random
+    from snapshot_diff import change_count, diff_snapshots
+
+    rng = random.Random(0)
+    rows = []
+    for n in sizes:
+        old = synthetic_snapshot(n, n_focus=min(n // 10, 1000))
+        new = {section: [dict(row) for row in old[section]] for section in ("table_view_model", "focus_view_model")}
+        for row in rng.sample(new["table_view_model"], n // 20):
+            row["quant_rating"] = "Strong Sell"
+        new["table_view_model"] = new["table_view_model"][n // 100:] # Drop 1%
+        elapsed = best_of(lambda: diff_snapshots(old, new), repeat=3)
+        changes = change_count(diff_snapshots(old, new))
+        rows.append([n, changes, f"{elapsed * 1000:.1f} ms", f"{elapsed / n * 1e9:.0f} ns"])
+    report(rows, ["rows", "changed tickers", "diff", "per row"])
+
+
+# --- Alerts ---
+@benchmark
+def bench_alerts(sizes=(1_000, 10_000), shared_rules=1_000, changed_share=0.05):
+    """Incremental alert evaluation vs evaluating every applicable rule on every ticker."""
+    import random
+    from alerts import PLAYBOOK_RULES, AlertEngine, snapshot_rows
+
+    rng = random.Random(0)
+    conditions = [
+        "rsi14 < {:.0f}", "rsi14 > {:.0f}", "price > sma200 and vol_ratio > {:.1f}",
+        "dte between 0 and {:.0f}", "return_pct < -{:.0f}", "momentum >= B and rsi14 < {:.0f}",
+    ]
+    rows = []
+    for n in sizes:
+        table = synthetic_snapshot(n)["table_view_model"]
+        for row in table:
+            row["rsi14"] = rng.uniform(10, 90)
+        rules = list(PLAYBOOK_RULES)
+        rules += [{"id": f"shared-{i}", "when": rng.choice(conditions).format(rng.uniform(1, 60))}
+                  for i in range(shared_rules)]
+        rules += [{"id": f"trigger-{row['ticker']}", "ticker": row["ticker"],
+                   "when": f"price > {row['last_price'] * 1.02:.2f}"} for row in table]
+
+        engine = AlertEngine(rules)
+        start = time.perf_counter()
+        engine.update(snapshot_rows({"table_view_model": table}))
+        cold = time.perf_counter() - start
+        full_evals = engine.evaluations
+
+        moved = rng.sample(range(n), int(n * changed_share))
+        new_table = [dict(row) for row in table]
+        for i in moved:
+            new_table[i]["last_price"] *= 1.05
+            new_table[i]["rsi14"] = rng.uniform(10, 90)
+        new_rows = snapshot_rows({"table_view_model": new_table})
+        changed = {new_table[i]["ticker"] for i in moved}
+
+        def incremental(hint):
+            copy = AlertEngine(rules)
+            copy.update(snapshot_rows({"table_view_model": table}))
+            copy.evaluations = 0
+            start = time.perf_counter()
+            fired = copy.update(new_rows, changed if hint else None)
+            return time.perf_counter() - start, copy.evaluations, len(fired)
+
+        scan_time, scan_evals, fired = incremental(False)
+        hint_time, _, _ = incremental(True)
+        rows.append([
+            n, len(rules), f"{cold * 1000:.0f} ms", f"{scan_time * 1000:.1f} ms",
+            f"{hint_time * 1000:.1f} ms", f"{full_evals} -> {scan_evals}", fired,
+        ])
+    report(rows, ["tickers", "rules", "full scan (cold)", "incremental",
+                  "with delta hint", "evaluations", "fired"])
+
+
+# --- Public API ---
+def _api_requests(port: int, path: str, n: int, headers: dict) -> tuple:
+    import http.client
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    status = None
+    size = 0
+    for _ in range(n):
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        size = len(response.read())
+        status = response.status
+    conn.close()
+    return status, size
+
+
+@benchmark
+def bench_api(requests_per_client=2_000, clients=(1, 8), sessions=5):
+    """Requests/sec of the JSON API vs full Streamlit script runs (AppTest sessions)."""
+    import threading
+    from public_api import SnapshotResponses, make_server, prepare_responses
+    from streamlit.testing.v1 import AppTest
+    from view_models import build_render_artifacts
+    from snapshot_schema import validate_snapshot
+
+    with open(SNAPSHOT_PATH, "rb") as f:
+        artifacts = build_render_artifacts(validate_snapshot(json.loads(f.read())))
+    prepare = best_of(lambda: prepare_responses(artifacts, "0" * 64), repeat=5)
+    print(f"prepare all endpoints once per snapshot: {prepare * 1000:.1f} ms\n")
+
+    server = make_server("127.0.0.1", 0, SnapshotResponses(SNAPSHOT_PATH))
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    etag = server.RequestHandlerClass.responses_source.current()["snapshot"].gzip_etag
+    cases = [
+        ("200 identity", {}),
+        ("200 gzip", {"Accept-Encoding": "gzip"}),
+        ("304", {"Accept-Encoding": "gzip", "If-None-Match": etag}),
+    ]
+    rows = []
+    for label, headers in cases:
+        for k in clients:
+            results = []
+            workers = [
+                threading.Thread(target=lambda: results.append(
+                    _api_requests(port, "/api/v1/snapshot", requests_per_client, headers)))
+                for _ in range(k)
+            ]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            status, size = results[0]
+            rows.append([label, k, status, f"{size / 1024:.1f} KB", f"{k * requests_per_client / elapsed:,.0f}"])
+    server.shutdown()
+    server.server_close()
+
+    app_path = os.path.join(BASE_DIR, "app.py")
+    AppTest.from_file(app_path, default_timeout=60).run() # Warm imports and caches
+    start = time.perf_counter()
+    for _ in range(sessions):
+        session = AppTest.from_file(app_path, default_timeout=60)
+        session.session_state["mobile_view"] = False
+        session.run()
+    elapsed = time.perf_counter() - start
+    rows.append(["Streamlit session (script run)", 1, "-", "-", f"{sessions / elapsed:,.1f}"])
+    report(rows, ["request", "clients", "status", "body", "req/s"])
+
+
+# --- Static page ---
+def _streamlit_first_load() -> tuple:
+    """Bytes (raw, gzip) of the Streamlit frontend assets a first visit loads before any app output."""
+    import gzip
+    import re
+    import streamlit
+    static = os.path.join(os.path.dirname(streamlit.__file__), "static")
+    with open(os.path.join(static, "index.html"), "rb") as f:
+        page = f.read()
+    assets = [page]
+    for ref in re.findall(rb'(?:src|href)="\./([^"]+)"', page):
+        path = os.path.join(static, ref.decode())
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                assets.append(f.read())
+    return sum(map(len, assets)), sum(len(gzip.compress(a, 6)) for a in assets)
+
+
+@benchmark
+def bench_static(sizes=(42, 1_000, 10_000)):
+    """Static page generation time and weight vs the Streamlit frontend's first load."""
+    import tempfile
+    from static_site import write_static_site
+    from view_models import build_render_artifacts
+    from snapshot_schema import validate_snapshot
+
+    rows = []
+    out_dir = tempfile.mkdtemp()
+    for n in sizes:
+        artifacts = build_render_artifacts(validate_snapshot(synthetic_snapshot(n)))
+        artifacts["snapshot_hash"] = "0" * 64
+        seconds = best_of(lambda: write_static_site(artifacts, out_dir), repeat=5)
+        result = write_static_site(artifacts, out_dir)
+        rows.append([
+            n, f"{seconds * 1000:.1f} ms", f"{result['bytes'] / 1024:.1f} KB", f"{result['gzip_bytes'] / 1024:.1f} KB",
+        ])
+    raw, compressed = _streamlit_first_load()
+    rows.append(["Streamlit frontend (no data)", "-", f"{raw / 1024:.0f} KB", f"{compressed / 1024:.0f} KB"])
+    report(rows, ["portfolio rows", "generate + write", "page", "page (gzip)"])
+    print("\nThe static page makes 1 request and runs no JavaScript; the Streamlit page then opens a "
+          "websocket, detects the user agent and reruns before the first table is drawn.")
+
+
+# --- Portfolio registry ---
+@benchmark
+def bench_portfolios(sizes=(200, 500, 1_000, 2_000, 5_000, 10_000), requests=1_000, budget_share=0.6):
+    """Per-portfolio load latency and resident memory under Zipf-distributed mixed traffic."""
+    import random
+    import statistics
+    import tempfile
+    import tracemalloc
+    from portfolio_registry import PortfolioRegistry, build_portfolio_artifacts, estimate_size
+
+    directory = tempfile.mkdtemp()
+    specs = {}
+    for i, n in enumerate(sizes):
+        path = write_snapshot(synthetic_snapshot(n), directory, f"p{i}.json")
+        specs[f"p{i}"] = {"label": f"{n:,} picks", "snapshot": path}
+
+    # Budget: a share of what holding every portfolio would take
+    full = PortfolioRegistry(specs, max_bytes=1 << 62)
+    for portfolio_id in specs:
+        full.get(portfolio_id)
+    budget = int(full.size * budget_share)
+
+    # Popularity does not follow size: shuffle which portfolio gets which Zipf rank
+    rng = random.Random(7)
+    ids = list(specs)
+    rng.shuffle(ids)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(ids))]
+    traffic = rng.choices(ids, weights, k=requests)
+
+    registry = PortfolioRegistry(specs, max_bytes=budget)
+    cold = {portfolio_id: [] for portfolio_id in specs}
+    warm = {portfolio_id: [] for portfolio_id in specs}
+    for portfolio_id in traffic:
+        loads = registry._stats[portfolio_id]["loads"]
+        start = time.perf_counter()
+        registry.get(portfolio_id)
+        elapsed = time.perf_counter() - start
+        (cold if registry._stats[portfolio_id]["loads"] > loads else warm)[portfolio_id].append(elapsed)
+
+    rows = []
+    for row in registry.stats():
+        portfolio_id = row["portfolio"]
+        full_size = full._entries[portfolio_id][2]
+        rows.append([
+            portfolio_id, specs[portfolio_id]["label"], f"{traffic.count(portfolio_id) / requests:.0%}",
+            row["loads"], f"{statistics.mean(cold[portfolio_id]) * 1000:.1f} ms" if cold[portfolio_id] else "-",
+            f"{statistics.median(warm[portfolio_id]) * 1e6:.1f} µs" if warm[portfolio_id] else "-",
+            f"{full_size / 1024 / 1024:.1f} MB", f"{row['resident_bytes'] / 1024 / 1024:.1f} MB",
+        ])
+    print(f"{requests:,} requests, budget {budget / 1024 / 1024:.1f} MB of {full.size / 1024 / 1024:.1f} MB, "
+          f"hit rate {sum(map(len, warm.values())) / requests:.1%}\n")
+    report(rows, ["portfolio", "size", "traffic", "loads", "cold load", "hit (p50)", "artifacts", "resident"])
+
+    # How close the sampled size estimate is to what the artifacts actually allocate
+    path = specs[ids[0]]["snapshot"]
+    with open(path, "rb") as f:
+        raw = f.read()
+    tracemalloc.start()
+    artifacts = build_portfolio_artifacts(path, raw, "0" * 64)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    estimate = best_of(lambda: estimate_size(artifacts), repeat=3)
+    print(f"\nestimate_size for {specs[ids[0]]['label']}: {estimate_size(artifacts) / 1024 / 1024:.1f} MB "
+          f"in {estimate * 1000:.1f} ms; traced allocations {allocated / 1024 / 1024:.1f} MB")
+
+
+# --- Full-text search ---
+SEARCH_QUERIES = ("earnings", "reclaim ema21", "rvol", "break", "sma200 downtrend", "industr", "gold miners", "zzz")
+
+
+@benchmark
+def bench_search(focus_sizes=(8, 100, 1_000), history=(1, 52, 260), repeat=200):
+    """Index build time and query latency as the focus list and the indexed history grow."""
+    import statistics
+    from search_index import SearchIndex, build_search_index, snapshot_documents
+    from snapshot_schema import validate_snapshot
+
+    def measure(docs):
+        start = time.perf_counter()
+        index = build_search_index(docs)
+        build = time.perf_counter() - start
+        search = SearchIndex(index)
+        latencies = []
+        for _ in range(repeat):
+            for query in SEARCH_QUERIES:
+                start = time.perf_counter()
+                search.search(query)
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        return [
+            len(docs), len(index["vocab"]), f"{build * 1000:.1f} ms",
+            f"{statistics.median(latencies) * 1e6:.0f} µs", f"{latencies[int(len(latencies) * 0.99)] * 1e6:.0f} µs",
+        ]
+
+    rows = []
+    for n in focus_sizes:
+        rows.append([f"{n} focus items", *measure(snapshot_documents(validate_snapshot(synthetic_snapshot(200, n))))])
+    weekly = validate_snapshot(synthetic_snapshot(200))
+    for weeks in history:
+        docs = []
+        for week in range(weeks):
+            docs.extend(snapshot_documents(weekly, f"week {week}"))
+        rows.append([f"{weeks} snapshots x 8 focus", *measure(docs)])
+    report(rows, ["indexed", "docs", "terms", "build", "query p50", "query p99"])
+
+
+# --- Visitor analytics ---
+@benchmark
+def bench_analytics(visitors=(1_000, 100_000, 1_000_000), visits_per_visitor=3, days=30, daily_visits=2_000):
+    """Unique-visitor counting: HyperLogLog vs an exact set, and the admin read as one pipeline."""
+    import random
+    from datetime import datetime, timedelta
+    from analytics import US_EASTERN_TZ, stats_commands, parse_stats, visit_commands
+    from local_redis import HyperLogLog, LocalRedis
+
+    rows = []
+    rng = random.Random(7)
+    for n in visitors:
+        ids = [f"{rng.getrandbits(64):016x}" for _ in range(n)]
+        hll, exact = HyperLogLog(), set()
+        start = time.perf_counter()
+        for _ in range(visits_per_visitor):
+            for client in ids:
+                hll.add(client)
+        add_seconds = time.perf_counter() - start
+        for client in ids:
+            exact.add(client)
+        exact_bytes = sys.getsizeof(exact) + sum(sys.getsizeof(client) for client in exact)
+        estimate = hll.count()
+        rows.append([
+            f"{n:,} visitors", f"{n * visits_per_visitor:,}", f"{estimate:,}", f"{(estimate - n) / n * 100:+.2f}%",
+            f"{exact_bytes / 1024:,.0f} KB", f"{hll.registers.nbytes / 1024:.0f} KB",
+            f"{add_seconds / (n * visits_per_visitor) * 1e6:.2f} µs",
+        ])
+    report(rows, ["population", "visits", "estimate", "error", "exact set", "hll", "per add"])
+
+    # A month of traffic, then the admin panel's single read of all windows
+    clock = [0.0]
+    redis = LocalRedis(clock=lambda: clock[0])
+    now = datetime(2026, 10, 19, 12, tzinfo=US_EASTERN_TZ)
+    population = [f"{rng.getrandbits(64):016x}" for _ in range(daily_visits * 5)]
+    start_time = now - timedelta(days=days)
+    for visit in range(days * daily_visits):
+        at = start_time + timedelta(seconds=visit * days * 86_400 / (days * daily_visits))
+        clock[0] = at.timestamp()
+        device = "mobile" if visit % 3 == 0 else "desktop"
+        redis.pipeline(visit_commands("bench", device, rng.choice(population), at))
+    clock[0] = now.timestamp()
+    cmds = stats_commands("bench", now)
+    latencies = []
+    for _ in range(50):
+        start = time.perf_counter()
+        stats = parse_stats(redis.pipeline(cmds), now)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"\nadmin read: 1 round-trip, {len(cmds)} commands, {len(redis)} live keys, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms (local backend); "
+          f"unique 24h/7d/30d/total = {stats['unique_24h']}/{stats['unique_7d']}/{stats['unique_30d']}/{stats['unique_total']}")
+
+
+# --- Live quotes ---
+@benchmark
+def bench_quotes(viewers=(1, 10, 100, 500), intervals=5, ttl=0.2, fetch_seconds=0.05, sizes=(1_000, 10_000, 100_000)):
+    """Provider calls per refresh interval as viewers grow, and the cost of re-deriving priced artifacts."""
+    import threading
+    from live_quotes import QuoteBasis, QuoteProvider, QuoteRefresher, QuoteSet, apply_quotes
+    from snapshot_schema import validate_snapshot
+    from view_models import build_render_artifacts
+
+    class SlowProvider(QuoteProvider):
+        calls = 0
+
+        def fetch(self, tickers):
+            SlowProvider.calls += 1
+            time.sleep(fetch_seconds)
+            return {ticker: {"price": 100.0, "timestamp": "now"} for ticker in tickers}
+
+    rows = []
+    tickers = [synthetic_ticker(i) for i in range(1_000)]
+    for n in viewers:
+        SlowProvider.calls = 0
+        refresher = QuoteRefresher(SlowProvider(), ttl=ttl)
+        deadline = time.perf_counter() + intervals * ttl
+        views = [0] * n
+
+        def viewer(k):
+            while time.perf_counter() < deadline:
+                refresher.get(tickers)
+                views[k] += 1
+                time.sleep(0.005)
+
+        threads = [threading.Thread(target=viewer, args=(k,)) for k in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = refresher.stats()
+        rows.append([f"{n} viewers", f"{sum(views):,}", SlowProvider.calls,
+                     f"{SlowProvider.calls / intervals:.1f}", stats["waits"]])
+    report(rows, ["concurrency", "page views", "provider calls", "calls / interval", "waited on fetch"])
+
+    rows = []
+    for n in sizes:
+        data = validate_snapshot(synthetic_snapshot(n))
+        artifacts = build_render_artifacts(data)
+        quotes = {row["ticker"]: {"price": row["last_price"] * 1.01, "timestamp": "now"}
+                  for row in data["table_view_model"] + data["focus_view_model"] if row.get("last_price")}
+        start = time.perf_counter()
+        basis = QuoteBasis(artifacts)
+        basis_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        apply_quotes(artifacts, basis, QuoteSet(1, quotes, 0.0, "Live"))
+        rows.append([f"{n:,} rows", f"{basis_seconds * 1000:.1f} ms", f"{(time.perf_counter() - start) * 1000:.1f} ms"])
+    report(rows, ["portfolio", "basis (per snapshot)", "apply (per refresh)"])
+
+
+# --- Rate limiting ---
+@benchmark
+def bench_rate_limit(decisions=1_000_000, clients=10_000, threads=8, flood_seconds=7_200, flood_rps=50):
+    """Limiter decision cost, and backend writes and stored feedback under a scripted flood."""
+    import threading
+    from analytics import FEEDBACK_MAX_ENTRIES, RATE_LIMITS, feedback_commands
+    from local_redis import LocalRedis
+    from rate_limit import RateLimiter
+
+    ids = [f"{i:016x}" for i in range(clients)]
+    limiter = RateLimiter(*RATE_LIMITS["visit"])
+    start = time.perf_counter()
+    for i in range(decisions):
+        limiter.allow(ids[i % clients])
+    single = (time.perf_counter() - start) / decisions
+
+    per_thread = decisions // threads
+
+    def run(offset):
+        for i in range(per_thread):
+            limiter.allow(ids[(i + offset) % clients])
+
+    workers = [threading.Thread(target=run, args=(k * 997,)) for k in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    contended = (time.perf_counter() - start) / (per_thread * threads)
+    print(f"allow(): {single * 1e6:.2f} µs per decision, {contended * 1e6:.2f} µs under {threads} threads "
+          f"({clients:,} clients tracked)\n")
+
+    rows = []
+    for label, sources in (("1 script", 1), ("100 clients", 100), ("10,000 ids", 10_000)):
+        clock = [0.0]
+        limiter = RateLimiter(*RATE_LIMITS["feedback"], clock=lambda: clock[0])
+        redis = LocalRedis()
+        attempts = flood_seconds * flood_rps
+        writes = 0
+        start = time.perf_counter()
+        for i in range(attempts):
+            clock[0] = i / flood_rps
+            if limiter.allow(ids[i % sources]):
+                redis.pipeline(feedback_commands("bench", {"text": f"spam {i}"}))
+                writes += 1
+        seconds = time.perf_counter() - start
+        stored = len(redis.pipeline([["LRANGE", "feedback:bench", 0, -1]])[0]["result"])
+        stats = limiter.stats()
+        rows.append([label, f"{attempts:,}", f"{writes:,}", f"{stats['rejected_client']:,}",
+                     f"{stats['rejected_global']:,}", f"{stored:,} / {FEEDBACK_MAX_ENTRIES:,}",
+                     f"{seconds / attempts * 1e6:.2f} µs"])
+    report(rows, [f"feedback flood ({flood_seconds // 3600}h)", "attempts", "backend writes", "per-client rejects",
+                  "global rejects", "stored", "per attempt"])
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:]
+    if not names:
+        for name, fn in BENCHMARKS.items():
+            print(f"{name:24s} {fn.__doc__}")
+        sys.exit(0)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}")
+            sys.exit(1)
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
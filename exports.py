@@ -0,0 +1,148 @@
+"""Bulk exports (CSV, Parquet, JSON Lines) of the masked portfolio and focus scan.
+
+Exports are serialized in chunks of rows (`iter_export`) and held in a
+byte-bounded LRU (`ExportCache`) keyed by snapshot version, dataset and
+format, so a burst of downloads after an update serializes each file once.
+
+st.download_button keeps a whole copy of every file it serves in memory,
+so exports are not spilled to disk: a spilled file would be read back
+whole anyway. Instead each export is capped at `max_export_bytes`
+(16 MB by default: about 90k portfolio rows as CSV, 40k as JSON Lines,
+far more as Parquet); serialization stops with ExportTooLarge past it.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# format -> (label, MIME type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "text/csv", "csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet", "parquet"),
+    "jsonl": ("JSON Lines", "application/x-ndjson", "jsonl"),
+}
+
+CHUNK_ROWS = 5000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_EXPORT_BYTES = 16 * 1024 * 1024
+
+# Unmasked helper columns that must never leave the server
+_PRIVATE_COLUMNS = ("ticker_raw",)
+
+
+class ExportTooLarge(ValueError):
+    """Raised when an export grows past the per-file size cap."""
+
+
+def export_frame(table) -> pd.DataFrame:
+    """DataFrame of a render artifact table (column mapping or row list) without private columns."""
+    return pd.DataFrame(table).drop(columns=list(_PRIVATE_COLUMNS), errors="ignore")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only buffer drained after every Parquet row group."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks = []
+        return out
+
+
+def iter_export(df: pd.DataFrame, fmt: str, chunk_rows: int = CHUNK_ROWS):
+    """Yields the export of `df` in `fmt` as byte chunks of at most `chunk_rows` rows each."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    starts = range(0, max(len(df), 1), chunk_rows)
+
+    if fmt == "parquet":
+        # One schema for the whole table, so sparse columns type the same in every row group
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        sink = _Sink()
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for start in starts:
+                chunk = df.iloc[start:start + chunk_rows]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield sink.drain()
+        yield sink.drain()
+        return
+
+    for start in starts:
+        chunk = df.iloc[start:start + chunk_rows]
+        if fmt == "csv":
+            yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+        elif len(chunk):
+            yield chunk.to_json(
+                orient="records", lines=True, force_ascii=False, double_precision=15
+            ).encode("utf-8")
+
+
+class ExportCache:
+    """LRU of serialized exports bounded by their total size in bytes.
+
+    Each key is built at most once at a time; concurrent callers wait for it.
+    A single export may not exceed `max_export_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_export_bytes: int = DEFAULT_MAX_EXPORT_BYTES):
+        self.max_bytes = max_bytes
+        self.max_export_bytes = max_export_bytes
+        self.size = 0
+        self._entries = OrderedDict() # key -> bytes
+        self._lock = threading.Lock()
+        self._building = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple, chunks) -> bytes:
+        """Cached export for `key`; `chunks` is a zero-argument callable returning the byte chunks."""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                pending = self._building.get(key)
+                if pending is None:
+                    pending = self._building[key] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            value = self._build(chunks())
+            with self._lock:
+                self._entries[key] = value
+                self.size += len(value)
+                self._evict()
+            return value
+        finally:
+            with self._lock:
+                self._building.pop(key).set()
+
+    def _build(self, chunks) -> bytes:
+        buffer = []
+        size = 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size > self.max_export_bytes:
+                raise ExportTooLarge(f"Export exceeds {self.max_export_bytes} bytes")
+        return b"".join(buffer)
+
+    def _evict(self) -> None:
+        # The newest entry always stays (it is at most max_export_bytes)
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, value = self._entries.popitem(last=False)
+            self.size -= len(value)
@@ -0,0 +1,385 @@
+"""Pure formatting helpers shared by the Streamlit app and offline builders.
+
+Numeric fields arrive normalized by snapshot_schema.validate_snapshot
+(float, int or None), so the formatters use them as is; `safe_float` is
+only for raw values that have not been through the schema.
+
+The hot helpers (run per row of every snapshot) use precompiled patterns
+and small caches; verify_formatters.py checks them against the original
+implementations and guards their speed.
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+
+_EVIDENCE_GROUP_RE = re.compile(r"\s*\((?:[A-Z]\d+(?:,\s*)?)+\)")
+_EVIDENCE_REF_RE = re.compile(r"\b[FNVB]\d+\b")
+_SPACE_RUN_RE = re.compile(r"\s{2,}")
+_ISO_DATE_RE = re.compile(r'(.*?)\s*(\d{4})-(\d{2})-(\d{2})(.*)')
+_US_DATE_RE = re.compile(r'(.*?)\s*(\d{1,2})/(\d{1,2})/(\d{4})(.*)')
+_US_SHORT_DATE_RE = re.compile(r'(.*?)\s*(\d{1,2})/(\d{1,2})/(\d{2})(.*)')
+_NUMBER_RE = re.compile(r"[-+]?\d*\.?\d+")
+_STRATEGY_LINK_RE = re.compile(r"\n📊 Full strategy view & live metrics: https://.*")
+
+
+def strip_evidence_refs(text: str) -> str:
+    if not text or not isinstance(text, str):
+        return ""
+    cleaned = _EVIDENCE_GROUP_RE.sub("", text)
+    cleaned = _EVIDENCE_REF_RE.sub("", cleaned)
+    cleaned = _SPACE_RUN_RE.sub(" ", cleaned).strip()
+    cleaned = cleaned.replace(" ,", ",").replace(" .", ".")
+    return cleaned
+
+def mask_ticker(ticker: str) -> str:
+    if ticker is None:
+        return ""
+    return _mask_value(str(ticker).strip().upper())
+
+@lru_cache(maxsize=8192)
+def _mask_value(value: str) -> str:
+    if not value:
+        return ""
+    
+    # NEW: Handle dot-separated tickers like BRK.B
+    if "." in value:
+        parts = value.split(".")
+        # Mask each part separately, e.g., BRK.B -> B**.B* or similar
+        # To match user vibe of keeping it recognizable but hidden
+        masked_parts = [_mask_value(p.strip().upper()) if p else "*" for p in parts]
+        return ".".join(masked_parts)
+
+    length = len(value)
+    if length <= 2:
+        return value[0] + "*"
+    if length == 3:
+        return value[0] + "**"
+    # For 4+: Preserve start and end, stars in middle
+    return f"{value[0]}{'*' * (length - 2)}{value[-1]}"
+
+
+def format_us_date(date_str: str) -> str:
+    """Formats a date string (with or without icon prefixes) to US MM/DD/YY format."""
+    if not date_str or str(date_str).strip() in ('', 'N/A', 'TBD', 'None'):
+        return str(date_str) if str(date_str) != 'None' else ''
+    return _format_date_text(str(date_str).strip())
+
+def _us_date(year: str, month: str, day: str) -> str:
+    # datetime() validates like strptime did (month/day ranges, leap years)
+    return datetime(int(year), int(month), int(day)).strftime("%m/%d/%y")
+
+@lru_cache(maxsize=4096)
+def _format_date_text(date_str: str) -> str:
+    # Try: icon prefix + YYYY-MM-DD (e.g. "⚠️ 2024-04-25"), then M/D/YYYY, then M/D/YY to zero-pad
+    for pattern in (_ISO_DATE_RE, _US_DATE_RE, _US_SHORT_DATE_RE):
+        match = pattern.search(date_str)
+        if not match:
+            continue
+        prefix, first, second, third, suffix = match.groups()
+        try:
+            if pattern is _ISO_DATE_RE:
+                formatted = _us_date(first, second, third)
+            elif pattern is _US_DATE_RE:
+                formatted = _us_date(third, first, second)
+            else:
+                # %y: 69-99 -> 19xx, 00-68 -> 20xx
+                year = int(third)
+                formatted = _us_date(year + (1900 if year >= 69 else 2000), first, second)
+        except ValueError:
+            continue
+        parts = [p for p in (prefix.strip(), formatted, suffix.strip()) if p]
+        return " ".join(parts)
+    return date_str
+
+def safe_float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.replace(",", "")
+        match = _NUMBER_RE.search(cleaned)
+        if match:
+            try:
+                return float(match.group())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def format_distance_pct(val) -> str:
+    if val is None:
+        return "—"
+    return f"{val:+.1f}%"
+
+
+def format_catalyst_label(dte) -> str:
+    if dte is None:
+        return "—"
+    dte_int = int(dte)
+    if dte_int >= 0:
+        return f"ER -{dte_int}d"
+    return f"ER +{abs(dte_int)}d"
+
+
+def resolve_trend_label(trend_color) -> str:
+    color = str(trend_color or "").upper()
+    if color == "GREEN":
+        return "bullish"
+    if color == "RED":
+        return "bearish"
+    return "neutral"
+
+
+def format_tech_status(item: dict) -> str:
+    trigger_key = str(item.get('primary_trigger_key') or '')
+    line_label = 'SMA200'
+    dist_val = item.get('dist_sma200_pct')
+    if 'EMA55' in trigger_key:
+        line_label = 'EMA55'
+        dist_val = item.get('dist_ema55_pct')
+    elif 'EMA21' in trigger_key:
+        line_label = 'EMA21'
+        dist_val = item.get('dist_ema21_pct')
+
+    status = '—'
+    if dist_val is not None:
+        status = 'below' if dist_val < 0 else 'above'
+        status = f"{status} {line_label}"
+    confirm_days = item.get('break_confirm_days')
+    if confirm_days is not None and confirm_days > 0 and status != '—':
+        status = f"{status} ({int(confirm_days)}d)"
+    return status
+
+
+def determine_setup_label(item: dict) -> str:
+    dte = item.get('dte')
+    trigger_key = str(item.get('primary_trigger_key') or '')
+    signal_text = str(item.get('signal') or '')
+    volume_alert = bool(item.get('volume_alert')) if item.get('volume_alert') is not None else False
+    news_raw = item.get('news_sentiment_raw')
+
+    if dte is not None and 0 <= int(dte) <= 5:
+        return 'IMMINENT_CATALYST'
+    if 'EARNINGS' in trigger_key or 'Earnings' in signal_text:
+        return 'IMMINENT_CATALYST'
+    if volume_alert or 'VOLUME' in trigger_key or 'Volume' in signal_text:
+        return 'VOL_MOMENTUM'
+    if news_raw is not None and abs(news_raw) >= 0.6:
+        return 'NEWS_SHOCK'
+    if any(key in trigger_key for key in ['BREAK', 'SELL_RULE', 'GAP_DOWN']) or 'Break' in signal_text:
+        return 'BREAK_RISK'
+    return 'WATCH'
+
+
+def format_urgency_news(urgency_val, news_raw) -> str:
+    if urgency_val is None:
+        urgency_str = '—'
+    else:
+        urgency_str = f"{urgency_val:.0f}"
+    if news_raw is None:
+        news_str = '—'
+    else:
+        news_str = f"{news_raw:+.2f}"
+    return f"{urgency_str} | News {news_str}"
+
+
+def format_key_levels_line(item: dict) -> str:
+    parts = []
+    for label, level_key, dist_key in [
+        ('SMA200', 'sma200', 'dist_sma200_pct'),
+        ('EMA55', 'ema55', 'dist_ema55_pct'),
+        ('EMA21', 'ema21', 'dist_ema21_pct')
+    ]:
+        level = item.get(level_key)
+        dist_val = item.get(dist_key)
+        if level is None or dist_val is None:
+            continue
+        parts.append(f"{label} {level:.2f} ({dist_val:+.1f}%)")
+    return " | ".join(parts) if parts else '—'
+
+
+def format_volume_evidence(vol_ratio) -> str:
+    if vol_ratio is None:
+        return 'RVOL20 —'
+    if vol_ratio >= 2.0:
+        note = 'volume confirms move'
+    elif vol_ratio >= 1.5:
+        note = 'volume elevated'
+    elif vol_ratio < 1.0:
+        note = 'volume light'
+    else:
+        note = 'volume neutral'
+    return f"RVOL20 {vol_ratio:.2f}x · {note}"
+
+
+def format_news_evidence(item: dict) -> str:
+    headline = item.get('news_headline')
+    summary = item.get('news_summary')
+    headline_age = item.get('news_age')
+    source_count = item.get('news_sources')
+
+    items = []
+    if headline:
+        if headline_age and source_count is not None:
+            items.append(f"{headline} ({headline_age}, {source_count} src)")
+        elif headline_age:
+            items.append(f"{headline} ({headline_age})")
+        else:
+            items.append(str(headline))
+    if summary and (not headline or summary.strip() not in str(headline)):
+        items.append(str(summary))
+    return " | ".join(items[:2]) if items else '—'
+
+
+def build_one_line_verdict(item: dict) -> str:
+    verdict = str(item.get('verdict') or 'WATCH').upper()
+    trend_color = str(item.get('trend_color') or '').upper()
+
+    verdict_prefix = {
+        'EXIT': 'RISK_OFF / No Entry',
+        'TRIM': 'RISK_OFF / No Entry',
+        'ACCUMULATE': 'RISK_ON / Entry',
+        'STRONG_ACCUMULATE': 'RISK_ON / Entry',
+        'HIGH_RVOL_EVENT': 'RISK_OFF / Volatility Event',
+        'RATING_PRESSURE': 'RISK_OFF / Rating Pressure',
+        'EARNINGS_MOMO': 'RISK_ON / Event Momentum',
+        'TREND_CONFIRMATION': 'RISK_ON / Trend Active',
+        'SENTIMENT_COLLISION': 'NEUTRAL / Signal Conflict',
+        'TREND_CONFLICT_UPG': 'NEUTRAL / Signal Conflict',
+        'EVENT_WINDOW': 'NEUTRAL / Event Window'
+    }
+
+    if verdict in verdict_prefix:
+        prefix = verdict_prefix[verdict]
+    elif verdict in ['EXIT', 'TRIM']:
+        prefix = 'RISK_OFF / No Entry'
+    elif verdict in ['ACCUMULATE', 'STRONG_ACCUMULATE']:
+        prefix = 'RISK_ON / Entry'
+    elif trend_color == 'GREEN':
+        prefix = 'RISK_ON / Trend Active'
+    elif trend_color == 'RED':
+        prefix = 'RISK_OFF / Trend Broken'
+    else:
+        prefix = 'NEUTRAL / Range Bound'
+
+    dist_val = item.get('dist_sma200_pct')
+    dist_label = 'price —'
+    if dist_val is not None:
+        side = 'below' if dist_val < 0 else 'above'
+        dist_label = f"price {abs(dist_val):.1f}% {side} SMA200"
+    catalyst = format_catalyst_label(item.get('dte'))
+    trend = resolve_trend_label(item.get('trend_color'))
+    if catalyst == '—':
+        return f"{prefix} - {dist_label}, trend {trend}."
+    return f"{prefix} - {catalyst} + {dist_label}, trend {trend}."
+
+
+
+def format_verdict_label(value: str) -> str:
+    text = str(value or "").replace("_", " ").strip()
+    if not text:
+        return "Watch"
+    return text.lower().capitalize()
+
+
+def format_picked_label(value: str) -> str:
+    picked = str(value or "").strip()
+    return picked if picked else "N/A"
+
+
+def resolve_next_action(verdict: str, trend_color: str) -> str:
+    verdict_action = {
+        'EXIT': 'remove from focus / reduce exposure',
+        'TRIM': 'remove from focus / reduce exposure',
+        'ACCUMULATE': 'add alert / size up',
+        'STRONG_ACCUMULATE': 'add alert / size up',
+        'HIGH_RVOL_EVENT': 'watch only (volatility event)',
+        'RATING_PRESSURE': 'watch only (wait for confirmation)',
+        'SENTIMENT_COLLISION': 'watch only (wait for confirmation)',
+        'TREND_CONFLICT_UPG': 'watch only (wait for confirmation)',
+        'EARNINGS_MOMO': 'add alert / event follow-through',
+        'EVENT_WINDOW': 'watch only (event risk window)',
+        'TREND_CONFIRMATION': 'monitor for entry/add (active uptrend)'
+    }
+    if verdict in verdict_action:
+        return verdict_action[verdict]
+    if trend_color == 'GREEN':
+        return 'monitor for entry/add (active uptrend)'
+    if trend_color == 'RED':
+        return 'watch only (wait for setup)'
+    return 'watch only'
+
+
+def format_ban_line(dte) -> str:
+    if dte is None:
+        return 'Ban: None (No immediate ER risk)'
+
+    dte_int = int(dte)
+    if 0 <= dte_int <= 5:
+        return f'Ban: until ER passed + 2 sessions (DTE: {dte_int})'
+    if -2 <= dte_int < 0:
+        return f'Ban: cooling down post-ER (DTE: +{abs(dte_int)})'
+    return 'Ban: None (No immediate ER risk)'
+
+
+def build_focus_options(focus_items: list) -> tuple[list, dict]:
+    options = []
+    ticker_map = {}
+    for item in focus_items:
+        t_raw = item.get('ticker')
+        if not t_raw:
+            continue
+        t_display = mask_ticker(t_raw)
+        verdict_display = format_verdict_label(item.get('verdict', 'WATCH'))
+        picked_display = format_picked_label(item.get('picked_date'))
+        label = f"{t_display} | Picked {picked_display} | {verdict_display}"
+        options.append(label)
+        ticker_map[label] = t_raw
+    return options, ticker_map
+
+
+def build_playbook_lines(item: dict) -> list:
+    """Returns the (primary, secondary, failure) watch lines for the Playbook."""
+    dist_sma200 = item.get('dist_sma200_pct')
+    dist_ema21 = item.get('dist_ema21_pct')
+
+    if dist_sma200 is not None and dist_sma200 > 0 and dist_ema21 is not None and dist_ema21 > 0:
+        # Strong Uptrend
+        return [
+            "Watch trigger (Primary): hold line above EMA21",
+            "Watch trigger (Secondary): trend validation at SMA200",
+            "Failure: loss of EMA21 with RVOL > 1"
+        ]
+    if dist_sma200 is not None and dist_sma200 < 0:
+        # Downtrend / Break
+        return [
+            "Watch trigger (Primary): strong close to reclaim SMA200",
+            "Watch trigger (Secondary): 2 consecutive closes above EMA21",
+            "Failure: reject at EMA21 with RVOL < 1"
+        ]
+    # Mixed / Near levels
+    return [
+        "Watch trigger (Primary): definitive break above nearest resistance",
+        "Watch trigger (Secondary): establish higher low",
+        "Failure: breakdown below recent consolidation"
+    ]
+
+
+def mask_summary_text(summary_text: str, tickers) -> str:
+    """Masks every known ticker in the radar summary and drops the strategy link."""
+    if not summary_text:
+        return ""
+    if tickers:
+        # Single-pass substitution using a lambda to prevent masking a mask
+        summary_text = _ticker_pattern(frozenset(tickers)).sub(lambda m: mask_ticker(m.group(0)), summary_text)
+
+    # --- Remove the strategy link from the summary (Public View Safety) ---
+    return _STRATEGY_LINK_RE.sub("", summary_text)
+
+
+@lru_cache(maxsize=16)
+def _ticker_pattern(tickers: frozenset):
+    """Compiled alternation of `tickers`, built once per ticker set (i.e. per snapshot)."""
+    # Sort by length descending for regex priority
+    sorted_tickers = sorted(tickers, key=len, reverse=True)
+    pattern = "|".join(re.escape(t) for t in sorted_tickers)
+    return re.compile(rf"\b({pattern})\b", flags=re.IGNORECASE)
@@ -0,0 +1,94 @@
+"""Per-ticker history chart payloads, downsampled on the server.
+
+Series come from the history store. Long series are reduced to a fixed
+point budget with Largest-Triangle-Three-Buckets (LTTB) on the price line;
+the EMA/SMA overlays and return line are sampled at the same points so the
+lines stay aligned. Values are rounded, which keeps a payload at a few KB
+no matter how long a pick has been held.
+"""
+from datetime import datetime
+
+from history_store import ticker_series
+
+CHART_POINTS = 100
+CHART_FIELDS = ("last_price", "ema21", "ema55", "sma200", "return_pct")
+
+
+def lttb(xs: list, ys: list, threshold: int) -> list:
+    """Indices of the `threshold` points LTTB keeps from (xs, ys); xs must be ascending."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # Average of the next bucket (the last bucket's neighbour is the final point)
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def _parse_date(value):
+    text = str(value or "").strip()[:10]
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def build_ticker_chart(conn, ticker: str, until: str = None, max_points: int = CHART_POINTS):
+    """Chart payload for one ticker up to `until`, or None with fewer than two priced points.
+
+    The series starts at the pick date (when known) and is downsampled to at
+    most `max_points` points: {"as_of": [...], "price": [...], "ema21": [...],
+    "ema55": [...], "sma200": [...], "return_pct": [...]}.
+    """
+    series = ticker_series(conn, ticker, CHART_FIELDS + ("picked_date",), until=until)
+    if not series:
+        return None
+    picked = _parse_date(series[-1]["picked_date"])
+    if picked is not None:
+        since = picked.strftime("%Y-%m-%d")
+        series = [point for point in series if point["as_of"] >= since]
+
+    points = []
+    for point in series:
+        stamp = _parse_date(point["as_of"])
+        if stamp is not None and point["last_price"] is not None:
+            points.append((stamp.timestamp(), point))
+    if len(points) < 2:
+        return None
+
+    keep = lttb([x for x, _ in points], [p["last_price"] for _, p in points], max_points)
+    sampled = [points[i][1] for i in keep]
+    return {
+        "as_of": [p["as_of"][:10] for p in sampled],
+        "price": [_round(p["last_price"]) for p in sampled],
+        "ema21": [_round(p["ema21"]) for p in sampled],
+        "ema55": [_round(p["ema55"]) for p in sampled],
+        "sma200": [_round(p["sma200"]) for p in sampled],
+        "return_pct": [_round(p["return_pct"]) for p in sampled],
+    }
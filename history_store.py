@@ -0,0 +1,382 @@
+"""Append-only, indexed history of published snapshots (SQLite).
+
+Every snapshot is ingested once, keyed by its SHA-256 (the same digest the
+render cache uses), so re-ingesting the same file is a no-op:
+
+- `snapshots` keeps the compressed snapshot bytes for time travel
+- `ticker_history` keeps one row per ticker per snapshot with the fields
+  worth trending (price, return, hold streak, verdict, urgency, ...),
+  clustered on (ticker, as_of) for range queries
+- `alerts` keeps the alert rules fired by each snapshot (alerts.py)
+
+Usage:
+    python history_store.py ingest data/snapshot.json [...]
+    python history_store.py series CCL urgency [last_n]
+    python history_store.py changes 2026-03-01 [2026-03-31]
+    python history_store.py alerts 2026-03-01 [2026-03-31]
+"""
+import json
+import os
+import sqlite3
+import sys
+import zlib
+from datetime import date, datetime, timedelta
+
+from render_cache import snapshot_hash
+from snapshot_schema import validate_snapshot
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history.sqlite")
+# Weekdays without a close tolerated inside a daily series (market holidays)
+MAX_MISSED_SESSIONS = 1
+
+# Per-ticker fields tracked over time; focus items override portfolio rows
+HISTORY_FIELDS = {
+    "last_price": "REAL",
+    "return_pct": "REAL",
+    "hold_streak_days": "INTEGER",
+    "quant_score": "REAL",
+    "ema21": "REAL",
+    "ema55": "REAL",
+    "sma200": "REAL",
+    "rsi14": "REAL",
+    "verdict": "TEXT",
+    "urgency": "REAL",
+    "dist_sma200_pct": "REAL",
+    "picked_date": "TEXT",
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS snapshots (
+    hash TEXT PRIMARY KEY,
+    as_of TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_as_of ON snapshots (as_of);
+
+CREATE TABLE IF NOT EXISTS ticker_history (
+    ticker TEXT NOT NULL,
+    as_of TEXT NOT NULL,
+    snapshot_hash TEXT NOT NULL,
+    in_focus INTEGER NOT NULL,
+    {", ".join(f"{name} {kind}" for name, kind in HISTORY_FIELDS.items())},
+    PRIMARY KEY (ticker, as_of, snapshot_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ticker_history_as_of ON ticker_history (as_of, ticker);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    rule_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    snapshot_hash TEXT NOT NULL,
+    fired_at TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    label TEXT NOT NULL,
+    detail TEXT,
+    PRIMARY KEY (rule_id, ticker, snapshot_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS alerts_fired_at ON alerts (fired_at);
+
+CREATE TRIGGER IF NOT EXISTS snapshots_append_only BEFORE DELETE ON snapshots
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS snapshots_no_update BEFORE UPDATE ON snapshots
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS ticker_history_append_only BEFORE DELETE ON ticker_history
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS ticker_history_no_update BEFORE UPDATE ON ticker_history
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS alerts_append_only BEFORE DELETE ON alerts
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS alerts_no_update BEFORE UPDATE ON alerts
+BEGIN SELECT RAISE(ABORT, 'history is append-only'); END;
+"""
+
+_MAX_AS_OF = "\uffff"
+
+_INSERT_ROW = (
+    f"INSERT OR IGNORE INTO ticker_history (ticker, as_of, snapshot_hash, in_focus, {', '.join(HISTORY_FIELDS)}) "
+    f"VALUES ({', '.join('?' * (4 + len(HISTORY_FIELDS)))})"
+)
+
+
+def connect(path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """Opens (and if needed creates) the history database."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+# --- Ingest ---
+def _history_rows(data: dict, as_of: str, digest: str) -> list:
+    merged = {}
+    for row in data.get("table_view_model", []):
+        ticker = str(row.get("ticker") or "").strip().upper()
+        if ticker:
+            merged[ticker] = {name: row.get(name) for name in HISTORY_FIELDS}
+            merged[ticker]["in_focus"] = 0
+    for item in data.get("focus_view_model", []):
+        ticker = str(item.get("ticker") or "").strip().upper()
+        if not ticker:
+            continue
+        entry = merged.setdefault(ticker, dict.fromkeys(HISTORY_FIELDS))
+        entry.update({name: item[name] for name in HISTORY_FIELDS if item.get(name) is not None})
+        entry["in_focus"] = 1
+
+    return [
+        (ticker, as_of, digest, entry["in_focus"], *(entry[name] for name in HISTORY_FIELDS))
+        for ticker, entry in merged.items()
+    ]
+
+
+def ingest_snapshot(conn: sqlite3.Connection, raw: bytes, digest: str = None) -> bool:
+    """Adds one snapshot (file bytes) to the history; returns False if it was already there.
+
+    Raises SnapshotValidationError for snapshots that fail the schema.
+    """
+    digest = digest or snapshot_hash(raw)
+    if conn.execute("SELECT 1 FROM snapshots WHERE hash = ?", (digest,)).fetchone():
+        return False
+
+    data = validate_snapshot(json.loads(raw))
+    ingested_at = datetime.now().astimezone().isoformat(timespec="seconds")
+    as_of = data["meta"].get("updated_at") or ingested_at
+
+    with conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO snapshots (hash, as_of, ingested_at, payload) VALUES (?, ?, ?, ?)",
+            (digest, as_of, ingested_at, zlib.compress(raw, 6))
+        )
+        if cursor.rowcount == 0:
+            return False # Another process got there first
+        conn.executemany(_INSERT_ROW, _history_rows(data, as_of, digest))
+    return True
+
+
+def ingest_file(conn: sqlite3.Connection, path: str) -> bool:
+    with open(path, "rb") as f:
+        return ingest_snapshot(conn, f.read())
+
+
+def record_alerts(conn: sqlite3.Connection, alerts: list, digest: str, fired_at: str = None) -> int:
+    """Appends alerts fired by snapshot `digest` (published at `fired_at`); returns how many were new."""
+    recorded_at = datetime.now().astimezone().isoformat(timespec="seconds")
+    fired_at = fired_at or recorded_at
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO alerts (rule_id, ticker, snapshot_hash, fired_at, recorded_at, label, detail) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (alert["rule_id"], alert["ticker"], digest, fired_at, recorded_at, alert["label"],
+                 json.dumps(alert.get("values"), separators=(",", ":")))
+                for alert in alerts
+            ]
+        )
+        return conn.total_changes - before
+
+
+# --- Queries ---
+def end_of_day(value: str) -> str:
+    """Upper as_of bound: a bare date ('2026-03-20') covers that whole day."""
+    return f"{value} 23:59:59" if len(value) == 10 else value
+
+
+def list_snapshots(conn: sqlite3.Connection, limit: int = 100) -> list:
+    """Most recent snapshots first, as (hash, as_of) rows."""
+    return conn.execute(
+        "SELECT hash, as_of FROM snapshots ORDER BY as_of DESC LIMIT ?", (limit,)
+    ).fetchall()
+
+
+def resolve_snapshot(conn: sqlite3.Connection, ref: str):
+    """Hash of the snapshot named by `ref`, or None.
+
+    `ref` is either a hash prefix (8+ hex characters) or a date/time, which
+    selects the last snapshot published at or before the end of that day.
+    """
+    ref = (ref or "").strip()
+    if not ref:
+        return None
+    if len(ref) >= 8 and all(c in "0123456789abcdef" for c in ref.lower()):
+        row = conn.execute(
+            "SELECT hash FROM snapshots WHERE hash >= ? AND hash < ? ORDER BY as_of DESC LIMIT 1",
+            (ref.lower(), ref.lower() + "g")
+        ).fetchone()
+        if row:
+            return row["hash"]
+    row = conn.execute(
+        "SELECT hash FROM snapshots WHERE as_of <= ? ORDER BY as_of DESC LIMIT 1", (end_of_day(ref),)
+    ).fetchone()
+    return row["hash"] if row else None
+
+
+def previous_snapshot(conn: sqlite3.Connection, digest: str):
+    """Hash of the snapshot published just before `digest`, or None."""
+    row = conn.execute(
+        """
+        SELECT p.hash FROM snapshots p, snapshots s
+        WHERE s.hash = ? AND p.hash != s.hash
+          AND (p.as_of < s.as_of OR (p.as_of = s.as_of AND p.ingested_at < s.ingested_at))
+        ORDER BY p.as_of DESC, p.ingested_at DESC LIMIT 1
+        """,
+        (digest,)
+    ).fetchone()
+    return row["hash"] if row else None
+
+
+def load_snapshot_bytes(conn: sqlite3.Connection, digest: str):
+    """Original snapshot.json bytes for `digest`, or None."""
+    row = conn.execute("SELECT payload FROM snapshots WHERE hash = ?", (digest,)).fetchone()
+    return zlib.decompress(row["payload"]) if row else None
+
+
+def ticker_series(conn: sqlite3.Connection, ticker: str, fields=None, last_n: int = None,
+                  since: str = None, until: str = None) -> list:
+    """One ticker's history in as_of order, optionally limited to the last `last_n` snapshots."""
+    fields = list(fields or HISTORY_FIELDS)
+    unknown = [name for name in fields if name not in HISTORY_FIELDS and name != "in_focus"]
+    if unknown:
+        raise ValueError(f"Unknown history fields: {unknown}")
+
+    clauses = ["ticker = ?"]
+    params = [ticker.strip().upper()]
+    if since:
+        clauses.append("as_of >= ?")
+        params.append(since)
+    if until:
+        clauses.append("as_of <= ?")
+        params.append(end_of_day(until))
+    query = (
+        f"SELECT as_of, {', '.join(fields)} FROM ticker_history "
+        f"WHERE {' AND '.join(clauses)} ORDER BY as_of DESC"
+    )
+    if last_n:
+        query += " LIMIT ?"
+        params.append(last_n)
+    return [dict(row) for row in reversed(conn.execute(query, params).fetchall())]
+
+
+def _session(day: str) -> date:
+    """Trading session of a snapshot day: weekends count toward the Friday before."""
+    session = date.fromisoformat(day)
+    return session - timedelta(days=max(session.weekday() - 4, 0))
+
+
+def _missed_sessions(earlier: date, later: date) -> int:
+    """Weekdays strictly between two sessions."""
+    weeks, rest = divmod((later - earlier).days - 1, 7)
+    return weeks * 5 + sum(1 for i in range(1, rest + 1) if (earlier.weekday() + i) % 7 < 5)
+
+
+def daily_closes(conn: sqlite3.Connection, tickers, before: str = None) -> dict:
+    """ticker -> {session: close} (last price of each session) before `before`, oldest first."""
+    tickers = sorted({ticker.strip().upper() for ticker in tickers})
+    closes = {}
+    for start in range(0, len(tickers), 500):
+        chunk = tickers[start:start + 500]
+        query = (
+            f"SELECT ticker, substr(as_of, 1, 10) AS day, last_price FROM ticker_history "
+            f"WHERE ticker IN ({', '.join('?' * len(chunk))}) AND last_price IS NOT NULL"
+        )
+        params = list(chunk)
+        if before:
+            query += " AND as_of < ?"
+            params.append(before)
+        for row in conn.execute(query + " ORDER BY ticker, as_of", params):
+            try:
+                session = _session(row["day"])
+            except ValueError:
+                continue
+            closes.setdefault(row["ticker"], {})[session] = row["last_price"]
+    return closes
+
+
+def snapshot_closes(conn: sqlite3.Connection, data: dict, tickers) -> dict:
+    """ticker -> closes up to a snapshot: earlier sessions from the store, then the snapshot's own price.
+
+    The store only has a price for days a snapshot was published, so only
+    the latest unbroken run of sessions is returned: a run ends where more
+    than MAX_MISSED_SESSIONS weekdays (market holidays) have no close.
+    Indicators then only fill once that run covers their whole window.
+    """
+    tickers = {str(ticker).strip().upper() for ticker in tickers}
+    today = str(data.get("meta", {}).get("updated_at") or "")[:10]
+    try:
+        today = _session(today)
+    except ValueError:
+        return {} # Undated snapshot: its price cannot be placed in the series
+    by_session = daily_closes(conn, tickers, before=today.isoformat())
+    priced = set()
+    for row in data.get("table_view_model", []) + data.get("focus_view_model", []):
+        ticker = str(row.get("ticker") or "").strip().upper()
+        if ticker in tickers and ticker not in priced and row.get("last_price") is not None:
+            priced.add(ticker)
+            by_session.setdefault(ticker, {})[today] = row["last_price"]
+
+    closes = {}
+    for ticker, series in by_session.items():
+        sessions = sorted(series)
+        start = len(sessions) - 1
+        while start > 0 and _missed_sessions(sessions[start - 1], sessions[start]) <= MAX_MISSED_SESSIONS:
+            start -= 1
+        closes[ticker] = [series[session] for session in sessions[start:]]
+    return closes
+
+
+def recent_alerts(conn: sqlite3.Connection, since: str = None, until: str = None, limit: int = 100) -> list:
+    """Alerts fired within [since, until], newest first."""
+    return [dict(row) for row in conn.execute(
+        "SELECT rule_id, ticker, fired_at, label, detail FROM alerts "
+        "WHERE fired_at >= ? AND fired_at <= ? ORDER BY fired_at DESC, ticker, rule_id LIMIT ?",
+        (since or "", end_of_day(until) if until else _MAX_AS_OF, limit)
+    ).fetchall()]
+
+
+def verdict_changes(conn: sqlite3.Connection, since: str = None, until: str = None) -> list:
+    """Focus verdict transitions within [since, until], oldest first.
+
+    Each row compares a ticker's verdict with its previous recorded verdict,
+    even if that one predates `since`.
+    """
+    return [dict(row) for row in conn.execute(
+        """
+        SELECT ticker, as_of, previous, verdict FROM (
+            SELECT h.ticker, h.as_of, h.verdict, (
+                SELECT p.verdict FROM ticker_history p
+                WHERE p.ticker = h.ticker AND p.as_of < h.as_of AND p.verdict IS NOT NULL
+                ORDER BY p.as_of DESC LIMIT 1
+            ) AS previous
+            FROM ticker_history h
+            WHERE h.as_of >= ? AND h.as_of <= ? AND h.verdict IS NOT NULL
+        )
+        WHERE previous IS NOT NULL AND previous != verdict
+        ORDER BY as_of, ticker
+        """,
+        (since or "", end_of_day(until) if until else _MAX_AS_OF)
+    ).fetchall()]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("ingest", "series", "changes", "alerts"):
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    command, args = sys.argv[1], sys.argv[2:]
+    db = connect()
+    if command == "ingest":
+        for snapshot_path in args:
+            print(f"{snapshot_path}: {'ingested' if ingest_file(db, snapshot_path) else 'already present'}")
+    elif command == "series":
+        last = int(args[2]) if len(args) > 2 else None
+        for point in ticker_series(db, args[0], [args[1]] if len(args) > 1 else None, last_n=last):
+            print(json.dumps(point))
+    elif command == "alerts":
+        for alert in reversed(recent_alerts(db, args[0], args[1] if len(args) > 1 else None, limit=10_000)):
+            print(f"{alert['fired_at']}  {alert['ticker']:6s} {alert['label']}")
+    else:
+        for change in verdict_changes(db, args[0], args[1] if len(args) > 1 else None):
+            print(f"{change['as_of']}  {change['ticker']:6s} {change['previous']} -> {change['verdict']}")
@@ -0,0 +1,247 @@
+"""Vectorized, incremental technical indicators over OHLCV bars.
+
+`IndicatorEngine` keeps rolling state for every ticker in NumPy arrays, so
+a new bar updates all tickers at once (or one ticker in O(1)), and a full
+history is computed by replaying bars through the same update. Definitions
+follow the usual pandas formulations the upstream fields are built with:
+
+- emaN:      close.ewm(span=N, adjust=False).mean()
+- smaN:      close.rolling(N).mean()
+- rsiN:      Wilder RSI, gains/losses smoothed with ewm(alpha=1/N, adjust=False)
+- atrN_pct:  Wilder ATR (true range smoothed as above) / close * 100
+- vol_ratio: volume / volume.rolling(20).mean()
+- dist_*_pct: (close / average - 1) * 100
+
+Each value is NaN (None in `latest()`) until its window has filled.
+Tickers without a bar in an update (NaN close) keep their state.
+"""
+import numpy as np
+
+DEFAULT_EMA_SPANS = (21, 55)
+DEFAULT_SMA_WINDOW = 200
+DEFAULT_RSI_PERIOD = 14
+DEFAULT_ATR_PERIOD = 14
+DEFAULT_VOL_WINDOW = 20
+
+# Fields that only need closes (ATR and vol_ratio need high/low/volume)
+CLOSE_FIELDS = ("ema21", "ema55", "sma200", "rsi14", "dist_ema21_pct", "dist_ema55_pct", "dist_sma200_pct")
+# Indicator fields each snapshot section displays, filled when upstream left them empty
+SECTION_FIELDS = {
+    "table_view_model": ("ema21", "ema55", "sma200", "rsi14"),
+    "focus_view_model": ("ema21", "ema55", "sma200", "dist_ema21_pct", "dist_ema55_pct", "dist_sma200_pct"),
+}
+_FORMATS = {"ema21": "${:.2f}", "ema55": "${:.2f}", "sma200": "${:.2f}", "rsi14": "{:.0f}"}
+
+
+def _as_array(values, n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+class IndicatorEngine:
+    """Rolling indicator state for a fixed list of tickers."""
+
+    def __init__(self, tickers, ema_spans=DEFAULT_EMA_SPANS, sma_window: int = DEFAULT_SMA_WINDOW,
+                 rsi_period: int = DEFAULT_RSI_PERIOD, atr_period: int = DEFAULT_ATR_PERIOD,
+                 vol_window: int = DEFAULT_VOL_WINDOW):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.ema_spans = tuple(ema_spans)
+        self.sma_window = sma_window
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self.vol_window = vol_window
+
+        n = len(self.tickers)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._close = np.full(n, np.nan)
+        self._ema = {span: np.full(n, np.nan) for span in self.ema_spans}
+        self._sma_buf = np.zeros((n, sma_window))
+        self._sma_sum = np.zeros(n)
+        self._avg_gain = np.full(n, np.nan)
+        self._avg_loss = np.full(n, np.nan)
+        self._atr_count = np.zeros(n, dtype=np.int64)
+        self._atr = np.full(n, np.nan)
+        self._vol_count = np.zeros(n, dtype=np.int64)
+        self._vol_buf = np.zeros((n, vol_window))
+        self._vol_sum = np.zeros(n)
+        self._volume = np.full(n, np.nan)
+
+    @classmethod
+    def from_bars(cls, tickers, close, high=None, low=None, volume=None, **windows):
+        """Engine after replaying (n_tickers, n_bars) arrays, oldest bar first.
+
+        Shorter histories are NaN-padded; `high`/`low`/`volume` are optional.
+        """
+        engine = cls(tickers, **windows)
+        close = np.asarray(close, dtype=np.float64)
+        columns = [None if a is None else np.asarray(a, dtype=np.float64) for a in (high, low, volume)]
+        for t in range(close.shape[1]):
+            engine.update(close[:, t], *(None if a is None else a[:, t] for a in columns))
+        return engine
+
+    # --- Updates ---
+    def update(self, close, high=None, low=None, volume=None) -> None:
+        """Adds one bar for every ticker (arrays aligned with `tickers`; NaN close = no bar)."""
+        n = len(self.tickers)
+        close = _as_array(close, n)
+        idx = np.flatnonzero(~np.isnan(close))
+        if idx.size:
+            self._step(idx, close[idx], _as_array(high, n)[idx], _as_array(low, n)[idx], _as_array(volume, n)[idx])
+
+    def update_bar(self, ticker: str, close: float, high=None, low=None, volume=None) -> None:
+        """Adds one bar for a single ticker in O(1)."""
+        def one(value):
+            return np.array([np.nan if value is None else value], dtype=np.float64)
+        self._step(np.array([self.index[ticker]]), one(close), one(high), one(low), one(volume))
+
+    def _step(self, idx, c, h, l, v) -> None:
+        seen = self._count[idx]
+        first = seen == 0
+        prev = self._close[idx]
+
+        for span, ema in self._ema.items():
+            old = ema[idx]
+            ema[idx] = np.where(first, c, old + (2.0 / (span + 1)) * (c - old))
+
+        # Ring buffer: add the new close, drop the one leaving the window
+        pos = seen % self.sma_window
+        leaving = np.where(seen >= self.sma_window, self._sma_buf[idx, pos], 0.0)
+        self._sma_sum[idx] += c - leaving
+        self._sma_buf[idx, pos] = c
+
+        # Wilder RSI, seeded with the first change
+        delta = c - prev
+        gain = np.maximum(delta, 0.0)
+        loss = np.maximum(-delta, 0.0)
+        alpha = 1.0 / self.rsi_period
+        seed = seen == 1
+        avg_gain = self._avg_gain[idx]
+        avg_loss = self._avg_loss[idx]
+        self._avg_gain[idx] = np.where(first, np.nan, np.where(seed, gain, avg_gain + alpha * (gain - avg_gain)))
+        self._avg_loss[idx] = np.where(first, np.nan, np.where(seed, loss, avg_loss + alpha * (loss - avg_loss)))
+
+        # Wilder ATR over the true range (high - low on the first bar)
+        has_range = ~(np.isnan(h) | np.isnan(l))
+        if has_range.any():
+            r = idx[has_range]
+            hr, lr, pr = h[has_range], l[has_range], prev[has_range]
+            tr = np.fmax(hr - lr, np.fmax(np.abs(hr - pr), np.abs(lr - pr)))
+            atr = self._atr[r]
+            self._atr[r] = np.where(self._atr_count[r] == 0, tr, atr + (tr - atr) / self.atr_period)
+            self._atr_count[r] += 1
+
+        has_volume = ~np.isnan(v)
+        if has_volume.any():
+            r = idx[has_volume]
+            vr = v[has_volume]
+            vol_seen = self._vol_count[r]
+            vol_pos = vol_seen % self.vol_window
+            self._vol_sum[r] += vr - np.where(vol_seen >= self.vol_window, self._vol_buf[r, vol_pos], 0.0)
+            self._vol_buf[r, vol_pos] = vr
+            self._volume[r] = vr
+            self._vol_count[r] += 1
+
+        self._close[idx] = c
+        self._count[idx] = seen + 1
+
+    # --- Outputs ---
+    def values(self) -> dict:
+        """Latest value of every indicator as field -> array aligned with `tickers`."""
+        close = self._close
+        out = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            averages = {}
+            for span, ema in self._ema.items():
+                averages[f"ema{span}"] = np.where(self._count >= span, ema, np.nan)
+            averages[f"sma{self.sma_window}"] = np.where(
+                self._count >= self.sma_window, self._sma_sum / self.sma_window, np.nan
+            )
+            out.update(averages)
+
+            avg_gain, avg_loss = self._avg_gain, self._avg_loss
+            rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+            out[f"rsi{self.rsi_period}"] = np.where(self._count - 1 >= self.rsi_period, rsi, np.nan)
+
+            out[f"atr{self.atr_period}_pct"] = np.where(
+                self._atr_count >= self.atr_period, self._atr / close * 100.0, np.nan
+            )
+            out["vol_ratio"] = np.where(
+                self._vol_count >= self.vol_window, self._volume / (self._vol_sum / self.vol_window), np.nan
+            )
+            for name, average in averages.items():
+                out[f"dist_{name}_pct"] = (close / average - 1.0) * 100.0
+        return out
+
+    def latest(self) -> dict:
+        """ticker -> {field: float or None}."""
+        values = {name: array.tolist() for name, array in self.values().items()}
+        return {
+            ticker: {name: (None if column[i] != column[i] else column[i]) for name, column in values.items()}
+            for i, ticker in enumerate(self.tickers)
+        }
+
+
+def closes_matrix(series: dict):
+    """(tickers, right-aligned NaN-padded close matrix) from ticker -> list of closes."""
+    tickers = list(series)
+    width = max((len(closes) for closes in series.values()), default=0)
+    matrix = np.full((len(tickers), width), np.nan)
+    for i, ticker in enumerate(tickers):
+        closes = series[ticker]
+        if closes:
+            matrix[i, width - len(closes):] = closes
+    return tickers, matrix
+
+
+def fill_missing_indicators(rows: list, closes: dict, fields=CLOSE_FIELDS) -> tuple:
+    """Fills missing (None) close-based `fields` of `rows` from close histories.
+
+    `closes` maps a ticker to its daily closes, oldest first. Returns the new
+    rows (untouched rows are shared) and the set of tickers that were filled.
+    """
+    tickers, matrix = closes_matrix(closes)
+    if not tickers:
+        return rows, set()
+    computed = IndicatorEngine.from_bars(tickers, matrix).latest()
+
+    filled = set()
+    out = []
+    for row in rows:
+        values = computed.get(str(row.get("ticker") or "").strip().upper())
+        updates = {}
+        if values:
+            updates = {
+                name: values[name] for name in fields
+                if row.get(name) is None and values.get(name) is not None
+            }
+        if updates:
+            row = dict(row, **updates)
+            # Plain display strings where upstream had none (no trend badge)
+            for name, template in _FORMATS.items():
+                if name in updates and row.get(f"{name}_fmt") in (None, "", "N/A", "-"):
+                    row[f"{name}_fmt"] = template.format(updates[name])
+            filled.add(row.get("ticker"))
+        out.append(row)
+    return out, filled
+
+
+def tickers_missing_indicators(data: dict) -> set:
+    """Tickers with at least one empty indicator field in the snapshot."""
+    missing = set()
+    for section, fields in SECTION_FIELDS.items():
+        for row in data.get(section, []):
+            if any(row.get(name) is None for name in fields):
+                missing.add(str(row.get("ticker") or "").strip().upper())
+    missing.discard("")
+    return missing
+
+
+def fill_snapshot_indicators(data: dict, closes: dict) -> tuple:
+    """Returns (snapshot with empty indicator fields filled, {section: filled tickers})."""
+    filled = {}
+    data = dict(data)
+    for section, fields in SECTION_FIELDS.items():
+        data[section], filled[section] = fill_missing_indicators(data.get(section, []), closes, fields)
+    return data, filled
@@ -0,0 +1,349 @@
+"""Optional intraday price refresh for the public view.
+
+Snapshot prices are frozen at `meta.updated_at`. When a quote provider is
+configured, `QuoteRefresher` fetches prices for every ticker in one
+batched call per interval and shares them with all sessions: results are
+kept for `ttl` seconds, and concurrent requests for an expired set wait
+for the one fetch in flight instead of starting their own. Provider calls
+per interval therefore do not depend on the number of viewers.
+
+`QuoteBasis` (built once per snapshot version) and `apply_quotes` then
+re-derive only the price-dependent pieces of the render artifacts: the
+portfolio price and EMA/SMA badges, the screener's price and return (from
+the entry price implied by the snapshot's price and return), and the focus
+scan rows and deep dives (distance percentages, verdict line, playbook).
+Everything else, including the portfolio summary aggregates, is served
+from the snapshot's artifacts as is. Quoted artifacts carry a
+`quote_version`, so caches keyed on the view must include it.
+
+Providers implement `QuoteProvider.fetch`. Built in is `file`, which reads
+data/quotes.json ({"TICKER": price} or {"TICKER": {"price", "timestamp"}})
+and is meant for testing; others are named as "package.module:ClassName".
+
+Usage:
+    python live_quotes.py [provider] [ticker ...]   # fetch once and print the quotes
+"""
+import importlib
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from view_models import build_deep_dive, build_scan_row
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+QUOTES_PATH = os.path.join(DATA_DIR, "quotes.json")
+
+DEFAULT_TTL_SECONDS = 60.0
+# Quotes older than this many intervals (failed refreshes) are dropped, back to snapshot prices
+MAX_STALE_INTERVALS = 5
+# Upstream EMA/SMA badges: 🟢/🔴 beyond half an ATR from the level, 🟡/🟠 within it
+BADGE_ATR_BAND = 0.5
+LEVEL_COLUMNS = ("ema21", "ema55", "sma200")
+_FOCUS_LEVELS = {"sma200": "dist_sma200_pct", "ema55": "dist_ema55_pct", "ema21": "dist_ema21_pct"}
+
+
+# --- Providers ---
+class QuoteProvider:
+    """Source of current prices; `fetch` is called once per refresh with every ticker."""
+
+    name = "provider"
+    price_type = "Live"
+
+    def fetch(self, tickers: list) -> dict:
+        """Ticker -> {"price": float, "timestamp": str} for the tickers it has a price for."""
+        raise NotImplementedError
+
+
+class FileQuoteProvider(QuoteProvider):
+    """Quotes from a JSON file, for testing and for feeds that drop a file on disk."""
+
+    name = "file"
+    price_type = "Delayed"
+
+    def __init__(self, path: str = QUOTES_PATH):
+        self.path = path
+
+    def fetch(self, tickers: list) -> dict:
+        with open(self.path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        stamp = datetime.fromtimestamp(os.path.getmtime(self.path)).strftime("%Y-%m-%d %H:%M:%S")
+        quotes = {}
+        for ticker in tickers:
+            value = raw.get(ticker)
+            if isinstance(value, dict):
+                price, timestamp = value.get("price"), value.get("timestamp") or stamp
+            else:
+                price, timestamp = value, stamp
+            if isinstance(price, (int, float)) and math.isfinite(price) and price > 0:
+                quotes[ticker] = {"price": float(price), "timestamp": str(timestamp)}
+        return quotes
+
+
+PROVIDERS = {"file": FileQuoteProvider}
+
+
+def load_provider(spec: str) -> QuoteProvider:
+    """A provider from its name in PROVIDERS or a "package.module:ClassName" path."""
+    if spec in PROVIDERS:
+        return PROVIDERS[spec]()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown quote provider {spec!r}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# --- Refresh ---
+class QuoteSet:
+    """One refresh: ticker -> quote, with a version that changes on every successful fetch."""
+
+    __slots__ = ("version", "quotes", "fetched_at", "as_of", "price_type")
+
+    def __init__(self, version: int, quotes: dict, fetched_at: float, price_type: str):
+        self.version = version
+        self.quotes = quotes
+        self.fetched_at = fetched_at # Refresher clock
+        self.as_of = datetime.now().strftime("%H:%M:%S")
+        self.price_type = price_type
+
+
+class QuoteRefresher:
+    """Process-wide, single-flight TTL cache in front of a provider."""
+
+    def __init__(self, provider: QuoteProvider, ttl: float = DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        self.provider = provider
+        self.ttl = ttl
+        self._clock = clock
+        self._tickers = frozenset()
+        self._current = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._pending = None
+        self._stats = {"fetches": 0, "errors": 0, "hits": 0, "waits": 0, "fetch_seconds": 0.0}
+
+    def get(self, tickers) -> QuoteSet:
+        """Current quotes covering `tickers`, or None when none are fresh enough to show."""
+        tickers = frozenset(tickers)
+        while True:
+            with self._lock:
+                now = self._clock()
+                if (self._checked_at is not None and now - self._checked_at < self.ttl
+                        and tickers <= self._tickers):
+                    self._stats["hits"] += 1
+                    return self._usable(now)
+                if self._pending is None:
+                    pending = self._pending = threading.Event()
+                    # The batch covers every ticker asked for so far, so portfolios share one call
+                    batch = self._tickers | tickers
+                    break
+                pending = self._pending
+                self._stats["waits"] += 1
+            pending.wait()
+            # The fetch may have failed; don't retry it on every waiter's behalf
+            with self._lock:
+                if self._checked_at is not None and self._clock() - self._checked_at < self.ttl:
+                    return self._usable(self._clock())
+
+        try:
+            self._refresh(batch)
+        finally:
+            with self._lock:
+                self._pending = None
+                pending.set()
+        with self._lock:
+            return self._usable(self._clock())
+
+    def _refresh(self, batch: frozenset) -> None:
+        start = self._clock()
+        try:
+            quotes = self.provider.fetch(sorted(batch))
+            error = None
+        except Exception as e: # Providers are third-party code; any failure keeps the old quotes
+            quotes, error = None, e
+        with self._lock:
+            # A failure is not retried until the next interval either
+            self._checked_at = self._clock()
+            self._tickers = batch
+            if error is not None:
+                self._stats["errors"] += 1
+                logger.warning("Quote refresh from %s failed: %s", self.provider.name, error)
+                return
+            version = self._current.version + 1 if self._current else 1
+            self._current = QuoteSet(version, quotes, self._checked_at, self.provider.price_type)
+            self._stats["fetches"] += 1
+            self._stats["fetch_seconds"] += self._clock() - start
+
+    def _usable(self, now: float):
+        current = self._current
+        if current is None or now - current.fetched_at > self.ttl * MAX_STALE_INTERVALS:
+            return None
+        return current
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, tickers=len(self._tickers))
+
+
+# --- Derived fields ---
+def _level(display) -> float:
+    """Level from a badge string such as "🟢 $450.32" (NaN when absent)."""
+    if isinstance(display, (int, float)):
+        return float(display)
+    text = str(display or "")
+    at = text.find("$")
+    try:
+        return float(text[at + 1:].replace(",", "")) if at >= 0 else float(text.split()[-1])
+    except (ValueError, IndexError):
+        return math.nan
+
+
+def trend_badges(prices, levels, atr_pct) -> np.ndarray:
+    """Badge per row for price vs level, banded by ATR% like the upstream table (sign only without ATR)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distance = (prices / levels - 1) * 100 / np.where(atr_pct > 0, atr_pct, np.nan)
+    above = prices > levels
+    near = np.abs(distance) <= BADGE_ATR_BAND
+    return np.where(above, np.where(near, "🟡", "🟢"), np.where(near, "🟠", "🔴"))
+
+
+def _floats(values) -> np.ndarray:
+    return np.array([math.nan if value is None else float(value) for value in values], dtype=float)
+
+
+class QuoteBasis:
+    """Per-snapshot inputs of the price-dependent fields, parsed once from the render artifacts."""
+
+    def __init__(self, artifacts):
+        portfolio = artifacts.get("portfolio") or {}
+        self.rows = {}
+        for i, ticker in enumerate(portfolio.get("ticker_raw") or []):
+            self.rows.setdefault(ticker, []).append(i)
+        self.levels = {
+            name: np.array([_level(value) for value in portfolio[name]], dtype=float)
+            for name in LEVEL_COLUMNS if name in portfolio
+        }
+        self.atr_pct = _floats(portfolio.get("atr14_pct") or [])
+        screener = artifacts.get("screener") or {}
+        self.snapshot_prices = _floats(screener.get("price") or [])
+        self.returns = _floats(screener.get("return_pct") or [])
+        self.focus_items = list(artifacts.get("focus_items") or [])
+        self.tickers = set(self.rows) | {item["ticker"] for item in self.focus_items if item.get("ticker")}
+
+
+def _quoted_focus_item(item: dict, quote: dict, price_type: str) -> dict:
+    item = dict(item, latest_price=quote["price"], price_type=price_type, price_timestamp=quote["timestamp"])
+    for level_key, dist_key in _FOCUS_LEVELS.items():
+        level = item.get(level_key)
+        if isinstance(level, (int, float)) and level > 0:
+            item[dist_key] = (quote["price"] / level - 1) * 100
+    return item
+
+
+def apply_quotes(artifacts, basis: QuoteBasis, quote_set: QuoteSet):
+    """Artifacts with quoted prices and their derived fields; unquoted tickers keep snapshot values."""
+    quotes = quote_set.quotes
+    overrides = {
+        "meta": dict(artifacts["meta"], quotes_as_of=quote_set.as_of),
+        "quote_version": quote_set.version
+    }
+
+    portfolio = artifacts.get("portfolio")
+    quoted_rows = [(i, quotes[ticker]["price"]) for ticker, rows in basis.rows.items()
+                   if ticker in quotes for i in rows]
+    if portfolio and quoted_rows:
+        index = np.array([i for i, _ in quoted_rows])
+        prices = np.array([price for _, price in quoted_rows])
+        columns = dict(portfolio)
+        price_column = list(portfolio["price"])
+        for i, price in quoted_rows:
+            price_column[i] = price
+        columns["price"] = price_column
+        for name, levels in basis.levels.items():
+            values = list(portfolio[name])
+            quoted_levels = levels[index]
+            badges = trend_badges(prices, quoted_levels, basis.atr_pct[index])
+            for i, level, badge in zip(index.tolist(), quoted_levels.tolist(), badges.tolist()):
+                if not math.isnan(level):
+                    values[i] = f"{badge} ${level:.2f}"
+            columns[name] = values
+        overrides["portfolio"] = columns
+
+        screener = artifacts.get("screener")
+        if screener and len(basis.returns) == len(price_column):
+            # Entry price = snapshot price / (1 + return); the return moves with the quote
+            with np.errstate(divide="ignore", invalid="ignore"):
+                growth = prices / basis.snapshot_prices[index] * (1 + basis.returns[index] / 100)
+            returns = list(screener["return_pct"])
+            screen_prices = list(screener["price"])
+            for i, price, value in zip(index.tolist(), prices.tolist(), ((growth - 1) * 100).tolist()):
+                screen_prices[i] = price
+                if math.isfinite(value):
+                    returns[i] = value
+            overrides["screener"] = dict(screener, price=screen_prices, return_pct=returns)
+
+    if basis.focus_items and any(item.get("ticker") in quotes for item in basis.focus_items):
+        scan_rows = list(artifacts["scan_rows"])
+        deep_dive = dict(artifacts["deep_dive"])
+        done = set()
+        for position, item in enumerate(basis.focus_items):
+            ticker = item.get("ticker")
+            if ticker not in quotes:
+                continue
+            item = _quoted_focus_item(item, quotes[ticker], quote_set.price_type)
+            scan_rows[position] = build_scan_row(item)
+            if ticker not in done:
+                deep_dive[ticker] = build_deep_dive(item)
+                done.add(ticker)
+        overrides["scan_rows"] = scan_rows
+        overrides["deep_dive"] = deep_dive
+    return QuotedArtifacts(artifacts, overrides)
+
+
+class QuotedArtifacts:
+    """Read-only view of render artifacts with some entries replaced (the base stays untouched)."""
+
+    def __init__(self, base, overrides: dict):
+        self._base = base
+        self._overrides = overrides
+
+    def __contains__(self, name):
+        return name in self._overrides or name in self._base
+
+    def __getitem__(self, name):
+        if name in self._overrides:
+            return self._overrides[name]
+        return self._base[name]
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def keys(self):
+        return list(dict.fromkeys([*self._base.keys(), *self._overrides]))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1].startswith("-"):
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    provider = load_provider(sys.argv[1] if len(sys.argv) > 1 else "file")
+    tickers = sys.argv[2:]
+    if not tickers:
+        with open(os.path.join(DATA_DIR, "snapshot.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        tickers = sorted({row["ticker"] for section in ("table_view_model", "focus_view_model")
+                          for row in data.get(section, []) if row.get("ticker")})
+    start = time.perf_counter()
+    quotes = provider.fetch(tickers)
+    print(f"{len(quotes)} of {len(tickers)} tickers quoted by {provider.name} "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for ticker, quote in sorted(quotes.items()):
+        print(f"{ticker:<8} {quote['price']:>10.2f}  {quote['timestamp']}")
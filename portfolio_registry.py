@@ -0,0 +1,204 @@
+"""Several portfolios (or strategies) served by one deployment.
+
+Portfolios are listed in data/portfolios.json:
+
+    {"growth": {"label": "Growth Strategy", "snapshot": "portfolios/growth/snapshot.json"}}
+
+Snapshot paths are relative to the data directory. The default portfolio
+(`DEFAULT_PORTFOLIO`, data/snapshot.json) is always present and keeps the
+app's own pipeline (delta patching, history, alerts); the
+registry serves the others.
+
+`PortfolioRegistry` loads a portfolio's snapshot on first request and
+keeps its render artifacts in an LRU bounded by their estimated size in
+bytes, so a few large portfolios and many small ones share one memory
+budget. A snapshot file is only re-read when its size or mtime changes,
+each portfolio is loaded at most once at a time, and a snapshot that fails
+validation keeps the previously loaded version online.
+
+Usage:
+    python portfolio_registry.py    # list portfolios with their load time and size
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from render_cache import snapshot_hash
+from snapshot_schema import validate_snapshot
+from view_models import build_render_artifacts
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "snapshot.json")
+PORTFOLIOS_PATH = os.path.join(DATA_DIR, "portfolios.json")
+
+DEFAULT_PORTFOLIO = "main"
+DEFAULT_LABEL = "Alpha Picks"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Containers longer than this are sized from an evenly spaced sample of their items
+_SIZE_SAMPLE = 256
+
+
+def load_portfolio_specs(config_path: str = PORTFOLIOS_PATH, data_dir: str = DATA_DIR) -> dict:
+    """Portfolio id -> {"label", "snapshot"}, the default portfolio first; a missing file lists only it."""
+    specs = {DEFAULT_PORTFOLIO: {"label": DEFAULT_LABEL, "snapshot": os.path.join(data_dir, "snapshot.json")}}
+    if not config_path or not os.path.exists(config_path):
+        return specs
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{config_path}: expected an object of portfolios")
+    for portfolio_id, spec in config.items():
+        if portfolio_id == DEFAULT_PORTFOLIO or not isinstance(spec, dict) or not spec.get("snapshot"):
+            raise ValueError(f"{config_path}: invalid portfolio {portfolio_id!r}")
+        specs[portfolio_id] = {
+            "label": spec.get("label") or portfolio_id,
+            "snapshot": os.path.join(data_dir, spec["snapshot"])
+        }
+    return specs
+
+
+def estimate_size(obj) -> int:
+    """Approximate deep size in bytes of JSON-like data (dicts, lists, scalars).
+
+    Long lists and dicts are extrapolated from a sample of their items, so
+    sizing a 100k-row table costs about as much as sizing a few hundred rows.
+    Shared objects (interned strings, small ints) are counted each time.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        sample = items if len(items) <= _SIZE_SAMPLE else items[::len(items) // _SIZE_SAMPLE]
+        nested = sum(estimate_size(k) + estimate_size(v) for k, v in sample)
+    elif isinstance(obj, (list, tuple)):
+        sample = obj if len(obj) <= _SIZE_SAMPLE else obj[::len(obj) // _SIZE_SAMPLE]
+        nested = sum(estimate_size(v) for v in sample)
+        items = obj
+    else:
+        return size
+    return size + (nested * len(items) // len(sample) if sample else 0)
+
+
+def build_portfolio_artifacts(snapshot_path: str, raw: bytes, digest: str) -> dict:
+    """Render artifacts of one portfolio snapshot."""
+    data = json.loads(raw)
+    artifacts = build_render_artifacts(validate_snapshot(data) if data else data)
+    artifacts["snapshot_hash"] = digest
+    return artifacts
+
+
+class PortfolioRegistry:
+    """On-demand portfolio artifacts in an LRU bounded by total estimated bytes."""
+
+    def __init__(self, specs: dict, max_bytes: int = DEFAULT_MAX_BYTES, builder=build_portfolio_artifacts):
+        self.specs = specs
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._builder = builder
+        self._entries = OrderedDict() # id -> (stat key, artifacts, size)
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._stats = {portfolio_id: {"loads": 0, "hits": 0, "evictions": 0, "load_seconds": 0.0}
+                       for portfolio_id in specs}
+
+    def __contains__(self, portfolio_id):
+        return portfolio_id in self.specs
+
+    def __len__(self):
+        return len(self._entries)
+
+    def labels(self) -> dict:
+        return {portfolio_id: spec["label"] for portfolio_id, spec in self.specs.items()}
+
+    def get(self, portfolio_id: str):
+        """Artifacts of a portfolio's current snapshot, or None if it never loaded.
+
+        Raises KeyError for a portfolio that is not registered.
+        """
+        path = self.specs[portfolio_id]["snapshot"]
+        try:
+            stat = os.stat(path)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = None
+        while True:
+            with self._lock:
+                entry = self._entries.get(portfolio_id)
+                if entry is not None and (key is None or entry[0] == key):
+                    self._entries.move_to_end(portfolio_id)
+                    self._stats[portfolio_id]["hits"] += 1
+                    return entry[1]
+                if key is None:
+                    return None
+                pending = self._loading.get(portfolio_id)
+                if pending is None:
+                    pending = self._loading[portfolio_id] = threading.Event()
+                    break
+            pending.wait()
+
+        try:
+            return self._load(portfolio_id, path, key)
+        finally:
+            with self._lock:
+                self._loading.pop(portfolio_id).set()
+
+    def _load(self, portfolio_id: str, path: str, key: tuple):
+        start = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            artifacts = self._builder(path, raw, snapshot_hash(raw))
+        except (OSError, ValueError) as e:
+            logger.warning("Keeping the previous %s snapshot: %s", portfolio_id, e)
+            with self._lock:
+                entry = self._entries.get(portfolio_id)
+                return entry[1] if entry else None
+        size = estimate_size(artifacts)
+        with self._lock:
+            old = self._entries.pop(portfolio_id, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[portfolio_id] = (key, artifacts, size)
+            self.size += size
+            stats = self._stats[portfolio_id]
+            stats["loads"] += 1
+            stats["load_seconds"] += time.perf_counter() - start
+            self._evict()
+        return artifacts
+
+    def _evict(self) -> None:
+        # The newest entry always stays, even if it alone exceeds the budget
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            portfolio_id, (_, _, size) = self._entries.popitem(last=False)
+            self.size -= size
+            self._stats[portfolio_id]["evictions"] += 1
+
+    def stats(self) -> list:
+        """Per-portfolio rows: id, resident bytes (0 when evicted), loads, hits, evictions, load time."""
+        with self._lock:
+            return [
+                {
+                    "portfolio": portfolio_id,
+                    "resident_bytes": self._entries[portfolio_id][2] if portfolio_id in self._entries else 0,
+                    **stats
+                }
+                for portfolio_id, stats in self._stats.items()
+            ]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    registry = PortfolioRegistry(load_portfolio_specs())
+    for portfolio_id, label in registry.labels().items():
+        registry.get(portfolio_id)
+    for row in registry.stats():
+        print(f"{row['portfolio']:<16} {registry.specs[row['portfolio']]['label']:<24} "
+              f"{row['resident_bytes'] / 1024:>10.0f} KB {row['load_seconds'] * 1000:>8.1f} ms")
@@ -0,0 +1,246 @@
+"""Read-only JSON API for the public (masked) view model.
+
+Serves what the Streamlit page shows without a websocket session or a
+script run per client:
+
+    GET /api/v1/snapshot    everything below in one document
+    GET /api/v1/focus       focus scan rows and message
+    GET /api/v1/portfolio   portfolio rows and summary aggregates
+    GET /api/v1/summary     weekly radar text
+    GET /api/v1/version     snapshot time and hash (cheap polling)
+
+Responses are rendered and gzip-compressed once per snapshot version and
+served from memory. ETags are strong and derived from the body's SHA-256
+(one per encoding), so If-None-Match is answered with 304 without touching
+the body, and two different bodies never share a validator. The render
+cache built by the app is reused when present.
+
+Usage:
+    python public_api.py [port] [host]
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from render_cache import open_cached_artifacts, snapshot_hash
+from snapshot_delta import build_snapshot_artifacts
+from view_models import artifact_key
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "snapshot.json")
+RENDER_CACHE_DIR = os.path.join(DATA_DIR, "render_cache")
+HISTORY_DB_PATH = os.path.join(DATA_DIR, "history.sqlite")
+
+DEFAULT_PORT = 8502
+API_PREFIX = "/api/v1/"
+CACHE_CONTROL = "public, max-age=60, must-revalidate"
+# Below this size gzip costs more than it saves
+MIN_GZIP_BYTES = 512
+
+
+# --- Payloads ---
+def build_api_payloads(artifacts, digest: str) -> dict:
+    """Endpoint name -> JSON-ready document, from render artifacts (masked fields only)."""
+    meta = artifacts["meta"]
+    version = {"as_of": meta["updated_at"], "snapshot": digest}
+
+    portfolio = artifacts.get("portfolio") or {}
+    columns = [name for name in portfolio if name != "ticker_raw"]
+    rows = [dict(zip(columns, values)) for values in zip(*(portfolio[name] for name in columns))]
+
+    focus = {"message": meta["focus_message"], "scan": artifacts.get("scan_rows") or []}
+    holdings = {"rows": rows, "summary": artifacts.get("portfolio_summary")}
+    summary = {"summary_text": artifacts.get("summary_text") or ""}
+    return {
+        "version": version,
+        "focus": {**version, **focus},
+        "portfolio": {**version, **holdings},
+        "summary": {**version, **summary},
+        "snapshot": {**version, "focus": focus, "portfolio": holdings, **summary},
+    }
+
+
+class PreparedResponse:
+    """One endpoint's body, pre-encoded as identity and gzip, with a strong ETag per encoding."""
+
+    __slots__ = ("body", "gzip_body", "etag", "gzip_etag")
+
+    def __init__(self, document):
+        self.body = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, 9, mtime=0) if len(self.body) >= MIN_GZIP_BYTES else None
+        tag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{tag}"'
+        self.gzip_etag = f'"{tag}.gz"'
+
+
+def prepare_responses(artifacts, digest: str) -> dict:
+    return {name: PreparedResponse(document) for name, document in build_api_payloads(artifacts, digest).items()}
+
+
+class SnapshotResponses:
+    """Prepared responses for the current snapshot, rebuilt when snapshot.json changes.
+
+    The file is only re-hashed when its size or mtime changes. A snapshot
+    that fails validation keeps the previous version online.
+    """
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH, cache_dir: str = RENDER_CACHE_DIR):
+        self.snapshot_path = snapshot_path
+        self.cache_dir = cache_dir
+        self._stat = None
+        self._responses = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Endpoint name -> PreparedResponse, or None if no snapshot was ever servable."""
+        try:
+            stat = os.stat(self.snapshot_path)
+            key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return self._responses
+        if key == self._stat:
+            return self._responses
+        with self._lock:
+            if key != self._stat:
+                self._reload(key)
+        return self._responses
+
+    def _reload(self, key) -> None:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                raw = f.read()
+            digest = snapshot_hash(raw)
+            artifacts = open_cached_artifacts(self.cache_dir, artifact_key(digest))
+            if artifacts is None:
+                # Not rendered by the app yet: build in memory the same way, leave the shared cache to the app
+                artifacts = build_snapshot_artifacts(json.loads(raw), digest, HISTORY_DB_PATH)
+            if artifacts.get("available"):
+                self._responses = prepare_responses(artifacts, digest)
+        except (OSError, ValueError) as e:
+            logger.warning("Keeping the previous API snapshot: %s", e)
+        self._stat = key
+
+
+# --- HTTP ---
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _accepts_gzip(header: str) -> bool:
+    """Whether Accept-Encoding gives gzip (or x-gzip, or `*` without either) a q-value above 0."""
+    if not header:
+        return False
+    weights = {}
+    for part in header.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0 # Malformed weight: don't guess
+        coding = coding.lower()
+        if coding:
+            weights[coding] = max(q, weights.get(coding, 0.0))
+    for coding in ("gzip", "x-gzip"):
+        if coding in weights:
+            return weights[coding] > 0
+    return weights.get("*", 0.0) > 0
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "APPublicAPI/1"
+    # Headers and body are separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    responses_source = None # Set by make_server
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        name = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else None
+        responses = self.responses_source.current()
+        if responses is None:
+            return self._error(503, "snapshot unavailable", send_body)
+        response = responses.get(name)
+        if response is None:
+            return self._error(404, "not found", send_body)
+
+        use_gzip = response.gzip_body is not None and _accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = response.gzip_etag if use_gzip else response.etag
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self._common_headers(etag)
+            self.end_headers()
+            return
+
+        body = response.gzip_body if use_gzip else response.body
+        self.send_response(200)
+        self._common_headers(etag)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _common_headers(self, etag: str):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def _error(self, status: int, message: str, send_body: bool):
+        body = json.dumps({"error": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host: str = "0.0.0.0", port: int = DEFAULT_PORT, responses: SnapshotResponses = None):
+    """HTTP server for the API; call serve_forever() on it."""
+    handler = type("BoundApiHandler", (ApiHandler,), {"responses_source": responses or SnapshotResponses()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    api = make_server(
+        host=sys.argv[2] if len(sys.argv) > 2 else "0.0.0.0",
+        port=int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    )
+    logger.info("Serving %s* on port %d", API_PREFIX, api.server_address[1])
+    api.serve_forever()
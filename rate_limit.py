@@ -0,0 +1,77 @@
+"""In-process token-bucket rate limiting for backend writes.
+
+`RateLimiter.allow(client)` checks a per-client bucket, then a global one,
+under one lock and without any I/O, so a rejection costs about a
+microsecond and never reaches the backend. Buckets refill lazily from the
+elapsed time; per-client buckets live in an LRU bounded by `max_clients`,
+so a flood of distinct ids costs bounded memory (and is still capped by
+the global bucket).
+
+Limits are per process: with several replicas, each enforces its own.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_CLIENTS = 10_000
+
+
+class TokenBucket:
+    """`capacity` tokens, refilled at `rate` per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float, n: float = 1.0) -> bool:
+        tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens < n:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - n
+        return True
+
+
+class RateLimiter:
+    """Per-client and global token buckets; a request needs a token from both."""
+
+    def __init__(self, client_rate: float, client_burst: float, global_rate: float, global_burst: float,
+                 max_clients: int = DEFAULT_MAX_CLIENTS, clock=time.monotonic):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_burst, clock())
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"allowed": 0, "rejected_client": 0, "rejected_global": 0}
+
+    def allow(self, client: str) -> bool:
+        with self._lock:
+            now = self._clock()
+            bucket = self._clients.get(client)
+            if bucket is None:
+                bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst, now)
+                if len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(client)
+            if not bucket.take(now):
+                self._stats["rejected_client"] += 1
+                return False
+            if not self._global.take(now):
+                bucket.tokens += 1 # Not the client's fault; give the token back
+                self._stats["rejected_global"] += 1
+                return False
+            self._stats["allowed"] += 1
+            return True
+
+    def stats(self) -> dict:
+        """Decision counts since start, plus the number of clients tracked."""
+        with self._lock:
+            return dict(self._stats, clients=len(self._clients))
@@ -0,0 +1,239 @@
+"""Content-addressed, cross-process disk cache for render artifacts.
+
+Several Streamlit replicas can share one cache directory. Artifacts for a
+snapshot are stored under its SHA-256 in a small binary container:
+
+    MAGIC | index length (u64) | JSON index {name: [offset, length]} | blobs
+
+Readers memory-map the file and only decode the artifacts they touch. The
+first process to see a new snapshot takes a lock file and builds it; the
+others wait for the finished file instead of building it again.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+MAGIC = b"APRC0001"
+_HEADER = struct.Struct("<8sQ")
+
+DEFAULT_KEEP_VERSIONS = 3
+LOCK_STALE_SECONDS = 30.0
+LOCK_POLL_SECONDS = 0.05
+_MAX_OPEN = 4
+
+# Recently opened files, so repeat opens reuse the mapping. Entries dropped from here are
+# not closed: sessions may still hold them, and each mapping is released with its last reference.
+_open_files = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def snapshot_hash(raw: bytes) -> str:
+    """Content address of a snapshot (hex SHA-256 of the file bytes)."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def snapshot_file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Same digest as `snapshot_hash`, computed in chunks without loading the whole file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderArtifacts:
+    """Read-only, memory-mapped view of one cache file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a render cache file: {path}")
+        start = _HEADER.size
+        self._index = json.loads(self._mm[start:start + index_len])
+        self._base = start + index_len
+        self._decoded = {}
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name):
+        if name not in self._decoded:
+            offset, length = self._index[name]
+            begin = self._base + offset
+            self._decoded[name] = json.loads(self._mm[begin:begin + length])
+        return self._decoded[name]
+
+    def get(self, name, default=None):
+        return self[name] if name in self._index else default
+
+    def keys(self):
+        return self._index.keys()
+
+    def close(self):
+        self._mm.close()
+
+
+def write_artifacts(path: str, artifacts: dict) -> None:
+    """Atomically writes artifacts to `path` in the cache container format."""
+    blobs = []
+    index = {}
+    offset = 0
+    for name, value in artifacts.items():
+        blob = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        index[name] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def _try_lock(lock_path: str) -> bool:
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    return True
+
+
+def _unlock(lock_path: str) -> None:
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+
+
+def _lock_is_stale(lock_path: str) -> bool:
+    try:
+        return time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS
+    except OSError:
+        return False
+
+
+def _open(path: str) -> RenderArtifacts:
+    with _open_lock:
+        if path in _open_files:
+            _open_files.move_to_end(path)
+            return _open_files[path]
+    artifacts = RenderArtifacts(path)
+    with _open_lock:
+        # Another thread may have opened it meanwhile; keep one mapping per path
+        artifacts = _open_files.setdefault(path, artifacts)
+        _open_files.move_to_end(path)
+        while len(_open_files) > _MAX_OPEN:
+            _open_files.popitem(last=False)
+    return artifacts
+
+
+def open_cached_artifacts(cache_dir: str, digest: str):
+    """Artifacts for `digest` if another process already built them, else None."""
+    path = os.path.join(cache_dir, f"{digest}.bin")
+    if not os.path.exists(path):
+        return None
+    try:
+        return _open(path)
+    except (OSError, ValueError):
+        return None
+
+
+def latest_cached_artifacts(cache_dir: str):
+    """Most recently written artifacts in the cache, or None."""
+    try:
+        entries = [
+            os.path.join(cache_dir, name)
+            for name in os.listdir(cache_dir)
+            if name.endswith(".bin")
+        ]
+    except OSError:
+        return None
+    for path in sorted(entries, key=os.path.getmtime, reverse=True):
+        try:
+            return _open(path)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def evict_old_versions(cache_dir: str, keep: int = DEFAULT_KEEP_VERSIONS) -> list:
+    """Deletes all but the `keep` most recently written cache files."""
+    try:
+        entries = [
+            os.path.join(cache_dir, name)
+            for name in os.listdir(cache_dir)
+            if name.endswith(".bin")
+        ]
+    except OSError:
+        return []
+
+    entries.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    removed = []
+    for path in entries[keep:]:
+        with _open_lock:
+            _open_files.pop(path, None)
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass # Still mapped elsewhere (Windows) - next eviction retries
+    return removed
+
+
+def get_render_artifacts(cache_dir: str, digest: str, builder, keep: int = DEFAULT_KEEP_VERSIONS):
+    """Returns the artifacts for `digest`, building them at most once across processes.
+
+    `builder` is a zero-argument callable returning the artifacts dict; it only
+    runs in the process that wins the build lock. If the cache directory is
+    unusable the artifacts are built in-process and returned as a plain dict.
+    """
+    path = os.path.join(cache_dir, f"{digest}.bin")
+    lock_path = os.path.join(cache_dir, f"{digest}.lock")
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return builder()
+
+    while True:
+        if os.path.exists(path):
+            try:
+                return _open(path)
+            except (OSError, ValueError):
+                _unlock(lock_path) # Corrupt file: rebuild below
+                try:
+                    os.remove(path)
+                except OSError:
+                    return builder()
+
+        if _try_lock(lock_path):
+            try:
+                # Another process may have finished between our check and the lock
+                if not os.path.exists(path):
+                    write_artifacts(path, builder())
+                    evict_old_versions(cache_dir, keep=keep)
+            except OSError:
+                return builder()
+            finally:
+                _unlock(lock_path)
+            continue
+
+        if _lock_is_stale(lock_path):
+            _unlock(lock_path)
+            continue
+        time.sleep(LOCK_POLL_SECONDS)
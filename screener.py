@@ -0,0 +1,457 @@
+"""Portfolio screener: a small condition language over indexed columns.
+
+    rsi14 < 30 and price < sma200 and dte between 0 and 7 and momentum_grade >= B
+
+Conditions combine with `and` / `or` / `not` and parentheses. A comparison
+is `field op value` (op: < <= > >= = == !=), `field op field`, or
+`field between low and high`. Grades compare by rank (A+ best, F worst)
+and quant ratings from Strong Sell to Strong Buy; sector takes a quoted
+string, in which a backslash escapes the next character (`quote_text`
+builds one).
+
+`compile_screen` parses an expression once into an evaluator. It runs
+against a `ScreenerIndex` built once per snapshot. The index keeps
+lazily sorted copies of every numeric column, so a `field op value`
+condition is two binary searches plus the k matching rows. A
+`field op field` condition needs one vectorized pass.
+"""
+import bisect
+import operator
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Screener field -> snapshot column
+NUMERIC_FIELDS = {
+    "price": "last_price",
+    "day_pct": "Day%",
+    "return_pct": "return_pct",
+    "quant_score": "quant_score",
+    "hold_streak_days": "hold_streak_days",
+    "hold_countdown": "hold_countdown",
+    "dte": "dte",
+    "ema21": "ema21",
+    "ema55": "ema55",
+    "sma200": "sma200",
+    "rsi14": "rsi14",
+    "atr14_pct": "atr14_pct",
+    "vol_ratio": "vol_ratio",
+}
+GRADE_FIELDS = ("value_grade", "growth_grade", "profitability_grade", "momentum_grade", "eps_revisions_grade")
+RATING_FIELDS = ("quant_rating",)
+TEXT_FIELDS = {"sector": "company_name"}
+
+ALIASES = {
+    "last_price": "price",
+    "hold": "hold_streak_days",
+    "rsi": "rsi14",
+    "atr": "atr14_pct",
+    "vol": "vol_ratio",
+    "quant": "quant_score",
+    "return": "return_pct",
+    "value": "value_grade",
+    "growth": "growth_grade",
+    "profitability": "profitability_grade",
+    "momentum": "momentum_grade",
+    "revisions": "eps_revisions_grade",
+    "rating": "quant_rating",
+}
+
+GRADE_RANKS = {g: i for i, g in enumerate(reversed(
+    ["A+", "A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D+", "D", "D-", "F"]
+))}
+RATING_RANKS = {"STRONG SELL": 0, "SELL": 1, "HOLD": 2, "BUY": 3, "STRONG BUY": 4}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>[-+]?(?:\d+\.?\d*|\.\d+))(?![A-Za-z_])
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op><=|>=|==|!=|<|>|=)
+      | (?P<paren>[()])
+      | (?P<word>[A-Za-z_][A-Za-z0-9_%]*[+-]?)
+    )""", re.VERBOSE)
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+
+class ScreenSyntaxError(ValueError):
+    """Raised for screen expressions that cannot be parsed."""
+
+
+# --- Columns & index ---
+def _grade_rank(value):
+    if value is None:
+        return np.nan
+    parts = str(value).split()
+    return GRADE_RANKS.get(parts[-1].upper(), np.nan) if parts else np.nan
+
+
+def _rating_rank(value):
+    return RATING_RANKS.get(str(value or "").strip().upper(), np.nan)
+
+
+def field_value(field: str, row: dict):
+    """Screener value (number, rank or lowercased text) of `field` in one snapshot row, or None."""
+    if field in NUMERIC_FIELDS:
+        value = row.get(NUMERIC_FIELDS[field])
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            return value
+        return None
+    if field in GRADE_FIELDS or field in RATING_FIELDS:
+        rank = _grade_rank(row.get(field)) if field in GRADE_FIELDS else _rating_rank(row.get(field))
+        return None if rank != rank else rank
+    value = row.get(TEXT_FIELDS[field])
+    return None if value is None else str(value).lower()
+
+
+def build_screener_columns(raw_table) -> dict:
+    """Screenable columns (numbers and ranks) aligned with the portfolio rows.
+
+    `raw_table` may be a list of row dicts or a column -> values mapping.
+    """
+    if isinstance(raw_table, dict):
+        n = max((len(values) for values in raw_table.values()), default=0)
+        def column(name):
+            return raw_table.get(name) or [None] * n
+    else:
+        def column(name):
+            return [row.get(name) for row in raw_table]
+
+    def numbers(values):
+        return [v if isinstance(v, (int, float)) and not isinstance(v, bool) and v == v else None for v in values]
+
+    columns = {field: numbers(column(source)) for field, source in NUMERIC_FIELDS.items()}
+    for field in GRADE_FIELDS:
+        columns[field] = [None if r != r else r for r in map(_grade_rank, column(field))]
+    for field in RATING_FIELDS:
+        columns[field] = [None if r != r else r for r in map(_rating_rank, column(field))]
+    for field, source in TEXT_FIELDS.items():
+        columns[field] = [None if v is None else str(v) for v in column(source)]
+    return columns
+
+
+class ScreenerIndex:
+    """Per-snapshot index over the screener columns and the ticker column."""
+
+    def __init__(self, columns: dict, tickers: list):
+        self.size = len(tickers)
+        self.all = np.arange(self.size)
+        self._numeric = {
+            field: np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            for field, values in columns.items() if field not in TEXT_FIELDS
+        }
+        self._text = {
+            field: [None if v is None else v.lower() for v in columns[field]]
+            for field in TEXT_FIELDS if field in columns
+        }
+        self._sorted = {}
+
+        keys = [str(t or "").strip().upper() for t in tickers]
+        self._ticker_order = sorted(range(self.size), key=keys.__getitem__)
+        self._ticker_keys = [keys[i] for i in self._ticker_order]
+        self._ticker_rank = np.empty(self.size, dtype=np.int64)
+        self._ticker_rank[self._ticker_order] = np.arange(self.size)
+
+    def column(self, field: str) -> np.ndarray:
+        return self._numeric[field]
+
+    def _sorted_column(self, field: str):
+        """(sorted non-NaN values, their row ids), built on first use."""
+        if field not in self._sorted:
+            values = self._numeric[field]
+            rows = np.flatnonzero(~np.isnan(values))
+            order = rows[np.argsort(values[rows], kind="stable")]
+            self._sorted[field] = (values[order], order)
+        return self._sorted[field]
+
+    def range(self, field: str, low=None, high=None, low_inclusive=True, high_inclusive=True) -> np.ndarray:
+        """Row ids (ascending) with low <(=) value <(=) high, via binary search."""
+        values, order = self._sorted_column(field)
+        start = 0 if low is None else np.searchsorted(values, low, side="left" if low_inclusive else "right")
+        stop = len(values) if high is None else np.searchsorted(values, high, side="right" if high_inclusive else "left")
+        return np.sort(order[start:stop]) if stop > start else np.empty(0, dtype=np.int64)
+
+    def not_equal(self, field: str, value) -> np.ndarray:
+        _, order = self._sorted_column(field)
+        return np.setdiff1d(np.sort(order), self.range(field, value, value), assume_unique=True)
+
+    def text_equal(self, field: str, value: str, negate: bool = False) -> np.ndarray:
+        target = value.lower()
+        return np.array(
+            [i for i, v in enumerate(self._text[field]) if v is not None and (v == target) != negate],
+            dtype=np.int64
+        )
+
+    def ticker_prefix(self, prefix: str) -> np.ndarray:
+        """Row ids (ascending) whose raw ticker starts with `prefix`.
+
+        A `*` wildcard may close the prefix ("AB*"); anything from it on is ignored.
+        """
+        prefix = prefix.split("*", 1)[0].strip().upper()
+        if not prefix:
+            return self.all
+        start = bisect.bisect_left(self._ticker_keys, prefix)
+        stop = bisect.bisect_left(self._ticker_keys, prefix + "\uffff")
+        return np.sort(np.array(self._ticker_order[start:stop], dtype=np.int64))
+
+    def sort(self, ids: np.ndarray, field: str = None, descending: bool = False) -> np.ndarray:
+        """Orders `ids` by `field` (None = ticker); rows missing the value go last."""
+        if field is None:
+            order = np.argsort(self._ticker_rank[ids], kind="stable")
+            return ids[order[::-1] if descending else order]
+        if len(ids) == self.size:
+            # Unfiltered: the prebuilt index already has the order
+            _, order = self._sorted_column(field)
+            missing = np.setdiff1d(self.all, order, assume_unique=True)
+            return np.concatenate([order[::-1] if descending else order, missing])
+        keys = self._numeric[field][ids]
+        present = ~np.isnan(keys)
+        order = np.argsort(-keys[present] if descending else keys[present], kind="stable")
+        return np.concatenate([ids[present][order], ids[~present]])
+
+
+# --- Parser ---
+def quote_text(value: str) -> str:
+    """`value` as a screen string literal, e.g. for `sector = <literal>`."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _tokenize(text: str) -> list:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ScreenSyntaxError(f"Unexpected input at: {text[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def _field_name(word: str):
+    name = word.lower()
+    name = ALIASES.get(name, name)
+    if name in NUMERIC_FIELDS or name in GRADE_FIELDS or name in RATING_FIELDS or name in TEXT_FIELDS:
+        return name
+    return None
+
+
+class _Parser:
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ScreenSyntaxError("Unexpected end of screen")
+        self.pos += 1
+        return token
+
+    def keyword(self, word: str) -> bool:
+        kind, value = self.peek()
+        if kind == "word" and value.lower() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def expr(self):
+        node = self.term()
+        while self.keyword("or"):
+            node = ("or", node, self.term())
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.keyword("and"):
+            node = ("and", node, self.factor())
+        return node
+
+    def factor(self):
+        if self.keyword("not"):
+            return ("not", self.factor())
+        if self.peek() == ("paren", "("):
+            self.take()
+            node = self.expr()
+            if self.take() != ("paren", ")"):
+                raise ScreenSyntaxError("Missing ')'")
+            return node
+        return self.comparison()
+
+    def comparison(self):
+        kind, word = self.take()
+        field = _field_name(word) if kind == "word" else None
+        if field is None:
+            raise ScreenSyntaxError(f"Unknown field: {word}")
+        if self.keyword("between"):
+            low = self.literal(field)
+            if not self.keyword("and"):
+                raise ScreenSyntaxError(f"Expected 'and' in '{word} between ...'")
+            high = self.literal(field)
+            return ("between", field, low, high)
+        kind, op = self.take()
+        if kind != "op":
+            raise ScreenSyntaxError(f"Expected a comparison after {word}")
+        op = "==" if op == "=" else op
+        next_kind, next_value = self.peek()
+        if next_kind == "word" and field in NUMERIC_FIELDS and _field_name(next_value) in NUMERIC_FIELDS:
+            self.take()
+            return ("fields", field, op, _field_name(next_value))
+        return ("compare", field, op, self.literal(field))
+
+    def literal(self, field: str):
+        kind, value = self.take()
+        if field in TEXT_FIELDS:
+            if kind == "string":
+                return _ESCAPE_RE.sub(r"\1", value[1:-1])
+            if kind == "word":
+                return value
+        elif field in GRADE_FIELDS:
+            rank = GRADE_RANKS.get(value.strip("'\"").upper())
+            if rank is not None:
+                return rank
+        elif field in RATING_FIELDS:
+            if kind == "word" and value.upper() == "STRONG" and self.peek()[0] == "word":
+                value = f"{value} {self.take()[1]}"
+            rank = RATING_RANKS.get(value.strip("'\"").upper())
+            if rank is not None:
+                return rank
+        elif kind == "number":
+            return float(value)
+        raise ScreenSyntaxError(f"Invalid value for {field}: {value}")
+
+
+def _tree_fields(node) -> set:
+    kind = node[0]
+    if kind in ("and", "or"):
+        return _tree_fields(node[1]) | _tree_fields(node[2])
+    if kind == "not":
+        return _tree_fields(node[1])
+    if kind == "fields":
+        return {node[1], node[3]}
+    return {node[1]}
+
+
+class Screen:
+    """A compiled screen expression.
+
+    `evaluate` runs it against a ScreenerIndex; `matches(values)` checks
+    one row given its values as field -> `field_value`.
+    """
+
+    def __init__(self, text: str, tree):
+        self.text = text
+        self.tree = tree
+        self.fields = frozenset(_tree_fields(tree))
+        self.matches = _row_predicate(tree)
+
+    def evaluate(self, index: ScreenerIndex) -> np.ndarray:
+        """Ascending row ids matching the screen."""
+        return _evaluate(self.tree, index)
+
+
+_OPS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+
+
+_COMPARE = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+    "==": operator.eq, "!=": operator.ne,
+}
+
+
+def _row_predicate(node):
+    """Row-at-a-time twin of _evaluate as a closure; a missing value fails every comparison."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        left, right = _row_predicate(node[1]), _row_predicate(node[2])
+        if kind == "and":
+            return lambda values: left(values) and right(values)
+        return lambda values: left(values) or right(values)
+    if kind == "not":
+        inner = _row_predicate(node[1])
+        return lambda values: not inner(values)
+    if kind == "between":
+        _, field, low, high = node
+        low, high = min(low, high), max(low, high)
+
+        def between(values):
+            value = values.get(field)
+            return value is not None and low <= value <= high
+        return between
+    if kind == "fields":
+        _, left_field, op, right_field = node
+        compare = _COMPARE[op]
+
+        def fields(values):
+            a, b = values.get(left_field), values.get(right_field)
+            return a is not None and b is not None and compare(a, b)
+        return fields
+
+    _, field, op, target = node
+    if field in TEXT_FIELDS:
+        if op not in ("==", "!="):
+            raise ScreenSyntaxError(f"{field} only supports = and !=")
+        target = target.lower()
+    compare = _COMPARE[op]
+
+    def comparison(values):
+        value = values.get(field)
+        return value is not None and compare(value, target)
+    return comparison
+
+
+def _evaluate(node, index: ScreenerIndex) -> np.ndarray:
+    kind = node[0]
+    if kind == "and":
+        return np.intersect1d(_evaluate(node[1], index), _evaluate(node[2], index), assume_unique=True)
+    if kind == "or":
+        return np.union1d(_evaluate(node[1], index), _evaluate(node[2], index))
+    if kind == "not":
+        return np.setdiff1d(index.all, _evaluate(node[1], index), assume_unique=True)
+    if kind == "between":
+        _, field, low, high = node
+        return index.range(field, min(low, high), max(low, high))
+    if kind == "fields":
+        _, left, op, right = node
+        left, right = index.column(left), index.column(right)
+        with np.errstate(invalid="ignore"):
+            # NaN != x is true, so rows missing either side are excluded explicitly (as for literals)
+            return np.flatnonzero(_OPS[op](left, right) & ~np.isnan(left) & ~np.isnan(right))
+
+    _, field, op, value = node
+    if field in TEXT_FIELDS:
+        if op not in ("==", "!="):
+            raise ScreenSyntaxError(f"{field} only supports = and !=")
+        return index.text_equal(field, value, negate=op == "!=")
+    if op == "<":
+        return index.range(field, high=value, high_inclusive=False)
+    if op == "<=":
+        return index.range(field, high=value)
+    if op == ">":
+        return index.range(field, low=value, low_inclusive=False)
+    if op == ">=":
+        return index.range(field, low=value)
+    if op == "==":
+        return index.range(field, value, value)
+    return index.not_equal(field, value)
+
+
+@lru_cache(maxsize=256)
+def compile_screen(text: str) -> Screen:
+    """Parses a screen expression; raises ScreenSyntaxError if it is invalid."""
+    tokens = _tokenize(text)
+    if not tokens:
+        raise ScreenSyntaxError("Empty screen")
+    parser = _Parser(tokens)
+    tree = parser.expr()
+    if parser.pos != len(tokens):
+        raise ScreenSyntaxError(f"Unexpected {parser.peek()[1]!r}")
+    return Screen(text, tree)
@@ -0,0 +1,280 @@
+"""Full-text search over the focus list's news and playbook text.
+
+`build_search_index` turns one or more snapshots into a plain-JSON
+inverted index, once per snapshot version (it is stored with the render
+artifacts). Documents are focus items (headline, summary, blurb,
+divergence note, action plan, logic pillars, trigger details) and
+portfolio sectors (`company_name`, one document per sector). All text is
+ticker-masked before it is tokenized, so neither the index nor a snippet
+can reveal a ticker.
+
+`SearchIndex` answers queries: every query word must match, each word also
+matches as a prefix of longer terms (at a discount), and hits are ranked by
+BM25 per field times a field weight (a doc counts its best field per word).
+
+Usage:
+    python search_index.py <query> [--history N]   # current snapshot, or the last N archived ones
+"""
+import bisect
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from formatters import mask_summary_text, mask_ticker, strip_evidence_refs
+
+SEARCH_FORMAT = 1
+
+# Field -> (label, weight)
+FOCUS_FIELDS = {
+    "news_headline": ("News", 3.0),
+    "action_plan": ("Action plan", 2.0),
+    "trigger_details": ("Trigger", 1.5),
+    "news_summary": ("News", 1.0),
+    "news_blurb": ("News", 1.0),
+    "divergence": ("Divergence", 1.0),
+    "logic_pillars": ("Logic", 0.8),
+}
+PICK_FIELDS = {"company_name": ("Sector", 1.0)}
+FIELDS = {**FOCUS_FIELDS, **PICK_FIELDS}
+FIELD_NAMES = list(FIELDS)
+
+PREFIX_DISCOUNT = 0.6
+MAX_PREFIX_TERMS = 64
+SNIPPET_CHARS = 140
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def field_text(item: dict, field: str) -> str:
+    """Searchable text of one focus/portfolio field (dict-shaped fields flattened)."""
+    value = item.get(field)
+    if isinstance(value, dict):
+        if field == "divergence":
+            value = value.get("note")
+        elif field == "trigger_details":
+            value = value.get("details")
+        else:
+            value = " ".join(str(v) for v in value.values() if v)
+    if not value:
+        return ""
+    return strip_evidence_refs(str(value)) if field in ("divergence", "action_plan") else str(value)
+
+
+# --- Build ---
+def snapshot_documents(data: dict, as_of: str = None) -> list:
+    """Masked search documents of one snapshot.
+
+    A focus document's `ref` is its position among focus items with a
+    ticker (the order of the focus navigator); a sector document's `ref`
+    is the sector name.
+    """
+    as_of = as_of or (data.get("meta") or {}).get("updated_at")
+    tickers = set()
+    for section in ("table_view_model", "focus_view_model"):
+        tickers.update(item["ticker"] for item in data.get(section) or [] if item.get("ticker"))
+
+    docs = []
+    position = 0
+    for item in data.get("focus_view_model") or []:
+        if not item.get("ticker"):
+            continue
+        fields = {}
+        for field in FOCUS_FIELDS:
+            text = field_text(item, field)
+            if text:
+                fields[field] = mask_summary_text(text, tickers)
+        docs.append({"kind": "focus", "ref": position, "label": mask_ticker(item["ticker"]),
+                     "as_of": as_of, "fields": fields})
+        position += 1
+
+    sectors = {}
+    for row in data.get("table_view_model") or []:
+        sector = str(row.get("company_name") or "").strip()
+        if sector:
+            sectors[sector] = sectors.get(sector, 0) + 1
+    for sector, picks in sectors.items():
+        docs.append({"kind": "sector", "ref": sector, "label": f"{sector} ({picks} picks)",
+                     "as_of": as_of, "fields": {"company_name": mask_summary_text(sector, tickers)}})
+    return docs
+
+
+def build_search_index(docs: list) -> dict:
+    """Inverted index (plain JSON) over masked documents."""
+    postings = {} # term -> flat [doc, field, tf, ...]
+    lengths = [] # per doc: {field index: token count}
+    totals = [0] * len(FIELD_NAMES)
+    counts = [0] * len(FIELD_NAMES)
+    for doc_id, doc in enumerate(docs):
+        doc_lengths = {}
+        for field, text in doc["fields"].items():
+            field_id = FIELD_NAMES.index(field)
+            tokens = tokenize(text)
+            doc_lengths[field_id] = len(tokens)
+            totals[field_id] += len(tokens)
+            counts[field_id] += 1
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for token, tf in frequencies.items():
+                postings.setdefault(token, []).extend((doc_id, field_id, tf))
+        lengths.append(doc_lengths)
+    vocab = sorted(postings)
+    return {
+        "format": SEARCH_FORMAT,
+        "docs": [{key: doc[key] for key in ("kind", "ref", "label", "as_of", "fields")} for doc in docs],
+        "lengths": [[[field_id, n] for field_id, n in doc_lengths.items()] for doc_lengths in lengths],
+        "avg_lengths": [total / count if count else 0.0 for total, count in zip(totals, counts)],
+        "vocab": vocab,
+        "postings": [postings[term] for term in vocab],
+    }
+
+
+# --- Query ---
+class SearchIndex:
+    """Query side of a built index, with BM25 term weights precomputed per (term, doc).
+
+    Each term keeps a slice of doc ids (sorted) with the doc's best field
+    score for it, so a query is a few vectorized scatters over dense
+    per-doc arrays rather than a walk over postings.
+    """
+
+    def __init__(self, index: dict):
+        self.docs = index["docs"]
+        self.vocab = index["vocab"]
+        self.terms = {term: i for i, term in enumerate(self.vocab)}
+        n = len(self.docs)
+
+        flat = np.fromiter(
+            (v for postings in index["postings"] for v in postings), dtype=np.int64
+        ).reshape(-1, 3)
+        term_of = np.repeat(np.arange(len(self.vocab)), [len(p) // 3 for p in index["postings"]])
+        doc, field, tf = flat[:, 0], flat[:, 1], flat[:, 2].astype(float)
+        lengths = np.zeros((n, len(FIELD_NAMES)))
+        for doc_id, pairs in enumerate(index["lengths"]):
+            for field_id, count in pairs:
+                lengths[doc_id, field_id] = count
+        avg = np.array(index["avg_lengths"], dtype=float)
+        avg[avg == 0] = 1
+        weights = np.array([FIELDS[name][1] for name in FIELD_NAMES])
+        norm = 1 - _BM25_B + _BM25_B * lengths[doc, field] / avg[field]
+        partial = weights[field] * tf * (_BM25_K1 + 1) / (tf + _BM25_K1 * norm)
+
+        # Best field per (term, doc): sort by term, doc, score descending and keep each group's first
+        order = np.lexsort((-partial, doc, term_of))
+        term_of, doc, field, partial = term_of[order], doc[order], field[order], partial[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (term_of[1:] != term_of[:-1]) | (doc[1:] != doc[:-1])
+        self._docs = doc[first]
+        self._fields = field[first]
+        self._partials = partial[first]
+        self._offsets = np.searchsorted(term_of[first], np.arange(len(self.vocab) + 1))
+        df = np.diff(self._offsets)
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _expand(self, word: str) -> list:
+        """(term id, discount) for the exact word and up to MAX_PREFIX_TERMS longer terms it prefixes."""
+        expansions = []
+        exact = self.terms.get(word)
+        if exact is not None:
+            expansions.append((exact, 1.0))
+        start = bisect.bisect_right(self.vocab, word)
+        end = bisect.bisect_left(self.vocab, word + "\uffff", start)
+        expansions.extend((i, PREFIX_DISCOUNT) for i in range(start, min(end, start + MAX_PREFIX_TERMS)))
+        return expansions
+
+    def _word_scores(self, word: str) -> tuple:
+        """Per-doc best score for one query word, and the term that scored it (-1 for none)."""
+        scores = np.zeros(len(self.docs))
+        best_terms = np.full(len(self.docs), -1)
+        for term_id, discount in self._expand(word):
+            lo, hi = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._docs[lo:hi]
+            term_scores = self._partials[lo:hi] * (self.idf[term_id] * discount)
+            better = term_scores > scores[docs]
+            scores[docs[better]] = term_scores[better]
+            best_terms[docs[better]] = term_id
+        return scores, best_terms
+
+    def _best_field(self, term_id: int, doc_id: int) -> int:
+        lo, hi = self._offsets[term_id], self._offsets[term_id + 1]
+        return int(self._fields[lo + np.searchsorted(self._docs[lo:hi], doc_id)])
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Ranked hits: {"doc", "kind", "ref", "label", "as_of", "field", "snippet", "score"}."""
+        words = list(dict.fromkeys(tokenize(query or "")))
+        if not words or not self.docs:
+            return []
+        total, best_terms = self._word_scores(words[0])
+        matched = total > 0
+        for word in words[1:]:
+            scores, _ = self._word_scores(word)
+            matched &= scores > 0
+            total += scores
+        candidates = np.flatnonzero(matched)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-total[candidates], limit)[:limit]]
+        ranked = candidates[np.lexsort((candidates, -total[candidates]))]
+
+        hits = []
+        for doc_id in ranked.tolist():
+            term_id = int(best_terms[doc_id])
+            field = FIELD_NAMES[self._best_field(term_id, doc_id)]
+            doc = self.docs[doc_id]
+            hits.append({
+                "doc": doc_id,
+                "kind": doc["kind"],
+                "ref": doc["ref"],
+                "label": doc["label"],
+                "as_of": doc["as_of"],
+                "field": FIELDS[field][0],
+                "snippet": snippet(doc["fields"][field], self.vocab[term_id]),
+                "score": round(float(total[doc_id]), 3),
+            })
+        return hits
+
+
+def snippet(text: str, term: str, width: int = SNIPPET_CHARS) -> str:
+    """About `width` characters of `text` around the first occurrence of `term`."""
+    if len(text) <= width:
+        return text
+    at = max(text.casefold().find(term), 0)
+    start = max(0, min(at - width // 3, len(text) - width))
+    clip = text[start:start + width].strip()
+    return f"{'…' if start > 0 else ''}{clip}{'…' if start + width < len(text) else ''}"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1].startswith("-"):
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    from snapshot_schema import validate_snapshot
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    documents = []
+    if "--history" in sys.argv:
+        from history_store import connect, list_snapshots, load_snapshot_bytes
+        last_n = int(sys.argv[sys.argv.index("--history") + 1])
+        conn = connect()
+        try:
+            for row in list_snapshots(conn, limit=last_n):
+                data = validate_snapshot(json.loads(load_snapshot_bytes(conn, row["hash"])))
+                documents.extend(snapshot_documents(data, row["as_of"]))
+        finally:
+            conn.close()
+    else:
+        with open(os.path.join(base_dir, "data", "snapshot.json"), "r", encoding="utf-8") as f:
+            documents = snapshot_documents(validate_snapshot(json.load(f)))
+    search = SearchIndex(build_search_index(documents))
+    for hit in search.search(sys.argv[1]):
+        print(f"{hit['score']:>7.2f}  {hit['as_of']}  {hit['label']:<24} {hit['field']:<12} {hit['snippet']}")
@@ -0,0 +1,176 @@
+"""Columnar Arrow sidecar for snapshot.json.
+
+`compile_snapshot` converts a snapshot into two Arrow IPC files next to it
+(`snapshot.table.arrow` and `snapshot.focus.arrow`). Numeric columns are
+typed (int64/float64/bool), string columns are dictionary-encoded, and
+nested values (dicts/lists or mixed types) are kept as JSON text columns.
+Both files carry the SHA-256 of the source JSON in their schema metadata,
+so readers can tell whether the sidecar is fresh.
+
+The sidecar is for offline readers that want typed columns without
+parsing the JSON (`load_sidecar_tables`). The app does not load it: it
+already holds the JSON bytes it hashed, and rebuilding row dicts from the
+sidecar (`load_snapshot_columnar`) peaks higher than json.loads on them
+(see `python benchmarks.py snapshot_formats`).
+
+Run after publishing a snapshot:
+
+    python snapshot_columnar.py data/snapshot.json
+"""
+import json
+import os
+import sys
+
+import pyarrow as pa
+
+from render_cache import snapshot_hash
+
+SECTIONS = {
+    "table_view_model": "table",
+    "focus_view_model": "focus",
+}
+
+_META_SOURCE = b"source_sha256"
+_META_SNAPSHOT = b"snapshot_meta"
+_META_JSON_COLUMNS = b"json_columns"
+
+
+def sidecar_paths(json_path: str) -> dict:
+    """Section name -> sidecar path for a snapshot JSON path."""
+    stem, _ = os.path.splitext(json_path)
+    return {section: f"{stem}.{suffix}.arrow" for section, suffix in SECTIONS.items()}
+
+
+def _column_array(values: list):
+    """Returns (arrow array, is_json) for one column of Python values."""
+    present = [v for v in values if v is not None]
+    kinds = {type(v) for v in present}
+
+    if kinds and kinds <= {bool}:
+        return pa.array(values, type=pa.bool_()), False
+    if kinds and kinds <= {int}:
+        return pa.array(values, type=pa.int64()), False
+    if kinds and kinds <= {int, float}:
+        return pa.array(values, type=pa.float64()), False
+    if kinds <= {str}:
+        return pa.array(values, type=pa.string()).dictionary_encode(), False
+
+    encoded = [None if v is None else json.dumps(v, ensure_ascii=False) for v in values]
+    return pa.array(encoded, type=pa.string()), True
+
+
+def rows_to_table(rows: list, metadata: dict) -> pa.Table:
+    """Builds a typed Arrow table from a list of row dicts."""
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+
+    arrays = []
+    json_columns = []
+    for name in columns:
+        array, is_json = _column_array([row.get(name) for row in rows])
+        arrays.append(array)
+        if is_json:
+            json_columns.append(name)
+
+    metadata = dict(metadata)
+    metadata[_META_JSON_COLUMNS] = json.dumps(json_columns).encode("utf-8")
+    return pa.table(arrays, names=columns).replace_schema_metadata(metadata)
+
+
+def _column_values(column) -> list:
+    """Python values of an Arrow column (NumPy conversion is much faster than to_pylist)."""
+    array = column.combine_chunks()
+    if pa.types.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    if not array.null_count:
+        return array.to_numpy(zero_copy_only=False).tolist()
+
+    nulls = array.is_null().to_numpy(zero_copy_only=False)
+    if pa.types.is_integer(array.type) or pa.types.is_boolean(array.type):
+        # Filling keeps ints as ints instead of widening to NaN-able floats
+        array = array.fill_null(False if pa.types.is_boolean(array.type) else 0)
+    values = array.to_numpy(zero_copy_only=False).tolist()
+    return [None if is_null else v for v, is_null in zip(values, nulls)]
+
+
+def table_to_rows(table: pa.Table) -> list:
+    """Inverse of `rows_to_table`; null cells are omitted like missing JSON keys."""
+    json_columns = set(json.loads(table.schema.metadata.get(_META_JSON_COLUMNS, b"[]")))
+    names = table.column_names
+    columns = []
+    for name in names:
+        values = _column_values(table.column(name))
+        if name in json_columns:
+            values = [None if v is None else json.loads(v) for v in values]
+        columns.append(values)
+
+    return [
+        {name: value for name, value in zip(names, values) if value is not None}
+        for values in zip(*columns)
+    ]
+
+
+def compile_snapshot(json_path: str) -> dict:
+    """Writes the Arrow sidecar files for `json_path` and returns their paths."""
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+
+    metadata = {
+        _META_SOURCE: snapshot_hash(raw).encode("ascii"),
+        _META_SNAPSHOT: json.dumps(data.get("meta", {}), ensure_ascii=False).encode("utf-8"),
+    }
+
+    paths = sidecar_paths(json_path)
+    for section, path in paths.items():
+        table = rows_to_table(data.get(section, []), metadata)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    return paths
+
+
+def _map_table(path: str) -> pa.Table:
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def load_sidecar_tables(json_path: str, digest: str):
+    """Memory-maps the sidecar tables if they match `digest`, else returns None."""
+    tables = {}
+    for section, path in sidecar_paths(json_path).items():
+        if not os.path.exists(path):
+            return None
+        try:
+            table = _map_table(path)
+        except (OSError, pa.ArrowInvalid):
+            return None
+        metadata = table.schema.metadata or {}
+        if metadata.get(_META_SOURCE, b"").decode("ascii") != digest:
+            return None
+        tables[section] = table
+    return tables
+
+
+def load_snapshot_columnar(json_path: str, digest: str):
+    """Snapshot dict rebuilt from a fresh sidecar, or None to fall back to JSON."""
+    tables = load_sidecar_tables(json_path, digest)
+    if tables is None:
+        return None
+
+    any_table = next(iter(tables.values()))
+    data = {"meta": json.loads(any_table.schema.metadata.get(_META_SNAPSHOT, b"{}"))}
+    for section, table in tables.items():
+        data[section] = table_to_rows(table)
+    return data
+
+
+if __name__ == "__main__":
+    for target in sys.argv[1:] or ["data/snapshot.json"]:
+        for section, path in compile_snapshot(target).items():
+            print(f"{section}: {path} ({os.path.getsize(path)} bytes)")
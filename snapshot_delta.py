@@ -0,0 +1,264 @@
+"""Delta snapshots: publish only what changed between two snapshots.
+
+A delta is keyed by the SHA-256 of its base snapshot and carries the new
+`meta`, plus, for `table_view_model` and `focus_view_model`, the ticker
+order, the changed fields of existing rows, the full new rows and the
+removed tickers. `data/metadata.json` records the version chain so app
+replicas holding the base snapshot in memory can patch it instead of
+re-reading and re-deriving everything.
+
+Publisher usage (replaces data/snapshot.json, records the delta and
+rebuilds the static page):
+
+    python snapshot_delta.py path/to/new_snapshot.json [app_url]
+"""
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+from history_store import connect as connect_history, ingest_snapshot, snapshot_closes
+from render_cache import snapshot_hash
+
+logger = logging.getLogger(__name__)
+
+DELTA_FORMAT = 1
+SECTIONS = ("table_view_model", "focus_view_model")
+MAX_CHAIN = 10
+
+
+class DeltaMismatch(Exception):
+    """The delta does not apply to the snapshot at hand; do a full reload."""
+
+
+def _index_rows(rows: list):
+    """ticker -> row, or None if tickers are missing or duplicated."""
+    index = {}
+    for row in rows:
+        ticker = row.get("ticker")
+        if not ticker or ticker in index:
+            return None
+        index[ticker] = row
+    return index
+
+
+def diff_section(base_rows: list, new_rows: list) -> dict:
+    base_index = _index_rows(base_rows)
+    new_index = _index_rows(new_rows)
+    if base_index is None or new_index is None:
+        # Rows cannot be keyed by ticker: ship the section whole
+        return {"replace": new_rows}
+
+    patch = {}
+    added = {}
+    for ticker, row in new_index.items():
+        old = base_index.get(ticker)
+        if old is None:
+            added[ticker] = row
+            continue
+        fields = {k: v for k, v in row.items() if k not in old or old[k] != v}
+        # NaN != NaN: ignore fields that are NaN on both sides
+        fields = {k: v for k, v in fields.items() if not (v != v and old.get(k) != old.get(k))}
+        dropped = [k for k in old if k not in row]
+        if fields or dropped:
+            patch[ticker] = {"set": fields, "unset": dropped}
+
+    return {
+        "order": list(new_index),
+        "patch": patch,
+        "add": added,
+        "remove": [t for t in base_index if t not in new_index]
+    }
+
+
+def make_delta(base_data: dict, base_hash: str, new_data: dict, new_hash: str) -> dict:
+    delta = {
+        "format": DELTA_FORMAT,
+        "base_hash": base_hash,
+        "new_hash": new_hash,
+        "meta": new_data.get("meta", {})
+    }
+    for section in SECTIONS:
+        delta[section] = diff_section(base_data.get(section, []), new_data.get(section, []))
+    return delta
+
+
+def apply_section(base_rows: list, section_delta: dict):
+    """Returns (new rows, tickers whose rows changed or were added)."""
+    if "replace" in section_delta:
+        rows = section_delta["replace"]
+        return rows, {row.get("ticker") for row in rows}
+
+    base_index = _index_rows(base_rows)
+    if base_index is None:
+        raise DeltaMismatch("Base rows are not keyed by ticker")
+
+    patch = section_delta.get("patch", {})
+    added = section_delta.get("add", {})
+    rows = []
+    for ticker in section_delta.get("order", []):
+        if ticker in added:
+            rows.append(added[ticker])
+            continue
+        row = base_index.get(ticker)
+        if row is None:
+            raise DeltaMismatch(f"Ticker {ticker} missing from base snapshot")
+        change = patch.get(ticker)
+        if change:
+            row = {k: v for k, v in row.items() if k not in change["unset"]}
+            row.update(change["set"])
+        rows.append(row)
+    return rows, set(patch) | set(added)
+
+
+def apply_delta(base_data: dict, base_hash: str, delta: dict):
+    """Patches `base_data`; returns (new snapshot, {section: changed tickers})."""
+    if delta.get("format") != DELTA_FORMAT or delta.get("base_hash") != base_hash:
+        raise DeltaMismatch("Delta was not built against this snapshot")
+
+    new_data = {"meta": delta.get("meta", {})}
+    changed = {}
+    for section in SECTIONS:
+        rows, tickers = apply_section(base_data.get(section, []), delta.get(section, {}))
+        new_data[section] = rows
+        changed[section] = tickers
+    return new_data, changed
+
+
+# --- Version chain (data/metadata.json) ---
+def load_metadata(data_dir: str) -> dict:
+    path = os.path.join(data_dir, "metadata.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def find_delta(data_dir: str, base_hash: str, new_hash: str):
+    """Loads the delta base_hash -> new_hash from the version chain, or None."""
+    for version in load_metadata(data_dir).get("versions", []):
+        if version.get("hash") == new_hash and version.get("base_hash") == base_hash and version.get("delta"):
+            try:
+                with open(os.path.join(data_dir, version["delta"]), "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return None
+    return None
+
+
+def _write_json(path: str, payload, **kwargs) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def publish_snapshot(new_data: dict, data_dir: str, app_url: str = None) -> dict:
+    """Writes a new snapshot.json plus its delta from the current one; returns the version entry.
+
+    The new snapshot is also appended to the history store (data/history.sqlite),
+    and the static page (data/static) is rebuilt from it, linking to `app_url`
+    (default: $PUBLIC_APP_URL).
+    """
+    snapshot_path = os.path.join(data_dir, "snapshot.json")
+    new_raw = json.dumps(new_data, indent=2).encode("utf-8")
+    new_hash = snapshot_hash(new_raw)
+
+    base_raw = None
+    version = {"hash": new_hash, "base_hash": None, "delta": None,
+               "published_at": datetime.now().astimezone().isoformat()}
+
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "rb") as f:
+            base_raw = f.read()
+        base_hash = snapshot_hash(base_raw)
+        if base_hash == new_hash:
+            return version
+        delta_rel = os.path.join("deltas", f"{base_hash[:16]}_{new_hash[:16]}.json")
+        os.makedirs(os.path.join(data_dir, "deltas"), exist_ok=True)
+        delta = make_delta(json.loads(base_raw), base_hash, new_data, new_hash)
+        _write_json(os.path.join(data_dir, delta_rel), delta, separators=(",", ":"))
+        version["base_hash"] = base_hash
+        version["delta"] = delta_rel.replace(os.sep, "/")
+
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(new_raw)
+    os.replace(tmp_path, snapshot_path)
+
+    metadata = load_metadata(data_dir)
+    chain = [version] + metadata.get("versions", [])
+    for old in chain[MAX_CHAIN:]:
+        if old.get("delta"):
+            try:
+                os.remove(os.path.join(data_dir, old["delta"]))
+            except OSError:
+                pass
+    metadata["versions"] = chain[:MAX_CHAIN]
+    metadata["last_sync"] = version["published_at"]
+    _write_json(os.path.join(data_dir, "metadata.json"), metadata, indent=2)
+
+    history = connect_history(os.path.join(data_dir, "history.sqlite"))
+    try:
+        ingest_snapshot(history, new_raw, new_hash)
+        if base_raw is not None:
+            try:
+                ingest_snapshot(history, base_raw, version["base_hash"]) # No-op unless it predates the store
+            except ValueError:
+                pass # Malformed base: it was never servable, so there is nothing to travel back to
+    finally:
+        history.close()
+    _publish_static_page(new_data, new_hash, data_dir, app_url)
+    return version
+
+
+def build_snapshot_artifacts(data: dict, digest: str, history_path: str) -> dict:
+    """Render artifacts of a snapshot as the app builds them: validated, with
+    indicator fields upstream left empty backfilled from the history store.
+
+    Raises SnapshotValidationError for a malformed snapshot; the backfill is
+    best-effort, like the app's.
+    """
+    from indicators import fill_snapshot_indicators, tickers_missing_indicators
+    from snapshot_schema import validate_snapshot
+    from view_models import build_render_artifacts
+    if data:
+        data = validate_snapshot(data)
+        missing = tickers_missing_indicators(data)
+        if missing and os.path.exists(history_path):
+            try:
+                history = connect_history(history_path)
+                try:
+                    data = fill_snapshot_indicators(data, snapshot_closes(history, data, missing))[0]
+                finally:
+                    history.close()
+            except Exception as e:
+                logger.warning("Indicator backfill failed for %s: %s", digest[:12], e)
+    artifacts = build_render_artifacts(data)
+    artifacts["snapshot_hash"] = digest
+    return artifacts
+
+
+def _publish_static_page(data: dict, digest: str, data_dir: str, app_url: str = None) -> None:
+    """Rewrites data/static from the new snapshot (static_site.py); best-effort like the app's history."""
+    from static_site import DEFAULT_APP_URL, write_static_site
+    try:
+        artifacts = build_snapshot_artifacts(data, digest, os.path.join(data_dir, "history.sqlite"))
+        result = write_static_site(artifacts, os.path.join(data_dir, "static"),
+                                   app_url or os.environ.get("PUBLIC_APP_URL", DEFAULT_APP_URL))
+        logger.info("Static page for %s: %d bytes (%d gzip) in %.1f ms",
+                    digest[:12], result["bytes"], result["gzip_bytes"], result["seconds"] * 1000)
+    except Exception as e:
+        logger.warning("Static page build failed for %s: %s", digest[:12], e)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python snapshot_delta.py <new_snapshot.json> [app_url]")
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        published = publish_snapshot(json.load(f), os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"),
+                                     sys.argv[2] if len(sys.argv) == 3 else None)
+    print(json.dumps(published, indent=2))
@@ -0,0 +1,107 @@
+"""What changed between two snapshots ("changes since last sync").
+
+`diff_snapshots` hash-joins the focus list and the portfolio of two
+validated snapshots by ticker and compares the fields in `DIFF_FIELDS`,
+in time linear in the number of rows. The change set is plain JSON:
+
+    {"focus_view_model": {"added": [...], "removed": [...],
+                          "changed": {ticker: {field: [old, new]}}},
+     "table_view_model": {...}}
+
+`above_sma200` (always listed last) is derived from the price and SMA200,
+or the focus item's distance to it, so SMA200 crossings show up as an
+ordinary field change.
+Unlike snapshot_delta, which ships every changed value, only fields worth
+telling a reader about are compared.
+"""
+import json
+import sys
+
+from snapshot_schema import validate_snapshot
+
+DIFF_FORMAT = 1
+SECTIONS = ("focus_view_model", "table_view_model")
+
+DIFF_FIELDS = {
+    "focus_view_model": ("verdict", "trend_color", "primary_trigger_key", "volume_alert", "above_sma200"),
+    "table_view_model": (
+        "quant_rating", "value_grade", "growth_grade", "profitability_grade",
+        "momentum_grade", "eps_revisions_grade", "ap_rule_action", "above_sma200",
+    ),
+}
+
+
+def _above_sma200(row: dict):
+    price, sma = row.get("last_price"), row.get("sma200")
+    if price is not None and sma is not None:
+        return price > sma
+    dist = row.get("dist_sma200_pct")
+    return None if dist is None else dist > 0
+
+
+def _index_rows(rows: list, fields: tuple) -> dict:
+    """ticker -> tuple of compared values, in row order; a repeated ticker keeps its first row."""
+    index = {}
+    derive = fields[-1] == "above_sma200"
+    plain = fields[:-1] if derive else fields
+    for row in rows:
+        ticker = str(row.get("ticker") or "").strip().upper()
+        if not ticker or ticker in index:
+            continue
+        values = tuple(map(row.get, plain))
+        index[ticker] = values + (_above_sma200(row),) if derive else values
+    return index
+
+
+def diff_section(old_rows: list, new_rows: list, fields: tuple) -> dict:
+    old_index = _index_rows(old_rows, fields)
+    new_index = _index_rows(new_rows, fields)
+    added = []
+    changed = {}
+    for ticker, values in new_index.items():
+        old = old_index.get(ticker)
+        if old is None:
+            added.append(ticker)
+            continue
+        if old == values:
+            continue
+        fields_changed = {
+            field: [before, after] for field, before, after in zip(fields, old, values)
+            # A field that went missing is a data gap, not a change
+            if before != after and before is not None and after is not None
+        }
+        if fields_changed:
+            changed[ticker] = fields_changed
+    return {
+        "added": added,
+        "removed": [ticker for ticker in old_index if ticker not in new_index],
+        "changed": changed,
+    }
+
+
+def diff_snapshots(old_data: dict, new_data: dict, fields: dict = None) -> dict:
+    """Change set from `old_data` to `new_data` (both validated snapshots)."""
+    fields = fields or DIFF_FIELDS
+    return {
+        section: diff_section(old_data.get(section) or [], new_data.get(section) or [], fields[section])
+        for section in SECTIONS
+    }
+
+
+def change_count(change_set: dict) -> int:
+    """Number of tickers added, removed or changed across sections."""
+    return sum(
+        len(section["added"]) + len(section["removed"]) + len(section["changed"])
+        for section in change_set.values()
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python snapshot_diff.py <old_snapshot.json> <new_snapshot.json>")
+        sys.exit(1)
+    snapshots = []
+    for snapshot_path in sys.argv[1:]:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            snapshots.append(validate_snapshot(json.load(f)))
+    print(json.dumps(diff_snapshots(*snapshots), indent=2, ensure_ascii=False))
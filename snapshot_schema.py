@@ -0,0 +1,260 @@
+"""Schema validation and type normalization for incoming snapshots.
+
+The schema below is compiled once into per-kind field groups, and
+`validate_snapshot` checks and normalizes a snapshot in a single pass:
+
+- numbers: int/float or numeric strings ("1,234.5"); NaN and placeholder
+  strings ("", "N/A", "-", "—") become None
+- ints: whole numbers are returned as int (242.0 -> 242)
+- strings: scalars are converted with str()
+- unknown fields are passed through untouched
+
+Anything else (wrong container types, rows without a ticker, unparseable
+numbers) raises SnapshotValidationError naming the offending path, so the
+app can keep serving the previous snapshot.
+"""
+import math
+import re
+
+NUMBER = "number"
+INT = "int"
+STR = "str"
+BOOL = "bool"
+DICT = "dict"
+ANY = "any"
+
+META_SCHEMA = {
+    "updated_at": STR,
+    "updated_at_tz": STR,
+    "focus_message": STR,
+    "focus_summary_text": STR,
+    "sync_success": BOOL,
+}
+
+FOCUS_SCHEMA = {
+    "ticker": STR,
+    "verdict": STR,
+    "urgency": NUMBER,
+    "signal": STR,
+    "news": STR,
+    "news_sentiment_raw": NUMBER,
+    "volume_alert": BOOL,
+    "trend_color": STR,
+    "news_headline": STR,
+    "news_age": STR,
+    "news_sources": INT,
+    "news_summary": STR,
+    "reason": STR,
+    "logic_pillars": DICT,
+    "divergence": ANY,
+    "action_plan": STR,
+    "break_confirm_days": NUMBER,
+    "trigger_count": INT,
+    "primary_trigger_key": STR,
+    "trigger_details": DICT,
+    "sector": STR,
+    "quant_score": NUMBER,
+    "last_price": NUMBER,
+    "day_change_pct": NUMBER,
+    "picked_date": STR,
+    "indicator_asof": STR,
+    "dte": NUMBER,
+    "next_earnings": STR,
+    "dist_sma200_pct": NUMBER,
+    "dist_ema21_pct": NUMBER,
+    "dist_ema55_pct": NUMBER,
+    "sma200": NUMBER,
+    "ema55": NUMBER,
+    "ema21": NUMBER,
+    "vol_ratio": NUMBER,
+    "hold_streak_days": INT,
+    "hold_countdown": NUMBER,
+    "latest_price": NUMBER,
+    "price_type": STR,
+    "price_timestamp": STR,
+    "news_blurb": STR,
+}
+
+TABLE_SCHEMA = {
+    "ticker": STR,
+    "last_price": NUMBER,
+    "Day%": NUMBER,
+    "next_earnings": STR,
+    "quant_score": NUMBER,
+    "value_grade": STR,
+    "growth_grade": STR,
+    "profitability_grade": STR,
+    "momentum_grade": STR,
+    "eps_revisions_grade": STR,
+    "hold_streak_days": INT,
+    "ap_rule_action": STR,
+    "hold_countdown": NUMBER,
+    "dte": NUMBER,
+    "return_pct": NUMBER,
+    "company_name": STR,
+    "quant_rating": STR,
+    "quant_rating_emoji": STR,
+    "sma200": NUMBER,
+    "ema55": NUMBER,
+    "ema21": NUMBER,
+    "rsi14": NUMBER,
+    "atr14_pct": NUMBER,
+    "vol_ratio": NUMBER,
+    "ema21_fmt": STR,
+    "ema55_fmt": STR,
+    "sma200_fmt": STR,
+    "vol_fmt": STR,
+    "rsi14_fmt": STR,
+    "earnings_fmt": STR,
+    "picked_date": STR,
+}
+
+_MISSING_NUMBERS = frozenset(("", "N/A", "NA", "NAN", "NONE", "NULL", "-", "—"))
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+class SnapshotValidationError(ValueError):
+    """Raised when a snapshot does not match the schema."""
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _to_number(value):
+    kind = type(value)
+    if kind is float:
+        return None if math.isnan(value) else value
+    if kind is int:
+        return float(value)
+    if value is None:
+        return None
+    if kind is str:
+        text = value.strip().replace(",", "")
+        if text.upper() in _MISSING_NUMBERS:
+            return None
+        if _NUMBER_RE.fullmatch(text):
+            return float(text)
+    raise _Invalid(f"expected number, got {value!r}")
+
+
+def _to_int(value):
+    number = _to_number(value)
+    if number is None:
+        return None
+    if not number.is_integer():
+        raise _Invalid(f"expected whole number, got {value!r}")
+    return int(number)
+
+
+def _to_str(value):
+    if value is None or type(value) is str:
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    raise _Invalid(f"expected string, got {type(value).__name__}")
+
+
+def _to_bool(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise _Invalid(f"expected boolean, got {value!r}")
+
+
+def _to_dict(value):
+    if value is None or isinstance(value, dict):
+        return value
+    raise _Invalid(f"expected object, got {type(value).__name__}")
+
+
+_COERCERS = {
+    NUMBER: _to_number,
+    INT: _to_int,
+    STR: _to_str,
+    BOOL: _to_bool,
+    DICT: _to_dict,
+}
+
+
+def compile_schema(schema: dict, require_ticker: bool = False):
+    """Compiles a field -> kind schema into a function normalizing one dict.
+
+    Fields are grouped by kind so the common case (value already has the
+    right type) is a single type check with no function call.
+    """
+    def fields(kind):
+        return tuple(field for field, k in schema.items() if k == kind)
+
+    numbers, ints, strs = fields(NUMBER), fields(INT), fields(STR)
+    others = tuple((field, _COERCERS[kind]) for field, kind in schema.items() if kind in (BOOL, DICT))
+
+    def validate(record, path: str) -> dict:
+        if type(record) is not dict:
+            raise SnapshotValidationError(f"{path}: expected object, got {type(record).__name__}")
+        out = dict(record)
+        key = None
+        try:
+            for key in numbers:
+                value = out.get(key)
+                if (type(value) is not float or value != value) and key in out:
+                    out[key] = _to_number(value)
+            for key in ints:
+                value = out.get(key)
+                if type(value) is not int and key in out:
+                    out[key] = _to_int(value)
+            for key in strs:
+                value = out.get(key)
+                if type(value) is not str and value is not None:
+                    out[key] = _to_str(value)
+            for key, coerce in others:
+                if key in out:
+                    out[key] = coerce(out[key])
+        except _Invalid as e:
+            raise SnapshotValidationError(f"{path}.{key}: {e}") from None
+
+        if require_ticker:
+            ticker = out.get("ticker")
+            if not ticker or not ticker.strip():
+                raise SnapshotValidationError(f"{path}.ticker: missing ticker")
+        return out
+
+    return validate
+
+
+_validate_meta = compile_schema(META_SCHEMA)
+_validate_focus = compile_schema(FOCUS_SCHEMA, require_ticker=True)
+_validate_table = compile_schema(TABLE_SCHEMA, require_ticker=True)
+
+# Per-section validators, e.g. for checking rows as they stream in
+SECTION_VALIDATORS = {
+    "meta": _validate_meta,
+    "focus_view_model": _validate_focus,
+    "table_view_model": _validate_table,
+}
+
+
+def _validate_rows(data: dict, section: str, validate) -> list:
+    rows = data.get(section, [])
+    if rows is None:
+        return []
+    if not isinstance(rows, list):
+        raise SnapshotValidationError(f"{section}: expected list, got {type(rows).__name__}")
+    return [validate(row, f"{section}[{i}]") for i, row in enumerate(rows)]
+
+
+def validate_snapshot(data) -> dict:
+    """Returns a normalized copy of `data` or raises SnapshotValidationError."""
+    if not isinstance(data, dict):
+        raise SnapshotValidationError(f"snapshot: expected object, got {type(data).__name__}")
+    if "meta" not in data:
+        raise SnapshotValidationError("snapshot: missing 'meta'")
+
+    normalized = dict(data)
+    normalized["meta"] = _validate_meta(data.get("meta"), "meta")
+    normalized["focus_view_model"] = _validate_rows(data, "focus_view_model", _validate_focus)
+    normalized["table_view_model"] = _validate_rows(data, "table_view_model", _validate_table)
+    return normalized
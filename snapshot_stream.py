@@ -0,0 +1,230 @@
+"""Incremental snapshot.json reader for very large snapshots.
+
+`iter_snapshot` walks the top-level object and yields `(section, value, size)`
+tuples in file order without materializing the whole document: `meta` comes
+out as one dict, and `focus_view_model` / `table_view_model` are streamed
+one item at a time. At most one item plus one read chunk is buffered.
+
+`StreamingSnapshot` consumes that stream into the structures the app needs
+(focus items as a list, portfolio rows as column lists) and enforces a
+memory ceiling on what it retains and on what it buffers while decoding.
+"""
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+STREAMED_SECTIONS = ("focus_view_model", "table_view_model")
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class SnapshotTooLarge(Exception):
+    """Raised when a streamed snapshot exceeds the configured memory ceiling."""
+
+
+class _Reader:
+    """Character buffer over a text file that refills on demand."""
+
+    def __init__(self, f, chunk_size: int, max_buffer=None):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._max_buffer = max_buffer
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed prefix so the buffer stays bounded
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        # A value that never completes (malformed, truncated) would otherwise pull in the rest of the file
+        if self._max_buffer is not None and len(self.buf) > self._max_buffer:
+            raise SnapshotTooLarge(
+                f"Snapshot value exceeds memory ceiling ({len(self.buf)} > {self._max_buffer} bytes)"
+            )
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character (without consuming it), '' at EOF."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decodes one complete JSON value; returns (value, size in characters)."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending exactly at the buffer edge may be truncated
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            size = end - self.pos
+            self.pos = end
+            return value, size
+
+
+def iter_snapshot(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, max_buffer=None):
+    """Yields (section, value, size) for the top level of a snapshot file.
+
+    Streamed sections yield one entry per list item; every other key yields
+    its whole value once. With `max_buffer`, reading raises SnapshotTooLarge
+    as soon as the undecoded text buffered for one value grows past it.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f, chunk_size, max_buffer)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key, _ = reader.value()
+            reader.expect(":")
+            if key in STREAMED_SECTIONS and reader.peek() == "[":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        item, size = reader.value()
+                        yield key, item, size
+                        if reader.peek() == ",":
+                            reader.pos += 1
+                            continue
+                        reader.expect("]")
+                        break
+            else:
+                value, size = reader.value()
+                yield key, value, size
+
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            return
+
+
+class StreamingSnapshot:
+    """Consumes `iter_snapshot` section by section under a memory ceiling.
+
+    `max_bytes` bounds the decoded JSON text retained (a proxy for memory);
+    None disables the check. `validators` optionally maps a section name to a
+    `(value, path) -> value` function applied to meta and to each item.
+    """
+
+    def __init__(self, path: str, max_bytes=None, chunk_size: int = DEFAULT_CHUNK_SIZE, validators=None):
+        self._events = iter_snapshot(path, chunk_size=chunk_size, max_buffer=max_bytes)
+        self._validators = validators or {}
+        self._counts = {}
+        self._pending = None
+        self.max_bytes = max_bytes
+        self.retained_bytes = 0
+        self.meta = {}
+        self.focus_items = []
+        self.table_columns = {}
+        self.table_rows = 0
+        self.empty = True
+
+    def _retain(self, size: int) -> None:
+        self.retained_bytes += size
+        if self.max_bytes is not None and self.retained_bytes > self.max_bytes:
+            raise SnapshotTooLarge(
+                f"Snapshot exceeds memory ceiling ({self.retained_bytes} > {self.max_bytes} bytes)"
+            )
+
+    def _next(self):
+        if self._pending is not None:
+            event, self._pending = self._pending, None
+            return event
+        return next(self._events, None)
+
+    def _consume_until(self, section: str) -> None:
+        """Handles events until `section` has been fully read."""
+        seen = False
+        while True:
+            event = self._next()
+            if event is None:
+                return
+            key = event[0]
+            if seen and key != section:
+                self._pending = event
+                return
+            self._handle(*event)
+            seen = seen or key == section
+
+    def _handle(self, key, value, size) -> None:
+        self.empty = False
+        validator = self._validators.get(key)
+        if validator is not None:
+            if key in STREAMED_SECTIONS:
+                index = self._counts.get(key, 0)
+                self._counts[key] = index + 1
+                value = validator(value, f"{key}[{index}]")
+            else:
+                value = validator(value, key)
+        if key == "meta":
+            self._retain(size)
+            self.meta = value if isinstance(value, dict) else {}
+        elif key == "focus_view_model":
+            self._retain(size)
+            if isinstance(value, list):
+                self.focus_items.extend(value)
+            else:
+                self.focus_items.append(value)
+        elif key == "table_view_model":
+            self._retain(size)
+            rows = value if isinstance(value, list) else [value]
+            for row in rows:
+                self._append_row(row)
+
+    def _append_row(self, row: dict) -> None:
+        for name in row:
+            if name not in self.table_columns:
+                self.table_columns[name] = [None] * self.table_rows
+        for name, values in self.table_columns.items():
+            values.append(row.get(name))
+        self.table_rows += 1
+
+    def read_meta(self) -> dict:
+        self._consume_until("meta")
+        return self.meta
+
+    def read_focus(self) -> list:
+        self._consume_until("focus_view_model")
+        return self.focus_items
+
+    def read_table(self) -> dict:
+        """Portfolio rows as a column name -> values mapping."""
+        event = self._next()
+        while event is not None:
+            self._handle(*event)
+            event = self._next()
+        return self.table_columns
+
+    def to_dict(self) -> dict:
+        """Reads any remaining sections and returns a regular snapshot dict."""
+        self.read_table()
+        rows = [
+            {name: values[i] for name, values in self.table_columns.items() if values[i] is not None}
+            for i in range(self.table_rows)
+        ]
+        return {"meta": self.meta, "focus_view_model": self.focus_items, "table_view_model": rows}
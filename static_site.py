@@ -0,0 +1,213 @@
+"""Static HTML build of the public view.
+
+A single self-contained page (inline CSS, no JavaScript) with the weekly
+radar, the focus scan, the deep dive for the top focus pick and the
+portfolio table, all from the masked render artifacts. It can be served
+straight from disk or a CDN to readers who look once and leave, and links
+through to the interactive app for everything else (navigator, screener,
+history charts, exports).
+
+The page is written next to a pre-compressed `index.html.gz` (mtime 0, so
+identical snapshots produce identical bytes), atomically, whenever a
+snapshot is published (snapshot_delta.publish_snapshot), or by hand:
+
+Usage:
+    python static_site.py [out_dir] [app_url]
+"""
+import gzip
+import html
+import json
+import os
+import sys
+import time
+
+from render_cache import open_cached_artifacts, snapshot_hash
+from snapshot_delta import build_snapshot_artifacts
+from view_models import artifact_key
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "snapshot.json")
+RENDER_CACHE_DIR = os.path.join(DATA_DIR, "render_cache")
+HISTORY_DB_PATH = os.path.join(DATA_DIR, "history.sqlite")
+STATIC_DIR = os.path.join(DATA_DIR, "static")
+PAGE_NAME = "index.html"
+DEFAULT_APP_URL = "/"
+
+# Same headers and number formats as the app's st.dataframe column_config
+PORTFOLIO_HEADERS = {
+    'ticker': 'Ticker',
+    'picked_date': 'Picked',
+    'price': 'Price',
+    'hold_streak_days': 'Hold',
+    'earnings': 'Earnings',
+    'ema21': 'EMA21',
+    'ema55': 'EMA55',
+    'sma200': 'SMA200',
+    'rsi14': 'RSI',
+    'atr14_pct': 'ATR%',
+    'vol': 'Vol',
+    'quant': 'Quant',
+    'value_grade': 'Val',
+    'growth_grade': 'Gro',
+    'profitability_grade': 'Pro',
+    'momentum_grade': 'Mom',
+    'eps_revisions_grade': 'Rev'
+}
+NUMBER_FORMATS = {
+    'price': '${:.2f}',
+    'hold_streak_days': '{:.0f}',
+    'rsi14': '{:.0f}',
+    'atr14_pct': '{:.1f}%',
+    'vol': '{:.1f}x'
+}
+
+PAGE_CSS = """
+:root{color-scheme:light dark;--fg:light-dark(#1f2937,#e5e7eb);--muted:light-dark(#6b7280,#9ca3af);
+--line:light-dark(#e5e7eb,#374151);--panel:light-dark(#f9fafb,#111827);--accent:light-dark(#1e40af,#93c5fd)}
+body{margin:0;font:15px/1.45 system-ui,-apple-system,"Segoe UI",sans-serif;color:var(--fg)}
+main{max-width:1200px;margin:0 auto;padding:2rem 1rem 3rem}
+h1{font-size:1.8rem;margin:0 0 .2rem}h2{font-size:1.3rem;margin:2rem 0 .5rem}h3{font-size:1.05rem;margin:1rem 0 .3rem}
+.muted{color:var(--muted);font-size:.85rem;margin:.15rem 0}
+.cta{display:inline-block;margin:.8rem 0;padding:.45rem .9rem;border-radius:.4rem;background:var(--accent);
+color:light-dark(#fff,#111827);text-decoration:none;font-weight:600}
+pre{white-space:pre-wrap;background:var(--panel);border:1px solid var(--line);border-radius:.4rem;padding:.8rem;font-size:.85rem}
+.scroll{overflow-x:auto;border:1px solid var(--line);border-radius:.4rem}
+table{border-collapse:collapse;width:100%;font-size:.85rem;white-space:nowrap}
+th,td{padding:.3rem .55rem;border-bottom:1px solid var(--line);text-align:left}
+th{position:sticky;top:0;background:var(--panel)}td.num{text-align:right;font-variant-numeric:tabular-nums}
+@media (max-width:600px){main{padding:1rem .75rem 2rem}h1{font-size:1.35rem}}
+"""
+
+
+def _text(value) -> str:
+    return "—" if value is None or value == "" else html.escape(str(value))
+
+
+def _cell(column: str, value) -> str:
+    fmt = NUMBER_FORMATS.get(column)
+    if fmt and isinstance(value, (int, float)):
+        return f'<td class="num">{html.escape(fmt.format(value))}</td>'
+    return f"<td>{_text(value)}</td>"
+
+
+def _table(headers: list, rows) -> str:
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+    body = "".join(f"<tr>{''.join(row)}</tr>" for row in rows)
+    return f'<div class="scroll"><table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></div>'
+
+
+# --- Sections ---
+def _summary_section(summary_text: str) -> str:
+    if not summary_text:
+        return ""
+    return f"<h2>Weekly Focus Radar</h2><pre>{html.escape(summary_text)}</pre>"
+
+
+def _focus_section(artifacts) -> str:
+    parts = ["<h2>Focus List (Top 8)</h2>"]
+    scan_rows = artifacts.get("scan_rows") or []
+    if not scan_rows:
+        parts.append(f'<p class="muted">{_text(artifacts["meta"]["focus_message"])}</p>')
+        return "".join(parts)
+    headers = list(scan_rows[0])
+    parts.append(_table(headers, ([_cell(h, row.get(h)) for h in headers] for row in scan_rows)))
+
+    # The app opens on the first focus pick; so does the static page
+    tickers = artifacts.get("focus_tickers") or []
+    deep_dive = artifacts["deep_dive"].get(tickers[0]) if tickers else None
+    if deep_dive:
+        parts.append(f"<h2>Deep Dive: {_text(scan_rows[0].get('Ticker'))}</h2>")
+        parts.append(f"<h3>A) One-line Verdict</h3><p>{_text(deep_dive['verdict_line'])}</p>")
+        parts.append("<h3>B) Evidence</h3>")
+        for label, key in (("Price", "price"), ("Key Levels", "key_levels"), ("Volume", "volume"),
+                           ("News", "news"), ("Divergence", "divergence")):
+            parts.append(f'<p class="muted">{label}: {_text(deep_dive[key])}</p>')
+        parts.append("<h3>C) Playbook</h3>")
+        for line in [deep_dive["ban"], *deep_dive["playbook"], f"Next action: {deep_dive['next_action']}"]:
+            parts.append(f'<p class="muted">{_text(line)}</p>')
+        if deep_dive["action_plan"]:
+            parts.append(f'<p class="muted">Action plan note: {_text(deep_dive["action_plan"])}</p>')
+    return "".join(parts)
+
+
+def _portfolio_section(artifacts) -> str:
+    parts = ["<h2>Alpha Picks Portfolio</h2>"]
+    summary = artifacts.get("portfolio_summary")
+    if summary:
+        def pct(value):
+            return "N/A" if value is None else f"{value:+.1f}%"
+        parts.append(
+            f'<p class="muted">{summary["picks"]} picks · Avg return {pct(summary["avg_return"])} · '
+            f'Median {pct(summary["median_return"])} · {summary["winners"]} winners / {summary["losers"]} losers</p>'
+        )
+    portfolio = artifacts.get("portfolio")
+    if not portfolio:
+        parts.append('<p class="muted">No Portfolio Data Available.</p>')
+        return "".join(parts)
+    columns = [c for c in PORTFOLIO_HEADERS if c in portfolio]
+    rows = ([_cell(c, value) for c, value in zip(columns, values)] for values in zip(*(portfolio[c] for c in columns)))
+    parts.append(_table([PORTFOLIO_HEADERS[c] for c in columns], rows))
+    return "".join(parts)
+
+
+def render_static_page(artifacts, app_url: str = DEFAULT_APP_URL) -> str:
+    """Complete HTML document of the public view for one set of render artifacts."""
+    meta = artifacts["meta"]
+    link = f'<a class="cta" href="{html.escape(app_url, quote=True)}">Open the interactive dashboard →</a>'
+    return "".join([
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width,initial-scale=1">',
+        f'<meta name="snapshot" content="{html.escape(artifacts.get("snapshot_hash") or "")}">',
+        f"<title>AP Market Overview</title><style>{PAGE_CSS}</style></head><body><main>",
+        f'<h1>Performance Overview</h1><p class="muted">Last Synced: {_text(meta["updated_at"])}</p>',
+        link,
+        _summary_section(artifacts.get("summary_text")),
+        _focus_section(artifacts),
+        _portfolio_section(artifacts),
+        f'<p class="muted">Static snapshot of the public view. {link}</p>',
+        "</main></body></html>\n",
+    ])
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_static_site(artifacts, out_dir: str = STATIC_DIR, app_url: str = DEFAULT_APP_URL) -> dict:
+    """Writes index.html and index.html.gz; returns {"path", "bytes", "gzip_bytes", "seconds"}."""
+    start = time.perf_counter()
+    page = render_static_page(artifacts, app_url).encode("utf-8")
+    compressed = gzip.compress(page, 9, mtime=0)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, PAGE_NAME)
+    # The .gz goes first, so a server preferring it never pairs it with an older page
+    _write_atomic(f"{path}.gz", compressed)
+    _write_atomic(path, page)
+    return {"path": path, "bytes": len(page), "gzip_bytes": len(compressed), "seconds": time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    with open(SNAPSHOT_PATH, "rb") as f:
+        raw = f.read()
+    digest = snapshot_hash(raw)
+    artifacts = open_cached_artifacts(RENDER_CACHE_DIR, artifact_key(digest))
+    if artifacts is None:
+        # Same build as publish_snapshot, indicator backfill included
+        artifacts = build_snapshot_artifacts(json.loads(raw), digest, HISTORY_DB_PATH)
+    if not artifacts.get("available"):
+        print("Snapshot missing; nothing written.")
+        sys.exit(1)
+    result = write_static_site(
+        artifacts,
+        out_dir=sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR,
+        app_url=sys.argv[2] if len(sys.argv) > 2 else os.environ.get("PUBLIC_APP_URL", DEFAULT_APP_URL)
+    )
+    print(f"Wrote {result['path']}: {result['bytes'] / 1024:.1f} KB "
+          f"({result['gzip_bytes'] / 1024:.1f} KB gzip) in {result['seconds'] * 1000:.1f} ms")
@@ -0,0 +1,400 @@
+"""Property checks and a speed gate for the hot formatters.
+
+Each optimized helper in formatters.py is compared against its original
+implementation (kept below as the reference oracle) over generated inputs:
+tickers with dots, whitespace and non-ASCII letters, evidence-ref text,
+numeric strings, dates in every supported shape (valid or not) and radar
+summaries. Outputs, or the exception type raised, must be identical. A
+failing input is shrunk before it is reported. The masked summary must
+also never contain a known ticker as a whole word.
+
+With --bench, per-call time and throughput on a fixed corpus are compared
+with verify_formatters_baseline.json; a regression past the tolerance fails.
+
+Usage:
+    python verify_formatters.py [--examples N] [--seed N]
+    python verify_formatters.py --bench [--tolerance 0.5]
+    python verify_formatters.py --update-baseline
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+import formatters
+from formatters import format_us_date, mask_summary_text, mask_ticker, safe_float, strip_evidence_refs
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "verify_formatters_baseline.json")
+DEFAULT_EXAMPLES = 3000
+DEFAULT_TOLERANCE = 0.5
+
+
+# --- Reference implementations (formatters.py before the precompiled/cached versions) ---
+def ref_strip_evidence_refs(text: str) -> str:
+    if not text or not isinstance(text, str):
+        return ""
+    cleaned = re.sub(r"\s*\((?:[A-Z]\d+(?:,\s*)?)+\)", "", text)
+    cleaned = re.sub(r"\b[FNVB]\d+\b", "", cleaned)
+    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
+    cleaned = cleaned.replace(" ,", ",").replace(" .", ".")
+    return cleaned
+
+
+def ref_mask_ticker(ticker: str) -> str:
+    if ticker is None:
+        return ""
+    value = str(ticker).strip().upper()
+    if not value:
+        return ""
+    if "." in value:
+        parts = value.split(".")
+        masked_parts = [ref_mask_ticker(p) if p else "*" for p in parts]
+        return ".".join(masked_parts)
+    length = len(value)
+    if length <= 2:
+        return value[0] + "*"
+    if length == 3:
+        return value[0] + "**"
+    return f"{value[0]}{'*' * (length - 2)}{value[-1]}"
+
+
+def ref_format_us_date(date_str: str) -> str:
+    if not date_str or str(date_str).strip() in ('', 'N/A', 'TBD', 'None'):
+        return str(date_str) if str(date_str) != 'None' else ''
+    date_str = str(date_str).strip()
+    for pattern, fmt in ((r'(.*?)\s*(\d{4}-\d{2}-\d{2})(.*)', "%Y-%m-%d"),
+                         (r'(.*?)\s*(\d{1,2}/\d{1,2}/\d{4})(.*)', "%m/%d/%Y"),
+                         (r'(.*?)\s*(\d{1,2}/\d{1,2}/\d{2})(.*)', "%m/%d/%y")):
+        match = re.search(pattern, date_str)
+        if match:
+            try:
+                formatted = datetime.strptime(match.group(2), fmt).strftime("%m/%d/%y")
+                parts = [p for p in (match.group(1).strip(), formatted, match.group(3).strip()) if p]
+                return " ".join(parts)
+            except ValueError:
+                pass
+    return date_str
+
+
+def ref_safe_float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned = value.replace(",", "")
+        match = re.search(r"[-+]?\d*\.?\d+", cleaned)
+        if match:
+            try:
+                return float(match.group())
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def ref_mask_summary_text(summary_text: str, tickers) -> str:
+    if not summary_text:
+        return ""
+    if tickers:
+        sorted_tickers = sorted(set(tickers), key=len, reverse=True)
+        pattern = "|".join(re.escape(t) for t in sorted_tickers)
+        summary_text = re.sub(
+            rf"\b({pattern})\b",
+            lambda m: ref_mask_ticker(m.group(0)),
+            summary_text,
+            flags=re.IGNORECASE
+        )
+    return re.sub(r"\n📊 Full strategy view & live metrics: https://.*", "", summary_text)
+
+
+# --- Generators ---
+TICKER_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ" * 3 + "abcxyz0123456789.. -_ßﬁéİı"
+TEXT_TOKENS = [
+    "F12", "N3", "V7", "B99", "A1", "(F1, N2)", "(A1)", "(B2,C3)", "(F1,", "F1B2", "(x)", "word", "Price",
+    " ", "  ", "\t", "\n", ",", ".", " ,", " .", "(", ")", "1.5%", "SMA200", "EMA21",
+]
+NUMBER_TOKENS = ["-", "+", ".", ",", "e", " ", "0", "1", "7", "42", "3.14", "1,234.5", "abc", "nan", "%", "$", "x"]
+DATE_PREFIXES = ["", "📅 ", "⚠️ ", "ER ", "  ", "x", "\n"]
+DATE_SUFFIXES = ["", " TBD", " ", " (est)", "\n2024-01-01", "x"]
+SPECIAL_DATES = [None, "", " ", "N/A", "TBD", "None", " None ", 0, 1.5, float("nan"), 20240101, "nan"]
+
+
+def gen_ticker(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.05:
+        return rng.choice([None, 12, 3.5, True, "", " ", ".", "..", "A.", ".B", "BRK.B", " brk.b ", "A . B"])
+    return "".join(rng.choice(TICKER_CHARS) for _ in range(rng.randint(0, 8)))
+
+
+def gen_evidence_text(rng: random.Random):
+    if rng.random() < 0.03:
+        return rng.choice([None, 5, b"F1", "", ["F1"]])
+    return "".join(rng.choice(TEXT_TOKENS) for _ in range(rng.randint(0, 12)))
+
+
+def gen_number(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.1:
+        return rng.choice([None, 0, -3, 2.5, float("inf"), float("nan"), True, False, [1], {"a": 1}])
+    if roll < 0.2:
+        return repr(rng.uniform(-1e6, 1e6))
+    return "".join(rng.choice(NUMBER_TOKENS) for _ in range(rng.randint(0, 6)))
+
+
+def _date_part(rng: random.Random, digits: int) -> str:
+    # Mostly plausible values, sometimes out of range or zero
+    if digits == 4:
+        return str(rng.choice([1999, 2000, 2024, 2025, 2026, 1900, 2100, 2023])).zfill(4) if rng.random() < 0.9 \
+            else str(rng.randint(0, 9999)).zfill(4)
+    value = rng.choice([rng.randint(1, 12), rng.randint(1, 31), rng.randint(0, 99), 29, 30, 31])
+    text = str(value)
+    return text.zfill(2) if digits == 2 or rng.random() < 0.5 else text
+
+
+def gen_date(rng: random.Random):
+    if rng.random() < 0.08:
+        return rng.choice(SPECIAL_DATES)
+    shape = rng.randrange(4)
+    if shape == 0:
+        core = f"{_date_part(rng, 4)}-{_date_part(rng, 2)[-2:].zfill(2)}-{_date_part(rng, 2)[-2:].zfill(2)}"
+    elif shape == 1:
+        core = f"{_date_part(rng, 1)}/{_date_part(rng, 1)}/{_date_part(rng, 4)}"
+    elif shape == 2:
+        core = f"{_date_part(rng, 1)}/{_date_part(rng, 1)}/{str(rng.randint(0, 99)).zfill(2)}"
+    else:
+        core = "".join(rng.choice("0123456789/- ") for _ in range(rng.randint(0, 12)))
+    return rng.choice(DATE_PREFIXES) + core + rng.choice(DATE_SUFFIXES)
+
+
+def gen_summary(rng: random.Random):
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    tickers = set()
+    for _ in range(rng.randint(0, 12)):
+        ticker = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+        if rng.random() < 0.15:
+            ticker += rng.choice([".B", ".A", "+", "*", "-W"])
+        tickers.add(ticker)
+    pieces = []
+    for _ in range(rng.randint(0, 25)):
+        roll = rng.random()
+        if tickers and roll < 0.45:
+            ticker = rng.choice(sorted(tickers))
+            pieces.append(ticker.lower() if rng.random() < 0.2 else ticker)
+        else:
+            pieces.append(rng.choice(["$", " ", " | ", "\n", "• ", "-15.9%", "Vol 1.6x", "ER in 7d", "_", "AB", "x"]))
+    if rng.random() < 0.2:
+        pieces.append("\n📊 Full strategy view & live metrics: https://example.com/strategy")
+    return "".join(pieces), tickers
+
+
+# --- Properties ---
+def _outcome(fn, *args):
+    try:
+        return "ok", fn(*args)
+    except Exception as e:
+        return "raises", type(e).__name__
+
+
+def _same(a, b) -> bool:
+    # NaN-safe equality for safe_float
+    if a[0] == b[0] == "ok" and isinstance(a[1], float) and isinstance(b[1], float) and a[1] != a[1]:
+        return b[1] != b[1]
+    return a == b
+
+
+def _summary_leaks(args) -> bool:
+    """A known letters-only ticker of length >= 2 still appears as a whole word after masking."""
+    text, tickers = args
+    masked = mask_summary_text(text, tickers)
+    return any(
+        re.search(rf"\b{re.escape(t)}\b", masked, flags=re.IGNORECASE)
+        for t in tickers if len(t) >= 2 and t.isalpha()
+    )
+
+
+PROPERTIES = [
+    # name, generator, check(args) -> True when the property holds
+    ("mask_ticker matches reference", gen_ticker,
+     lambda x: _same(_outcome(mask_ticker, x), _outcome(ref_mask_ticker, x))),
+    ("strip_evidence_refs matches reference", gen_evidence_text,
+     lambda x: _same(_outcome(strip_evidence_refs, x), _outcome(ref_strip_evidence_refs, x))),
+    ("safe_float matches reference", gen_number,
+     lambda x: _same(_outcome(safe_float, x), _outcome(ref_safe_float, x))),
+    ("format_us_date matches reference", gen_date,
+     lambda x: _same(_outcome(format_us_date, x), _outcome(ref_format_us_date, x))),
+    ("mask_summary_text matches reference", gen_summary,
+     lambda x: _same(_outcome(mask_summary_text, *x), _outcome(ref_mask_summary_text, *x))),
+    ("mask_summary_text leaves no ticker unmasked", gen_summary, lambda x: not _summary_leaks(x)),
+]
+
+
+def _shrink(value, holds):
+    """Smallest failing variant of `value` found by deleting characters (strings and summary texts)."""
+    def candidates(v):
+        if isinstance(v, str):
+            for size in (8, 4, 2, 1):
+                for i in range(0, len(v), size):
+                    yield v[:i] + v[i + size:]
+        elif isinstance(v, tuple) and isinstance(v[0], str):
+            for text in candidates(v[0]):
+                yield (text, v[1])
+            for ticker in sorted(v[1]):
+                yield (v[0], v[1] - {ticker})
+
+    changed = True
+    while changed:
+        changed = False
+        for candidate in candidates(value):
+            if not _holds_safely(holds, candidate):
+                value, changed = candidate, True
+                break
+    return value
+
+
+def _holds_safely(holds, value) -> bool:
+    try:
+        return holds(value)
+    except Exception:
+        return False
+
+
+def run_properties(examples: int, seed: int) -> int:
+    failures = 0
+    for name, generate, holds in PROPERTIES:
+        rng = random.Random(f"{seed}:{name}")
+        for i in range(examples):
+            value = generate(rng)
+            if not _holds_safely(holds, value):
+                minimal = _shrink(value, holds)
+                print(f"[FAIL] {name}: counterexample {minimal!r} (example {i + 1}, seed {seed})")
+                failures += 1
+                break
+        else:
+            print(f"[PASS] {name} ({examples} examples)")
+    return failures
+
+
+# --- Speed gate ---
+def _corpus(generate, n: int, seed: int, unique: int):
+    """`n` inputs drawn from `unique` distinct ones, so caches see realistic repetition."""
+    rng = random.Random(seed)
+    pool = [generate(rng) for _ in range(unique)]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def _clear_caches():
+    formatters._mask_value.cache_clear()
+    formatters._format_date_text.cache_clear()
+    formatters._ticker_pattern.cache_clear()
+
+
+def _radar_case():
+    """A radar-sized summary (weekly post) over a 1,000-ticker portfolio."""
+    rng = random.Random(11)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    tickers = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(2, 5))) for _ in range(1000)})
+    lines = [
+        f"• ${rng.choice(tickers)} | NEWS+DVG+BD200 | -{rng.uniform(5, 25):.1f}% | Vol {rng.uniform(0.5, 3):.1f}x | "
+        f"{rng.choice(tickers)} expands partnership with {rng.choice(tickers)}"
+        for _ in range(40)
+    ]
+    return "\n".join(lines), tickers
+
+
+def _time_calls(fn, inputs, repeat: int = 5) -> float:
+    """Best seconds per call over `repeat` passes, caches cleared before each pass."""
+    best = float("inf")
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        for value in inputs:
+            fn(value)
+        best = min(best, (time.perf_counter() - start) / len(inputs))
+    return best
+
+
+def run_benchmarks() -> dict:
+    """name -> {"us_per_call", "throughput", "unit", "reference_us"} on fixed corpora."""
+    tickers = [t for t in _corpus(gen_ticker, 20_000, 1, 2_000) if isinstance(t, str)]
+    dates = _corpus(gen_date, 20_000, 2, 2_000)
+    texts = _corpus(gen_evidence_text, 5_000, 3, 5_000)
+    numbers = _corpus(gen_number, 20_000, 4, 20_000)
+    radar = _radar_case()
+    cases = [
+        ("mask_ticker", mask_ticker, ref_mask_ticker, tickers, None),
+        ("format_us_date", format_us_date, ref_format_us_date, dates, None),
+        ("strip_evidence_refs", strip_evidence_refs, ref_strip_evidence_refs, texts, None),
+        ("safe_float", safe_float, ref_safe_float, numbers, None),
+        ("mask_summary_text", lambda case: mask_summary_text(*case), lambda case: ref_mask_summary_text(*case),
+         [radar] * 20, len(radar[0].encode("utf-8"))),
+    ]
+    results = {}
+    for name, fn, reference, inputs, nbytes in cases:
+        seconds = _time_calls(fn, inputs)
+        reference_seconds = _time_calls(reference, inputs)
+        if nbytes:
+            throughput, unit = nbytes / 1024 / seconds, "KB/s"
+        else:
+            throughput, unit = 1 / seconds, "calls/s"
+        results[name] = {
+            "us_per_call": round(seconds * 1e6, 3),
+            "throughput": round(throughput, 1),
+            "unit": unit,
+            "reference_us": round(reference_seconds * 1e6, 3),
+        }
+    return results
+
+
+def check_benchmarks(results: dict, baseline: dict, tolerance: float) -> int:
+    failures = 0
+    print(f"\n{'function':<20} {'µs/call':>9} {'baseline':>9} {'reference':>10} {'throughput':>18}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = (f"{name:<20} {result['us_per_call']:>9.2f} {base['us_per_call'] if base else float('nan'):>9.2f} "
+                f"{result['reference_us']:>10.2f} {result['throughput']:>12,.0f} {result['unit']}")
+        if base is None:
+            print(f"[SKIP] {line} (no baseline)")
+            continue
+        slower = result["us_per_call"] > base["us_per_call"] * (1 + tolerance)
+        lower = result["throughput"] < base["throughput"] / (1 + tolerance)
+        if slower or lower:
+            failures += 1
+            print(f"[FAIL] {line}")
+        else:
+            print(f"[PASS] {line}")
+    return failures
+
+
+def _option(name: str, default, cast):
+    if name in sys.argv:
+        return cast(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+if __name__ == "__main__":
+    if "-h" in sys.argv or "--help" in sys.argv:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(0)
+
+    failures = run_properties(_option("--examples", DEFAULT_EXAMPLES, int), _option("--seed", 0, int))
+
+    if "--update-baseline" in sys.argv:
+        results = run_benchmarks()
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        check_benchmarks(results, results, 0)
+    elif "--bench" in sys.argv:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        failures += check_benchmarks(run_benchmarks(), baseline, _option("--tolerance", DEFAULT_TOLERANCE, float))
+
+    if failures > 0:
+        print(f"\nResult: FAILED. {failures} failures.")
+        sys.exit(1)
+    print("\nResult: PASSED.")
+    sys.exit(0)
@@ -0,0 +1,71 @@
+"""Screener checks: the indexed evaluator against the row-at-a-time predicate.
+
+Every screen runs both through `Screen.evaluate` (ScreenerIndex) and
+`Screen.matches` (one row at a time), over rows with missing fields, and
+must select exactly the expected tickers both ways.
+
+Usage:
+    python verify_screener.py
+"""
+import sys
+
+from screener import ScreenerIndex, build_screener_columns, compile_screen, field_value
+
+ROWS = [
+    {"ticker": "AAA", "last_price": 10.0, "ema21": 12.0, "sma200": 8.0, "rsi14": 25.0, "company_name": "Tech"},
+    {"ticker": "BBB", "last_price": 20.0, "ema21": 20.0, "sma200": None, "rsi14": 55.0, "company_name": 'Say "hi"'},
+    {"ticker": "CCC", "last_price": None, "ema21": 15.0, "sma200": 30.0, "rsi14": None, "company_name": None},
+    {"ticker": "DDD", "last_price": 40.0, "ema21": None, "sma200": 35.0, "rsi14": 70.0, "company_name": "Tech"},
+]
+
+# Rows missing either side of a comparison never match, whatever the operator
+TEST_CASES = [
+    ("price != ema21", ["AAA"]),
+    ("price == ema21", ["BBB"]),
+    ("price < ema21", ["AAA"]),
+    ("price > sma200", ["AAA", "DDD"]),
+    ("price != 20", ["AAA", "DDD"]),
+    ("rsi14 != 55", ["AAA", "DDD"]),
+    ("not price != ema21", ["BBB", "CCC", "DDD"]),
+    ("price != ema21 or rsi14 > 60", ["AAA", "DDD"]),
+    ("price between 15 and 45", ["BBB", "DDD"]),
+    ('sector = "Tech"', ["AAA", "DDD"]),
+    ('sector = "Say \\"hi\\""', ["BBB"]),
+    ('sector != "Tech"', ["BBB"]),
+]
+
+
+def row_values(row: dict, fields) -> dict:
+    values = {}
+    for field in fields:
+        value = field_value(field, row)
+        if value is not None:
+            values[field] = value
+    return values
+
+
+def run_tests():
+    tickers = [row["ticker"] for row in ROWS]
+    index = ScreenerIndex(build_screener_columns(ROWS), tickers)
+
+    failures = 0
+    for i, (text, expected) in enumerate(TEST_CASES, 1):
+        screen = compile_screen(text)
+        indexed = [tickers[row_id] for row_id in screen.evaluate(index)]
+        by_row = [row["ticker"] for row in ROWS if screen.matches(row_values(row, screen.fields))]
+        if indexed != expected or by_row != expected:
+            print(f"[FAIL] Test {i}: {text!r} -> expected {expected}, index {indexed}, rows {by_row}")
+            failures += 1
+        else:
+            print(f"[PASS] Test {i}: {text!r} -> {indexed}")
+
+    if failures > 0:
+        print(f"\nResult: FAILED. {failures} failures.")
+        sys.exit(1)
+    else:
+        print(f"\nResult: PASSED. All {len(TEST_CASES)} tests passed.")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    run_tests()
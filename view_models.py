@@ -0,0 +1,403 @@
+"""Builds the masked, formatted render artifacts for one snapshot.
+
+Everything here is pure (no Streamlit), so the same artifacts can be built
+by any app replica or offline tool and shared through the render cache.
+"""
+import pandas as pd
+
+from formatters import (
+    build_focus_options,
+    build_one_line_verdict,
+    build_playbook_lines,
+    determine_setup_label,
+    format_ban_line,
+    format_catalyst_label,
+    format_distance_pct,
+    format_key_levels_line,
+    format_news_evidence,
+    format_tech_status,
+    format_urgency_news,
+    format_us_date,
+    format_volume_evidence,
+    mask_summary_text,
+    mask_ticker,
+    resolve_next_action,
+    strip_evidence_refs,
+)
+from screener import build_screener_columns
+from search_index import build_search_index, snapshot_documents
+
+# Bump when the artifact layout changes so cached files from older code are not reused
+ARTIFACTS_VERSION = 4
+
+DEFAULT_FOCUS_MESSAGE = "No active signals in Focus List."
+
+# Order: Ticker, Price, Hold, Earnings, EMA21, EMA55, SMA200, RSI, ATR, Vol, Quant, Grades
+PORTFOLIO_COLUMNS = [
+    'ticker', 'picked_date', 'last_price', 'hold_streak_days', 'earnings_fmt',
+    'ema21_fmt', 'ema55_fmt', 'sma200_fmt', 'rsi14', 'atr14_pct', 'vol_ratio',
+    'quant_rating_emoji', 'value_grade', 'growth_grade',
+    'profitability_grade', 'momentum_grade', 'eps_revisions_grade'
+]
+
+PORTFOLIO_RENAMES = {
+    'quant_rating_emoji': 'quant',
+    'last_price': 'price',
+    'earnings_fmt': 'earnings',
+    'ema21_fmt': 'ema21',
+    'ema55_fmt': 'ema55',
+    'sma200_fmt': 'sma200',
+    'vol_ratio': 'vol'
+}
+
+GRADE_COLUMNS = {
+    'value_grade': 'Val',
+    'growth_grade': 'Gro',
+    'profitability_grade': 'Pro',
+    'momentum_grade': 'Mom',
+    'eps_revisions_grade': 'Rev'
+}
+GRADE_ORDER = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'F']
+QUANT_ORDER = ['Strong Buy', 'Buy', 'Hold', 'Sell', 'Strong Sell']
+HOLD_RULE_WARN_DAYS = 30
+
+
+def collect_tickers(data: dict) -> set:
+    """All raw tickers appearing in the portfolio or focus list."""
+    tickers = set()
+    for section in ("table_view_model", "focus_view_model"):
+        for item in data.get(section, []):
+            if item.get("ticker"):
+                tickers.add(item["ticker"])
+    return tickers
+
+
+def artifact_key(digest: str) -> str:
+    """Render cache key: snapshot digest plus the artifact layout version."""
+    return f"{digest}.v{ARTIFACTS_VERSION}"
+
+
+def build_scan_row(item: dict) -> dict:
+    return {
+        'Ticker': mask_ticker(item.get('ticker', '')),
+        'Setup': determine_setup_label(item),
+        'Tech': format_tech_status(item),
+        'Distance': format_distance_pct(item.get('dist_sma200_pct')),
+        'Catalyst': format_catalyst_label(item.get('dte')),
+        'Urgency/News': format_urgency_news(item.get('urgency'), item.get('news_sentiment_raw'))
+    }
+
+
+def build_deep_dive(item: dict) -> dict:
+    """All text lines of the Deep Dive section for one focus item."""
+    latest_price = item.get('latest_price')
+    price_type = item.get('price_type') or 'Close'
+    price_timestamp = item.get('price_timestamp') or '—'
+
+    price_label = "N/A"
+    if latest_price is not None:
+        price_label = f"${latest_price:.2f} ({price_type}, {price_timestamp})"
+
+    divergence_text = strip_evidence_refs(str(item.get('divergence', '')))
+
+    verdict = str(item.get('verdict') or '').upper()
+    trend_color = str(item.get('trend_color') or '').upper()
+
+    action_plan = item.get('action_plan', '')
+    action_clean = strip_evidence_refs(str(action_plan)) if action_plan else ''
+
+    td = item.get('trigger_details', {})
+    trigger_details = str(td.get('details')) if isinstance(td, dict) and td.get('details') else ''
+
+    return {
+        'verdict_line': build_one_line_verdict(item),
+        'price': price_label,
+        'key_levels': format_key_levels_line(item),
+        'volume': format_volume_evidence(item.get('vol_ratio')),
+        'news': format_news_evidence(item),
+        'divergence': divergence_text if divergence_text else '—',
+        'ban': format_ban_line(item.get('dte')),
+        'playbook': build_playbook_lines(item),
+        'next_action': resolve_next_action(verdict, trend_color),
+        'action_plan': action_clean,
+        'trigger_details': trigger_details
+    }
+
+
+def build_portfolio_columns(raw_table) -> dict:
+    """Masked, US-date formatted portfolio table as a column -> values mapping.
+
+    `raw_table` may be a list of row dicts or a column -> values mapping.
+    """
+    df = pd.DataFrame(raw_table)
+
+    if 'picked_date' not in df.columns:
+        df['picked_date'] = None
+
+    # Process Picked and Earnings formats for US Standard
+    df['picked_date'] = df['picked_date'].apply(format_us_date)
+    if 'earnings_fmt' in df.columns:
+        df['earnings_fmt'] = df['earnings_fmt'].apply(format_us_date)
+
+    final_display = df.reindex(columns=PORTFOLIO_COLUMNS).rename(columns=PORTFOLIO_RENAMES)
+
+    ticker_raw = final_display['ticker'].fillna('').astype(str).str.strip().str.upper()
+    final_display['ticker_raw'] = ticker_raw
+    final_display['ticker'] = ticker_raw.apply(mask_ticker)
+    return final_display.astype(object).where(final_display.notna(), None).to_dict(orient="list")
+
+
+def _round(value, digits: int = 2):
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+def build_portfolio_summary(raw_table) -> dict:
+    """Portfolio-level aggregates (returns, sectors, sell-rule proximity, ratings, grades).
+
+    `raw_table` may be a list of row dicts or a column -> values mapping.
+    Only the best/worst picks name a ticker, and those are masked.
+    """
+    columns = ['ticker', 'return_pct', 'company_name', 'hold_countdown', 'quant_rating', *GRADE_COLUMNS]
+    if isinstance(raw_table, dict):
+        df = pd.DataFrame(raw_table).reindex(columns=columns)
+    else:
+        df = pd.DataFrame.from_records(raw_table, columns=columns) # Only the columns aggregated
+    if df.empty:
+        return None
+
+    returns = pd.to_numeric(df['return_pct'], errors='coerce')
+    priced = returns.notna()
+    summary = {
+        "picks": int(len(df)),
+        "avg_return": _round(returns.mean()),
+        "median_return": _round(returns.median()),
+        "winners": int((returns > 0).sum()),
+        "losers": int((returns < 0).sum()),
+        "best": None,
+        "worst": None
+    }
+    if priced.any():
+        for key, position in (("best", returns.idxmax()), ("worst", returns.idxmin())):
+            summary[key] = {
+                "ticker": mask_ticker(str(df.at[position, 'ticker'] or '').strip().upper()),
+                "return_pct": _round(returns[position])
+            }
+
+    sectors = (
+        df.assign(return_pct=returns, sector=df['company_name'].fillna('Unknown'))
+        .groupby('sector')['return_pct']
+        .agg(['size', 'mean', 'median'])
+        .sort_values(['size', 'mean'], ascending=[False, False])
+    )
+    summary["sectors"] = {
+        "sector": sectors.index.tolist(),
+        "picks": sectors['size'].astype(int).tolist(),
+        "avg_return": [_round(v) for v in sectors['mean']],
+        "median_return": [_round(v) for v in sectors['median']]
+    }
+
+    countdown = pd.to_numeric(df['hold_countdown'], errors='coerce')
+    summary["hold_rule"] = {
+        "at_limit": int((countdown <= 0).sum()),
+        "near_limit": int(((countdown > 0) & (countdown <= HOLD_RULE_WARN_DAYS)).sum()),
+        "warn_days": HOLD_RULE_WARN_DAYS
+    }
+
+    ratings = df['quant_rating'].fillna('N/A').astype(str).value_counts()
+    order = [r for r in QUANT_ORDER if r in ratings.index] + sorted(r for r in ratings.index if r not in QUANT_ORDER)
+    summary["quant_ratings"] = {"rating": order, "picks": [int(ratings[r]) for r in order]}
+
+    # Grades arrive as "🟢 A+": count the raw labels, then fold them onto the letter grade
+    grades = {}
+    for column, label in GRADE_COLUMNS.items():
+        counts = df[column].value_counts()
+        grades[label] = counts.groupby(counts.index.astype(str).str.split().str[-1]).sum()
+    seen = set().union(*(counts.index for counts in grades.values()))
+    rows = [g for g in GRADE_ORDER if g in seen] + sorted(g for g in seen if g not in GRADE_ORDER)
+    summary["grades"] = {"grade": rows}
+    for label, counts in grades.items():
+        summary["grades"][label] = [int(counts.get(g, 0)) for g in rows]
+    return summary
+
+
+CHANGE_LABELS = {
+    'verdict': 'Verdict',
+    'trend_color': 'Trend',
+    'primary_trigger_key': 'Trigger',
+    'quant_rating': 'Quant',
+    'ap_rule_action': 'AP rule',
+    **GRADE_COLUMNS
+}
+MEMBERSHIP_LABELS = {
+    'focus_view_model': ('Entered focus list', 'Left focus list'),
+    'table_view_model': ('New pick', 'Left portfolio')
+}
+
+
+def _describe_change(field: str, old, new) -> str:
+    if field == 'above_sma200':
+        return 'Crossed above SMA200' if new else 'Crossed below SMA200'
+    if field == 'volume_alert':
+        return 'Volume alert on' if new else 'Volume alert off'
+    return f"{CHANGE_LABELS.get(field, field)}: {old or '—'} → {new or '—'}"
+
+
+def build_change_rows(change_set: dict) -> dict:
+    """Masked "changes since last sync" rows (one per ticker) plus per-kind counts."""
+    changes = {}
+    counts = {'entered': 0, 'left': 0, 'verdict': 0, 'sma200': 0}
+    for section, (added_label, removed_label) in MEMBERSHIP_LABELS.items():
+        diff = change_set.get(section) or {}
+        for label, tickers in ((added_label, diff.get('added', [])), (removed_label, diff.get('removed', []))):
+            for ticker in tickers:
+                changes.setdefault(ticker, []).append(label)
+        if section == 'focus_view_model':
+            counts['entered'] += len(diff.get('added', []))
+            counts['left'] += len(diff.get('removed', []))
+        for ticker, fields in (diff.get('changed') or {}).items():
+            lines = changes.setdefault(ticker, [])
+            for field, (old, new) in fields.items():
+                line = _describe_change(field, old, new)
+                if line in lines:
+                    continue # SMA200 crossings are seen in both sections
+                lines.append(line)
+                counts['verdict'] += field == 'verdict'
+                counts['sma200'] += field == 'above_sma200'
+    return {
+        "rows": [{'Ticker': mask_ticker(ticker), 'Changes': ' · '.join(lines)} for ticker, lines in changes.items()],
+        "counts": counts
+    }
+
+
+def build_meta_artifacts(meta: dict) -> dict:
+    return {
+        "updated_at": meta.get("updated_at", "Unknown"),
+        "focus_message": meta.get("focus_message", DEFAULT_FOCUS_MESSAGE)
+    }
+
+
+def build_focus_artifacts(focus_items: list) -> dict:
+    """Navigator options, scan rows and deep-dive text for the focus list."""
+    options, ticker_map = build_focus_options(focus_items)
+
+    deep_dive = {}
+    for item in focus_items:
+        ticker = item.get('ticker')
+        if ticker and ticker not in deep_dive:
+            deep_dive[ticker] = build_deep_dive(item)
+
+    return {
+        # Raw items, for re-deriving price-dependent rows from live quotes (live_quotes.py)
+        "focus_items": list(focus_items),
+        "focus_tickers": [item.get('ticker') for item in focus_items if item.get('ticker')],
+        "focus_options": options,
+        "focus_ticker_map": ticker_map,
+        "scan_rows": [build_scan_row(item) for item in focus_items],
+        "deep_dive": deep_dive
+    }
+
+
+def build_render_artifacts(data: dict) -> dict:
+    """Derives every masked/formatted piece of the public view from a snapshot."""
+    if not data:
+        return {"available": False}
+
+    meta = data.get("meta", {})
+    raw_table = data.get("table_view_model", [])
+
+    artifacts = {
+        "available": True,
+        "meta": build_meta_artifacts(meta),
+        "summary_text": mask_summary_text(meta.get("focus_summary_text", ""), collect_tickers(data)),
+    }
+    artifacts.update(build_focus_artifacts(data.get("focus_view_model", [])))
+    artifacts["portfolio"] = build_portfolio_columns(raw_table) if raw_table else None
+    artifacts["portfolio_summary"] = build_portfolio_summary(raw_table) if raw_table else None
+    artifacts["screener"] = build_screener_columns(raw_table) if raw_table else None
+    artifacts["search"] = build_search_index(snapshot_documents(data))
+    return artifacts
+
+
+def update_render_artifacts(previous, base: dict, data: dict, changed: dict) -> dict:
+    """Rebuilds artifacts after a delta, re-deriving only the changed tickers.
+
+    `previous` are the artifacts of the `base` snapshot and `changed` maps
+    each section to the tickers whose rows changed or were added.
+    """
+    meta = data.get("meta", {})
+    focus_items = data.get("focus_view_model", [])
+    raw_table = data.get("table_view_model", [])
+    focus_changed = changed.get("focus_view_model", set())
+    table_changed = changed.get("table_view_model", set())
+
+    # Summary masking depends on the whole ticker set, so only reuse it when neither moved
+    tickers = collect_tickers(data)
+    summary_text = previous["summary_text"]
+    base_summary = base.get("meta", {}).get("focus_summary_text", "")
+    if meta.get("focus_summary_text", "") != base_summary or tickers != collect_tickers(base):
+        summary_text = mask_summary_text(meta.get("focus_summary_text", ""), tickers)
+
+    old_scan = dict(zip(previous["focus_tickers"], previous["scan_rows"]))
+    old_deep_dive = previous["deep_dive"]
+    scan_rows = []
+    deep_dive = {}
+    for item in focus_items:
+        ticker = item.get('ticker')
+        reuse = ticker and ticker not in focus_changed
+        scan_rows.append(old_scan[ticker] if reuse and ticker in old_scan else build_scan_row(item))
+        if ticker and ticker not in deep_dive:
+            reuse_dive = reuse and ticker in old_deep_dive
+            deep_dive[ticker] = old_deep_dive[ticker] if reuse_dive else build_deep_dive(item)
+    options, ticker_map = build_focus_options(focus_items)
+
+    artifacts = {
+        "available": True,
+        "meta": build_meta_artifacts(meta),
+        "summary_text": summary_text,
+        "focus_items": list(focus_items),
+        "focus_tickers": [item.get('ticker') for item in focus_items if item.get('ticker')],
+        "focus_options": options,
+        "focus_ticker_map": ticker_map,
+        "scan_rows": scan_rows,
+        "deep_dive": deep_dive,
+        "portfolio": None,
+        "portfolio_summary": None,
+        "screener": None,
+        # Masking depends on the whole ticker set; indexing a few hundred texts is cheap
+        "search": build_search_index(snapshot_documents(data))
+    }
+    if raw_table:
+        artifacts["portfolio"] = _update_portfolio_columns(previous["portfolio"], raw_table, table_changed)
+        # Aggregates depend on every row; one vectorized pass per version is cheap
+        artifacts["portfolio_summary"] = build_portfolio_summary(raw_table)
+        artifacts["screener"] = build_screener_columns(raw_table)
+    return artifacts
+
+
+def _update_portfolio_columns(previous: dict, raw_table: list, changed: set) -> dict:
+    """Splices freshly built rows for `changed` tickers into the previous columns, row by row."""
+    if not previous:
+        return build_portfolio_columns(raw_table)
+
+    # Only a ticker held by a single previous row can point back at it
+    old_positions = {}
+    for i, ticker in enumerate(previous["ticker_raw"]):
+        old_positions[ticker] = None if ticker in old_positions else i
+
+    rebuild = []
+    positions = [] # Per new row: (source is fresh, row position in that source)
+    for row in raw_table:
+        i = old_positions.get(str(row.get("ticker") or '').strip().upper())
+        if i is None or row.get("ticker") in changed:
+            positions.append((True, len(rebuild)))
+            rebuild.append(row)
+        else:
+            positions.append((False, i))
+    fresh = build_portfolio_columns(rebuild) if rebuild else None
+
+    columns = {name: [] for name in previous}
+    for is_fresh, i in positions:
+        source = fresh if is_fresh else previous
+        for name, values in columns.items():
+            values.append(source[name][i])
+    return columns